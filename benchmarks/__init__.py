@@ -0,0 +1,48 @@
+"""Snmp-fetch benchmarks.
+
+Each module is runnable on its own, e.g. `python -m benchmarks.event_loop`.
+"""
+
+import contextlib
+import subprocess
+import time
+from typing import Any, Callable, Iterator, Text, Tuple
+
+__all__ = ['snmpsimd', 'timed', 'report']
+
+
+@contextlib.contextmanager
+def snmpsimd() -> Iterator[None]:
+    """Start the simulation agent for benchmarking."""
+    process = subprocess.Popen(
+        [
+            'snmpsimd.py',
+            '--agent-udpv4-endpoint=127.0.0.1:1161',
+            '--agent-udpv6-endpoint=[::1]:1161'
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        shell=False
+    )
+    time.sleep(5)
+    try:
+        yield
+    finally:
+        process.kill()
+
+
+def timed(f: Callable[[], Any], repeat: int = 1) -> Tuple[float, Any]:
+    """Return the best wall time in seconds of `repeat` calls and the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label: Text, seconds: float, count: int, unit: Text = 'rows') -> None:
+    """Print one line of benchmark output."""
+    rate = count / seconds if seconds else float('inf')
+    print(f'{label:48s} {seconds:10.4f}s {rate:14,.0f} {unit}/s')
@@ -0,0 +1,38 @@
+"""Benchmark the event loop with a mix of responsive and blackholed hosts.
+
+Every blackholed host costs `timeout * (retries + 1)` seconds.  With one readiness wait over all
+sessions, those timeouts expire together and the total time stays flat as dead hosts are added.
+"""
+
+from snmp_fetch import PduType, SnmpConfig
+from snmp_fetch.api import fetch
+from . import report, snmpsimd, timed
+
+IF_INDEX = ((1, 3, 6, 1, 2, 1, 2, 2, 1, 1), (11 << 3, 8))
+
+RESPONSIVE = '127.0.0.1:1161'
+BLACKHOLED = '127.0.0.1:1234'
+COMMUNITY = 'recorded/linux-full-walk'
+
+
+def main() -> None:
+    """Run the benchmark."""
+    with snmpsimd():
+        for responsive, blackholed in [(100, 0), (100, 1), (100, 10), (100, 100), (1000, 1000)]:
+            hosts = [
+                *[(i, RESPONSIVE, COMMUNITY) for i in range(responsive)],
+                *[(responsive + i, BLACKHOLED, COMMUNITY) for i in range(blackholed)]
+            ]
+            config = SnmpConfig(retries=0, timeout=1, max_active_sessions=len(hosts))
+            seconds, (_, errors) = timed(
+                # pylint: disable=cell-var-from-loop
+                lambda: fetch(PduType.BULKGET, hosts, [IF_INDEX], config)
+            )
+            report(
+                f'walk {responsive} responsive/{blackholed} blackholed ({len(errors)} errors)',
+                seconds, len(hosts), 'hosts'
+            )
+
+
+if __name__ == '__main__':
+    main()
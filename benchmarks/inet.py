@@ -0,0 +1,112 @@
+"""Benchmark the inet Series accessors on 500k row ARP and route tables.
+
+The per row path applies a python function to each buffer.  The accessors stack the buffers into
+2-D arrays grouped by buffer length and convert each group in bulk.
+"""
+
+from typing import Any, Callable, Sequence, Text, Tuple
+
+import numpy as np
+import pandas as pd
+
+import snmp_fetch.pandas_extension  # noqa: F401  # pylint: disable=unused-import
+from snmp_fetch.pandas_extension.types import ip_address as ip
+from snmp_fetch.utils import cuint8_to_int
+from . import report, timed
+
+ROWS = 500000
+
+
+def buffers(lengths: Sequence[int], dtype: type = np.uint8) -> Any:
+    """Synthesize a Series of buffers cycling through the lengths."""
+    rng = np.random.RandomState(0)
+    return pd.Series([
+        rng.randint(0, 256, size=lengths[i % len(lengths)]).astype(dtype) for i in range(ROWS)
+    ])
+
+
+def chunked_buffers() -> Any:
+    """Synthesize a Series of length prefixed IPv4 and IPv6 buffers followed by a prefix."""
+    rng = np.random.RandomState(0)
+    return pd.Series([
+        np.concatenate([[size], rng.randint(0, 256, size=size + 1)]).astype(np.uint8)
+        for size in np.where(np.arange(ROWS) % 2, 4, 16)
+    ])
+
+
+def apply_to_inet_address(obj: Any) -> Any:
+    """Extract inet addresses one row at a time."""
+    def _to_inet_address(buffer: np.ndarray) -> Tuple[ip.IP_ADDRESS_T, Any]:
+        if len(buffer) == 4:
+            return ip.IPv4Address(cuint8_to_int(buffer)), None
+        if len(buffer) == 16:
+            return ip.IPv6Address(cuint8_to_int(buffer)), None
+        if len(buffer) == 8:
+            return ip.IPv4Address(cuint8_to_int(buffer[:4])), cuint8_to_int(buffer[4:])
+        return ip.IPv6Address(cuint8_to_int(buffer[:16])), cuint8_to_int(buffer[16:])
+    return pd.DataFrame(obj.apply(_to_inet_address).tolist(), index=obj.index)
+
+
+def apply_to_object_identifier(obj: Any) -> Any:
+    """Extract object identifiers one row at a time."""
+    return obj.apply(lambda x: '.' + '.'.join(x.astype(str)))
+
+
+def apply_chunk(obj: Any) -> Any:
+    """Chunk length prefixed buffers one row at a time."""
+    return pd.DataFrame(
+        obj.apply(lambda x: (x[1:int(x[0]) + 1], x[int(x[0]) + 1:])).tolist(), index=obj.index
+    )
+
+
+def apply_getitem(obj: Any) -> Any:
+    """Index buffers one row at a time."""
+    return obj.apply(lambda x: x[0])
+
+
+def apply_getitems(obj: Any) -> Any:
+    """Index and slice buffers one row at a time."""
+    return pd.DataFrame(obj.apply(lambda x: [x[0], x[1:]]).tolist(), index=obj.index)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    inet = buffers([4, 16, 8, 20])
+    oids = buffers([10, 12, 14], dtype=np.uint64)
+    chunked = chunked_buffers()
+
+    cases: Sequence[Tuple[Text, Callable[[], Any], Callable[[], Any]]] = [
+        (
+            'to_inet_address',
+            lambda: apply_to_inet_address(inet),
+            lambda: inet.inet.to_inet_address()
+        ),
+        (
+            'to_object_identifier',
+            lambda: apply_to_object_identifier(oids),
+            lambda: oids.inet.to_object_identifier()
+        ),
+        (
+            'buffer[0]',
+            lambda: apply_getitem(chunked),
+            lambda: chunked.inet.buffer[0]
+        ),
+        (
+            'buffer[0, 1:]',
+            lambda: apply_getitems(chunked),
+            lambda: chunked.inet.buffer[0, 1:]
+        ),
+        (
+            'buffer.chunk',
+            lambda: apply_chunk(chunked),
+            lambda: chunked.inet.buffer.chunk()
+        ),
+    ]
+    for label, per_row, bulk in cases:
+        for method, f in [('apply', per_row), ('accessor', bulk)]:
+            seconds, _ = timed(f)
+            report(f'{label} {method}', seconds, ROWS)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,114 @@
 """Python wrapper to the C API."""
 
-from typing import Any, Iterator, Optional, Sequence, Text, Tuple, Type
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Iterator, Optional, Sequence, Text, Tuple, Type, Union
 
 import pandas as pd
 from toolz.sandbox.core import unzip
 
 import snmp_fetch.pandas_extension  # noqa: F401
-from snmp_fetch.api import PduType, SnmpConfig, SnmpError, SnmpErrorType
+from snmp_fetch.api import PduType, SnmpConfig, SnmpError, SnmpErrorType, UsmCredentials
+from .aio import afetch, afetch_stream
 from .decorators import object_type, pipeline_hook
-from .distributed import distribute
+from .distributed import HOST_T, WEIGHTED_HOST_T, chunk_to_pandas, distribute
 from .distributed import fetch as distributed_fetch
+from .distributed import fetch_iter as distributed_fetch_iter
+from .distributed import remaining_to_pandas
 from .object_type import ObjectType
 
 __all__ = [
-    'PduType', 'SnmpConfig', 'SnmpError', 'SnmpErrorType', 'object_type', 'pipeline_hook'
+    'PduType', 'SnmpConfig', 'SnmpError', 'SnmpErrorType', 'UsmCredentials', 'afetch',
+    'afetch_stream', 'fetch_stream', 'object_type', 'pipeline_hook'
 ]
 
 
+def _fetch_batch(
+        pdu_type: PduType,
+        obj_type: Type[ObjectType],
+        parameter: Optional[Text],
+        config: Optional[SnmpConfig],
+        output: Text,
+        batch: Tuple[Sequence[Union[HOST_T, WEIGHTED_HOST_T]], Any, Optional[Sequence[Text]]]
+) -> Tuple[Any, Sequence[SnmpError]]:
+    # pylint: disable=too-many-arguments
+    """Fetch a batch of hosts from distribute and map the results."""
+    hosts, data, index = batch
+    results, errors = distributed_fetch(pdu_type, hosts, obj_type, parameter, config=config)
+    if output == 'arrow':
+        return obj_type.to_arrow(results, parameter), errors
+    return obj_type.to_pandas(results, data, index, parameter), errors
+
+
 def fetch(
         pdu_type: PduType,
         df: Any,
         obj_type: Type[ObjectType],
         parameter: Optional[Text] = None,
         config: Optional[SnmpConfig] = None,
+        output: Text = 'pandas',
+        workers: Optional[int] = None,
+        executor: Text = 'process',
+        batch_size: Optional[int] = None,
         **kwargs: Text
 ) -> Tuple[Any, Sequence[SnmpError]]:
-    """Fetch SNMP results and map to a DataFrame."""
-    def _fetch() -> Iterator[Tuple[Any, Sequence[SnmpError]]]:
-        for hosts, data, index in distribute(df, None, **kwargs):
-            results, errors = distributed_fetch(
-                pdu_type,
-                hosts,
-                obj_type,
-                parameter,
-                config=config
-            )
-            yield obj_type.to_pandas(results, data, index), errors
-
-    result_dfs, errors_lists = unzip(list(_fetch()))
-
-    return (
-        pd.concat(result_dfs),
-        [error for errors in errors_lists for error in errors]
-    )
+    # pylint: disable=too-many-arguments
+    """Fetch SNMP results and map to a DataFrame.
+
+    With output='arrow', the results are instead mapped to an Arrow Table per ObjectType column
+    without merging the DataFrame; '#index' holds the position of the host row in the DataFrame.
+
+    With workers, the DataFrame is split into batches of batch_size rows, one batch per worker by
+    default, which are fetched and mapped on a pool of that many worker processes or threads
+    (executor='process' or 'thread').  The mapping of one batch overlaps the fetch of the others
+    and the results are concatenated in the order of the batches.  Each worker runs up to
+    config.max_active_sessions sessions of its own.
+    """
+    if output not in {'pandas', 'arrow'}:
+        raise ValueError(f"output '{output}' is not a valid output: ['pandas', 'arrow']")
+    if executor not in {'process', 'thread'}:
+        raise ValueError(f"executor '{executor}' is not a valid executor: ['process', 'thread']")
+
+    if workers and batch_size is None:
+        batch_size = max(-(-len(df) // workers), 1)
+
+    fetch_batch = partial(_fetch_batch, pdu_type, obj_type, parameter, config, output)
+    batches = distribute(df, batch_size, **kwargs)
+    if workers:
+        executor_type = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+        with executor_type(max_workers=workers) as pool:
+            results, errors_lists = unzip(list(pool.map(fetch_batch, batches)))
+    else:
+        results, errors_lists = unzip(list(map(fetch_batch, batches)))
+    errors = [error for chunk_errors in errors_lists for error in chunk_errors]
+
+    if output == 'arrow':
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        return [pa.Table.from_batches(column) for column in zip(*results)], errors
+
+    return pd.concat(results), errors
+
+
+def fetch_stream(
+        pdu_type: PduType,
+        df: Any,
+        obj_type: Type[ObjectType],
+        parameter: Optional[Text] = None,
+        config: Optional[SnmpConfig] = None,
+        chunk_size: int = 1,
+        **kwargs: Text
+) -> Iterator[Tuple[Any, Sequence[SnmpError]]]:
+    # pylint: disable=too-many-arguments
+    """Fetch SNMP results and map to a DataFrame per chunk of completed hosts.
+
+    Each chunk holds every row of the hosts completed since the last chunk.  Hosts without any
+    results are yielded in a final chunk once the fetch is complete.
+    """
+    for hosts, data, index in distribute(df, None, **kwargs):
+        for response in distributed_fetch_iter(
+                pdu_type, hosts, obj_type, parameter, config=config, chunk_size=chunk_size
+        ):
+            chunk, data = chunk_to_pandas(obj_type, response, data, index, parameter)
+            yield chunk
+        if not data.empty:
+            yield remaining_to_pandas(obj_type, data, index, parameter)
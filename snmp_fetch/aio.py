@@ -0,0 +1,133 @@
+"""Asyncio implementation."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Optional, Sequence, Text, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from .api import FetchIterator, PduType, SnmpConfig, SnmpError
+from .distributed import HOST_T, WEIGHTED_HOST_T, chunk_to_pandas, distribute
+from .distributed import fetch_iter as distributed_fetch_iter
+from .distributed import remaining_to_pandas
+from .object_type import ObjectType
+
+MIN_POLL_DELAY = 0.001  # seconds
+
+
+def _step(
+        iterator: FetchIterator
+) -> Tuple[bool, Optional[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]]:
+    """Poll a fetch iterator once; a future cannot hold StopIteration so it is returned as done."""
+    try:
+        return False, iterator.poll()
+    except StopIteration:
+        return True, None
+
+
+async def poll(
+        iterator: FetchIterator
+) -> AsyncIterator[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]:
+    """Drive a fetch iterator from the running event loop.
+
+    The event loop watches the file descriptor of the iterator and polls it when a response is
+    readable or a retry or timeout is due.  Polling opens sessions, which resolves hosts and
+    probes SNMPv3 engines synchronously, so it runs on a thread of its own rather than blocking
+    the event loop; the single thread also keeps the calls on the iterator in order.
+    """
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    fd = iterator.fileno()
+    loop.add_reader(fd, ready.set)
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        while True:
+            ready.clear()
+            done, chunk = await loop.run_in_executor(executor, _step, iterator)
+            if done:
+                return
+            if chunk is not None:
+                yield chunk
+                continue
+            # nothing may be due, e.g. while sessions wait on the pending hosts; do not spin
+            try:
+                await asyncio.wait_for(ready.wait(), max(iterator.timeout(), MIN_POLL_DELAY))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        loop.remove_reader(fd)
+        # close once a poll still running on the thread returns, e.g. when cancelled
+        executor.submit(iterator.close)
+        executor.shutdown(wait=False)
+
+
+async def fetch_iter(
+        pdu_type: PduType,
+        hosts: Sequence[Union[HOST_T, WEIGHTED_HOST_T]],
+        var_bind: Type[ObjectType],
+        parameter: Optional[Text] = None,
+        config: Optional[SnmpConfig] = None,
+        chunk_size: int = 1
+) -> AsyncIterator[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]:
+    # pylint: disable=too-many-arguments
+    """Wrap the C API version of fetch_iter as an async iterator.
+
+    Without hosts, e.g. for an empty DataFrame, nothing is yielded instead of raising.
+    """
+    if not hosts:
+        return
+    async for chunk in poll(distributed_fetch_iter(
+            pdu_type, hosts, var_bind, parameter, config=config, chunk_size=chunk_size
+    )):
+        yield chunk
+
+
+async def afetch_stream(
+        pdu_type: PduType,
+        df: Any,
+        obj_type: Type[ObjectType],
+        parameter: Optional[Text] = None,
+        config: Optional[SnmpConfig] = None,
+        chunk_size: int = 1,
+        **kwargs: Text
+) -> AsyncIterator[Tuple[Any, Sequence[SnmpError]]]:
+    # pylint: disable=too-many-arguments
+    """Fetch SNMP results and map to a DataFrame per chunk of completed hosts.
+
+    See snmp_fetch.fetch_stream.
+    """
+    for hosts, data, index in distribute(df, None, **kwargs):
+        async for response in fetch_iter(
+                pdu_type, hosts, obj_type, parameter, config=config, chunk_size=chunk_size
+        ):
+            chunk, data = chunk_to_pandas(obj_type, response, data, index, parameter)
+            yield chunk
+        if not data.empty:
+            yield remaining_to_pandas(obj_type, data, index, parameter)
+
+
+async def afetch(
+        pdu_type: PduType,
+        df: Any,
+        obj_type: Type[ObjectType],
+        parameter: Optional[Text] = None,
+        config: Optional[SnmpConfig] = None,
+        **kwargs: Text
+) -> Tuple[Any, Sequence[SnmpError]]:
+    """Fetch SNMP results and map to a DataFrame.
+
+    See snmp_fetch.fetch.
+    """
+    result_dfs: List[Any] = []
+    errors: List[SnmpError] = []
+    async for result_df, chunk_errors in afetch_stream(
+            pdu_type, df, obj_type, parameter, config=config, chunk_size=len(df), **kwargs
+    ):
+        result_dfs.append(result_df)
+        errors.extend(chunk_errors)
+    # an empty DataFrame streams no chunks and maps to an empty DataFrame; see snmp_fetch.fetch
+    if not result_dfs:
+        _, data, index = next(distribute(df, None, **kwargs))
+        return remaining_to_pandas(obj_type, data, index, parameter)
+    return pd.concat(result_dfs), errors
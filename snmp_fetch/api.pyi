@@ -1,6 +1,6 @@
 """Stub file for C API."""
 
-from typing import Optional, Sequence, Text, Tuple
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Text, Tuple, Union
 
 import numpy as np
 
@@ -17,6 +17,7 @@ class SnmpErrorType(type):
     TRANSPORT_DISCONNECT_ERROR: 'SnmpErrorType'
     CREATE_RESPONSE_PDU_ERROR: 'SnmpErrorType'
     VALUE_WARNING: 'SnmpErrorType'
+    DEADLINE_ERROR: 'SnmpErrorType'
 
 
 class SnmpError:
@@ -24,7 +25,7 @@ class SnmpError:
     """SnmpError stub."""
 
     type: SnmpErrorType
-    host: Tuple[int, Text, Text]
+    host: Tuple[int, Text, Union[Text, 'UsmCredentials']]
     sys_errno: Optional[int]
     snmp_errno: Optional[int]
     err_stat: Optional[int]
@@ -41,7 +42,7 @@ class SnmpError:
     def __init__(
             self,
             type: SnmpErrorType,
-            host: Tuple[int, Text, Text],
+            host: Tuple[int, Text, Union[Text, 'UsmCredentials']],
             sys_errno: Optional[int] = ...,
             snmp_errno: Optional[int] = ...,
             err_stat: Optional[int] = ...,
@@ -54,6 +55,40 @@ class SnmpError:
         ...
 
 
+class UsmCredentials:
+    # pylint: disable=too-few-public-methods
+    """UsmCredentials stub."""
+
+    security_name: Text
+    auth_protocol: Optional[Text]
+    auth_passphrase: Optional[Text]
+    priv_protocol: Optional[Text]
+    priv_passphrase: Optional[Text]
+    context_name: Text
+
+    def __init__(
+            self,
+            security_name: Text,
+            auth_protocol: Optional[Text] = ...,
+            auth_passphrase: Optional[Text] = ...,
+            priv_protocol: Optional[Text] = ...,
+            priv_passphrase: Optional[Text] = ...,
+            context_name: Text = ...
+    ) -> None:
+        # pylint: disable=too-many-arguments, unused-argument
+        """Initialize SNMPv3 credentials."""
+        ...
+
+
+class IndexKind(type):
+    """IndexKind stub."""
+
+    INDEX_INTEGER: 'IndexKind'
+    INDEX_FIXED: 'IndexKind'
+    INDEX_LENGTH_PREFIXED: 'IndexKind'
+    INDEX_IMPLIED: 'IndexKind'
+
+
 class PduType(type):
     """PduType stub."""
 
@@ -71,6 +106,21 @@ class SnmpConfig:
     max_active_sessions: int
     max_var_binds_per_pdu: int
     max_bulk_repetitions: int
+    max_inflight_pdus_per_host: int
+    threads: int
+    spill_directory: Optional[Text]
+    max_result_bytes_in_memory: int
+    session_pool: bool
+    session_idle_timeout: int
+    dns_cache_ttl: int
+    shared_sockets: int
+    engine_cache_ttl: int
+    adaptive_bulk_repetitions: bool
+    min_bulk_repetitions: int
+    partition_retries: int
+    max_pdus_per_second_per_host: int
+    max_pdus_per_second: int
+    deadline: int
 
     def __init__(
             self,
@@ -78,7 +128,22 @@ class SnmpConfig:
             timeout: int = ...,
             max_active_sessions: int = ...,
             max_var_binds_per_pdu: int = ...,
-            max_bulk_repetitions: int = ...
+            max_bulk_repetitions: int = ...,
+            max_inflight_pdus_per_host: int = ...,
+            threads: int = ...,
+            spill_directory: Optional[Text] = ...,
+            max_result_bytes_in_memory: int = ...,
+            session_pool: bool = ...,
+            session_idle_timeout: int = ...,
+            dns_cache_ttl: int = ...,
+            shared_sockets: int = ...,
+            engine_cache_ttl: int = ...,
+            adaptive_bulk_repetitions: bool = ...,
+            min_bulk_repetitions: int = ...,
+            partition_retries: int = ...,
+            max_pdus_per_second_per_host: int = ...,
+            max_pdus_per_second: int = ...,
+            deadline: int = ...
     ) -> None:
         # pylint: disable=too-many-arguments, unused-argument
         """Initialize an SNMP error object."""
@@ -87,10 +152,79 @@ class SnmpConfig:
 
 def fetch(
         pdu_type: PduType,
-        hosts: Sequence[Tuple[int, Text, Text]],
+        hosts: Sequence[Tuple[int, Text, Union[Text, 'UsmCredentials']]],
         var_binds: Sequence[Tuple[Sequence[int], Tuple[int, int]]],
-        config: SnmpConfig = ...
+        config: SnmpConfig = ...,
+        index_specs: Sequence[Sequence[Tuple[IndexKind, int, int]]] = ...,
+        weights: Sequence[float] = ...
 ) -> Tuple[Sequence[np.ndarray], Sequence[SnmpError]]:
     # pylint: disable=unused-argument
     """Fetch SNMP objects via the C API."""
     ...
+
+
+class FetchIterator(Iterator[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]):
+    """FetchIterator stub."""
+
+    def __iter__(self) -> 'FetchIterator':
+        """Return the iterator."""
+        ...
+
+    def __next__(self) -> Tuple[Sequence[np.ndarray], Sequence[SnmpError]]:
+        """Run the request until the next chunk of hosts is complete."""
+        ...
+
+    def poll(self) -> Optional[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]:
+        """Run one iteration of the request without blocking."""
+        ...
+
+    def fileno(self) -> int:
+        """Get the file descriptor which is readable when a response is waiting."""
+        ...
+
+    def timeout(self) -> float:
+        """Get the seconds until the next retry or timeout of a request is due."""
+        ...
+
+    def close(self) -> None:
+        """Stop the request."""
+        ...
+
+
+def fetch_iter(
+        pdu_type: PduType,
+        hosts: Sequence[Tuple[int, Text, Union[Text, 'UsmCredentials']]],
+        var_binds: Sequence[Tuple[Sequence[int], Tuple[int, int]]],
+        config: SnmpConfig = ...,
+        chunk_size: int = ...,
+        index_specs: Sequence[Sequence[Tuple[IndexKind, int, int]]] = ...,
+        weights: Sequence[float] = ...
+) -> FetchIterator:
+    # pylint: disable=unused-argument
+    """Fetch SNMP objects via the C API yielding the results as hosts complete."""
+    ...
+
+
+def clear_session_pool() -> int:
+    """Close every idle session kept open by SnmpConfig.session_pool."""
+    ...
+
+
+def clear_usm_cache() -> int:
+    """Forget every SNMPv3 key and engine cached by the process."""
+    ...
+
+
+def get_bulk_repetitions() -> Dict[Text, int]:
+    """Get the max-repetitions each host settled on with SnmpConfig.adaptive_bulk_repetitions."""
+    ...
+
+
+def set_bulk_repetitions(repetitions: Mapping[Text, int]) -> None:
+    """Seed the max-repetitions later sessions to each host start from."""
+    ...
+
+
+def clear_bulk_repetitions() -> int:
+    """Forget the max-repetitions of every host."""
+    ...
@@ -6,81 +6,282 @@
 
 namespace snmp_fetch {
 
+/**
+ *  watch_session
+ */
+bool watch_session(
+    async_state &st,
+    event_loop &loop
+) {
+
+  // get the transport of the net-snmp session which owns the socket
+  netsnmp_transport *transport = snmp_sess_transport(st.session);
+
+  // sessions on a shared socket are read through the shared socket of the event loop
+  if (is_shared_transport(transport))
+    return true;
+
+  // register the socket for reads with the state wrapped session as the event data
+  struct epoll_event event;
+  event.events = EPOLLIN;
+  event.data.ptr = &st;
+
+  // log the error if the socket could not be registered
+  if (
+      transport == NULL ||
+      epoll_ctl(loop.epoll_fd, EPOLL_CTL_ADD, transport->sock, &event) == -1
+  ) {
+    st.errors->push_back(SnmpError(
+          SESSION_ERROR,
+          st.host,
+          errno,
+          {},
+          {},
+          {},
+          {},
+          "Failed to register the session socket with the event loop"
+    ));
+    return false;
+  }
+
+  return true;
+
+}
+
+
+/**
+ *  schedule_timeout
+ */
+void schedule_timeout(
+    async_state &st,
+    event_loop &loop
+) {
+
+  // remove the currently scheduled timer
+  if (st.deadline) {
+    loop.timers.erase(std::make_tuple(st.deadline, &st));
+    st.deadline = 0;
+  }
+
+  // The earliest time a partition backing off after a failure may be resent.  A partition
+  // already due is sent or held back for a token by async_sessions_send and a session at its
+  // in-flight cap sends again once a response or timeout frees a slot, so neither needs a timer.
+  uint64_t now = monotonic_time();
+  size_t max_inflight = std::max<size_t>(st.config->max_inflight_pdus_per_host, 1);
+  uint64_t retry_at = 0;
+  if (st.inflight.size() < max_inflight)
+    for (auto &&partition: st.next_var_binds)
+      if (
+          !partition.reqid && partition.retry_at > now &&
+          (!retry_at || partition.retry_at < retry_at)
+      )
+        retry_at = partition.retry_at;
+
+  // idle sessions have no outstanding requests and only need a timer to resend a partition
+  if (st.async_status == ASYNC_IDLE) {
+    if (retry_at) {
+      st.deadline = retry_at;
+      loop.timers.insert(std::make_tuple(st.deadline, &st));
+    }
+    return;
+  }
+
+  // init the parameters for net-snmp to fill; only the timeout is used
+  int nfds = 0;
+  struct timeval timeout;
+  timerclear(&timeout);
+  int block = NETSNMP_SNMPBLOCK;
+
+  // let net-snmp compute the time until the next retry or timeout of this session
+  snmp_sess_select_info2(st.session, &nfds, &loop.fdset, &timeout, &block);
+
+  // the socket was added to the scratch set by net-snmp; remove it
+  netsnmp_transport *transport = snmp_sess_transport(st.session);
+  if (transport != NULL && transport->sock >= 0)
+    NETSNMP_LARGE_FD_CLR(transport->sock, &loop.fdset);
+
+  // schedule the timer just after the net-snmp timeout
+  if (!block)
+    st.deadline = now + timeout.tv_sec * 1000000 + timeout.tv_usec + 1;
+  // else net-snmp has no timeout for the session; check it when the earliest request in flight
+  // times out rather than spinning on it
+  else {
+    netsnmp_session *sp = snmp_sess_session(st.session);
+    uint64_t request_timeout = (sp != NULL && sp->timeout > 0) ? sp->timeout : 1000000;
+    for (auto &&inflight: st.inflight) {
+      uint64_t expires = inflight.second->sent + request_timeout;
+      if (!st.deadline || expires < st.deadline)
+        st.deadline = expires;
+    }
+    if (st.deadline <= now)
+      st.deadline = now + request_timeout;
+  }
+  if (retry_at && retry_at < st.deadline)
+    st.deadline = retry_at;
+  loop.timers.insert(std::make_tuple(st.deadline, &st));
+
+}
+
+
 /**
  *  async_sessions_send
  */
 void async_sessions_send(
     std::list<async_state> &sessions,
-    netsnmp_callback cb
+    netsnmp_callback cb,
+    event_loop &loop
 ) {
 
+    // the first session the bucket of the event loop ran out on
+    auto unserved = sessions.end();
+    loop.wake_at = 0;
+
     // iterate through each session
-    for (auto &&st: sessions) {
-      // skip session that are not idle
-      if (st.async_status != ASYNC_IDLE)
-        continue;
+    for (auto it = sessions.begin(); it != sessions.end(); ++it) {
+      auto &st = *it;
+      // keep up to config.max_inflight_pdus_per_host request PDUs in flight on the session
+      size_t max_inflight = std::max<size_t>(st.config->max_inflight_pdus_per_host, 1);
+
+      // Find the next partition to send.  Partitions are moved to the back of the list once sent
+      // to interleave var_binds from other partitions, so the front of the list holds the
+      // partitions that have waited the longest.
+      auto partition = st.next_var_binds.begin();
+      bool dispatched = false;
+      uint64_t now = monotonic_time();
+      while (st.inflight.size() < max_inflight && partition != st.next_var_binds.end()) {
+        // skip partitions in flight, backing off after a failure or with no work remaining
+        if (
+            partition->reqid ||
+            partition->retry_at > now ||
+            std::all_of(
+              partition->var_binds.begin(),
+              partition->var_binds.end(),
+              [](auto &vb) { return vb.empty(); }
+            )
+        ) {
+          ++partition;
+          continue;
+        }
 
-      // create the request PDU
-      netsnmp_pdu *pdu = snmp_pdu_create(st.pdu_type);
-
-      // log PDU creation failures
-      if (!pdu) {
-        st.errors->push_back(SnmpError(
-              CREATE_REQUEST_PDU_ERROR,
-              st.host,
-              {},
-              {},
-              {},
-              {},
-              {},
-              "Failed to allocate memory for the request PDU"
-        ));
-        return;
-      }
+        // hold the session back until both the host and the event loop have a token
+        uint64_t wait = std::max(token_wait(st.bucket, now), token_wait(loop.bucket, now));
+        if (wait) {
+          if (!loop.wake_at || now + wait < loop.wake_at)
+            loop.wake_at = now + wait;
+          if (unserved == sessions.end() && token_wait(loop.bucket, now))
+            unserved = it;
+          break;
+        }
+
+        // create the request PDU
+        netsnmp_pdu *pdu = snmp_pdu_create(st.pdu_type);
+
+        // log PDU creation failures
+        if (!pdu) {
+          st.errors->push_back(SnmpError(
+                CREATE_REQUEST_PDU_ERROR,
+                st.host,
+                {},
+                {},
+                {},
+                {},
+                {},
+                "Failed to allocate memory for the request PDU"
+          ));
+          return;
+        }
 
-      // set PDU options based on PDU type
-      switch (st.pdu_type) {
-        case SNMP_MSG_GETBULK:
-          pdu->non_repeaters = 0;
-          pdu->max_repetitions = st.config->max_bulk_repetitions;
+        // set PDU options based on PDU type
+        switch (st.pdu_type) {
+          case SNMP_MSG_GETBULK:
+            pdu->non_repeaters = 0;
+            pdu->max_repetitions = st.bulk_repetitions;
+            break;
+        };
+
+        // iterate through each of the next_var_binds in the partition and add to the PDU
+        for (auto &&vb: partition->var_binds)
+          // skip empty var_binds, they are complete
+          if (!vb.empty()) {
+            snmp_add_null_var(
+                pdu,
+                (const unsigned long *)vb.data(),
+                vb.size()
+            );
+          }
+
+        // dispatch the PDU, free and log on error
+        int reqid = snmp_sess_async_send(st.session, pdu, cb, &st);
+        if (!reqid) {
+          char *message;
+          int sys_errno;
+          int snmp_errno;
+          snmp_sess_error(st.session, &sys_errno, &snmp_errno, &message);
+          st.errors->push_back(SnmpError(
+                SEND_ERROR,
+                st.host,
+                sys_errno,
+                snmp_errno,
+                {},
+                {},
+                {},
+                std::string(message)
+          ));
+          snmp_free_pdu(pdu);
+          SNMP_FREE(message);
+          // clear all work for this session; requests already in flight are abandoned
+          st.next_var_binds.clear();
+          st.broken = true;
+          st.inflight.clear();
+          dispatched = true;
           break;
-      };
-
-      // iterate through each of the next_var_binds in the current partition and add to the PDU
-      for (auto &&vb: st.next_var_binds.front())
-        // skip empty var_binds, they are complete
-        if (!vb.empty()) {
-          snmp_add_null_var(
-              pdu,
-              (const unsigned long *)vb.data(),
-              vb.size()
-          );
         }
 
-      // set the state to waiting
-      st.async_status = ASYNC_WAITING;
-
-      // dispatch the PDU, free and log on error
-      if (!snmp_sess_async_send(st.session, pdu, cb, &st)) {
-        char *message;
-        int sys_errno;
-        int snmp_errno;
-        snmp_sess_error(st.session, &sys_errno, &snmp_errno, &message);
-        st.errors->push_back(SnmpError(
-              SEND_ERROR,
-              st.host,
-              sys_errno,
-              snmp_errno,
-              {},
-              {},
-              {},
-              std::string(message)
-        ));
-        snmp_free_pdu(pdu);
-        SNMP_FREE(message);
+        // the request PDU counts against the rate limits
+        take_token(st.bucket, now);
+        take_token(loop.bucket, now);
+
+        // track the request PDU in flight and move the partition to the back of the list
+        partition->reqid = reqid;
+        partition->sent = now;
+        partition->retry_at = 0;
+        st.inflight[reqid] = partition;
+        st.next_var_binds.splice(st.next_var_binds.end(), st.next_var_binds, partition++);
+        dispatched = true;
       }
 
+      // nothing changed on this session
+      if (!dispatched)
+        continue;
+
+      // set the state to waiting if there are request PDUs in flight
+      st.async_status = st.inflight.empty() ? ASYNC_IDLE : ASYNC_WAITING;
+
+      // schedule the timer for the requests
+      schedule_timeout(st, loop);
     }
+
+    // serve the sessions the bucket of the event loop ran out on first next time
+    if (unserved != sessions.end())
+      sessions.splice(sessions.end(), sessions, sessions.begin(), unserved);
+}
+
+
+/**
+ *  next_timeout
+ */
+uint64_t next_timeout(
+    event_loop &loop
+) {
+  uint64_t deadline = loop.wake_at;
+  if (!loop.timers.empty() && (!deadline || std::get<0>(*loop.timers.begin()) < deadline))
+    deadline = std::get<0>(*loop.timers.begin());
+  if (loop.cancel_at && (!deadline || loop.cancel_at < deadline))
+    deadline = loop.cancel_at;
+  if (!deadline)
+    return 0;
+  uint64_t now = monotonic_time();
+  return (deadline > now) ? deadline - now : 0;
 }
 
 
@@ -88,50 +289,398 @@ void async_sessions_send(
  *  async_sessions_read
  */
 void async_sessions_read(
-    std::list<async_state> &sessions
+    event_loop &loop,
+    bool block
 ) {
 
-    // iterate through each session
-    for (auto &&st: sessions) {
-      // Check that the session is not idle.  This function triggers the callback which is
-      // responsible for setting the status.  A state other than ASYNC_IDLE indicates the
-      // response PDU has not been read and processed.
-      if (st.async_status == ASYNC_IDLE)
+    // nothing is outstanding if there are no timers or held back sessions; do not block
+    if (loop.timers.empty() && !loop.wake_at)
+      return;
+
+    // wait until the earliest timer expires or a held back session may send (rounded up to the
+    // next millisecond)
+    int wait = block ? (int)((next_timeout(loop) + 999) / 1000) : 0;
+
+    // wait for room in the send buffer of the shared sockets with queued datagrams
+    for (auto &&socket: loop.shared) {
+      uint32_t interest = EPOLLIN | (socket.outgoing.empty() ? 0 : EPOLLOUT);
+      if (socket.sock < 0 || interest == socket.events)
         continue;
+      struct epoll_event event;
+      event.events = interest;
+      event.data.ptr = &socket;
+      if (epoll_ctl(loop.epoll_fd, EPOLL_CTL_MOD, socket.sock, &event) != -1)
+        socket.events = interest;
+    }
 
-      /* The remainder of this code is very specifc to how linux reads socket data and is not
-       * specific to net-snmp.  See "man select" for additional information.
-       */
+    // make one syscall to wait on every session socket
+    struct epoll_event events[SNMP_FETCH__MAX_EPOLL_EVENTS];
+    int count = epoll_wait(loop.epoll_fd, events, SNMP_FETCH__MAX_EPOLL_EVENTS, wait);
+
+    // read each ready socket; this triggers the callback function
+    std::vector<async_state *> ready;
+    for (int i = 0; i < count; ++i) {
+      // The shared sockets are held in one vector so an event is from a shared socket when its
+      // data points into the vector; the event data of a session points at its state instead.
+      auto data = (const void *)events[i].data.ptr;
+      if (
+          !loop.shared.empty() &&
+          !std::less<const void *>()(data, loop.shared.data()) &&
+          std::less<const void *>()(data, loop.shared.data() + loop.shared.size())
+      ) {
+        auto &socket = *(shared_socket *)events[i].data.ptr;
+        // send the queued datagrams once there is room in the send buffer
+        if (events[i].events & EPOLLOUT)
+          flush_shared_socket(socket);
+        // demultiplex the datagrams of a ready shared socket to the sessions
+        if (events[i].events & ~EPOLLOUT)
+          read_shared_socket(socket, ready);
+        continue;
+      }
+      // else read the socket of the session
+      auto &st = *(async_state *)events[i].data.ptr;
+      netsnmp_transport *transport = snmp_sess_transport(st.session);
+      if (transport == NULL || transport->sock < 0)
+        continue;
+      NETSNMP_LARGE_FD_SET(transport->sock, &loop.fdset);
+      snmp_sess_read2(st.session, &loop.fdset);
+      NETSNMP_LARGE_FD_CLR(transport->sock, &loop.fdset);
+      // the callback may have changed the session status
+      schedule_timeout(st, loop);
+    }
 
-      // init a socket set to hold the session socket
-      fd_set fdset;
-      FD_ZERO(&fdset);
+    // read each session with received datagrams; this triggers the callback function
+    for (auto st: ready) {
+      netsnmp_transport *transport = snmp_sess_transport(st->session);
+      auto peer = (shared_peer *)transport->data;
+      // net-snmp reads one datagram per call; stop if it did not read from the transport
+      for (size_t queued; peer != NULL && (queued = peer->datagrams.size());) {
+        NETSNMP_LARGE_FD_SET(transport->sock, &loop.fdset);
+        snmp_sess_read2(st->session, &loop.fdset);
+        NETSNMP_LARGE_FD_CLR(transport->sock, &loop.fdset);
+        if (peer->datagrams.size() >= queued)
+          break;
+      }
+      // the callback may have changed the session status
+      schedule_timeout(*st, loop);
+    }
 
-      // init the highest numbered socket id + 1 in the set to 0
-      int nfds = 0;  
+    // collect the expired timers before processing them as processing reschedules the timers
+    uint64_t now = monotonic_time();
+    std::vector<async_state *> expired;
+    for (
+        auto it = loop.timers.begin();
+        it != loop.timers.end() && std::get<0>(*it) <= now;
+        ++it
+    )
+      expired.push_back(std::get<1>(*it));
+
+    // retry or timeout otherwise, this also triggers the callback function for both cases with
+    // the appropriate op code in the callback
+    for (auto st: expired) {
+      snmp_sess_timeout(st->session);
+      schedule_timeout(*st, loop);
+    }
 
-      // init a timeout parameter
-      struct timeval timeout;  
+}
 
-      // init socket reads to be blocking
-      int block = NETSNMP_SNMPBLOCK;  
 
-      // let net-snmp fill all the parameters above for select
-      snmp_sess_select_info(st.session, &nfds, &fdset, &timeout, &block);
+/**
+ *  open_fetch
+ */
+bool open_fetch(
+    fetch_state &state,
+    int pdu_type,
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
+    std::vector<SnmpError> &errors,
+    SnmpConfig &config,
+    bool buffer_hosts
+) {
+
+  // do NOT init net-snmp to disable config loading and mib processing
+  //init_snmp("snmp_fetch");
 
-      // make the syscall to select to read the session socket
-      int count = select(nfds, &fdset, NULL, NULL, block ? NULL : &timeout);
+  // init the event loop
+  state.loop.epoll_fd = epoll_create1(0);
+
+  // log an error for each host if the event loop cannot be created
+  if (state.loop.epoll_fd == -1) {
+    for (auto &&host: hosts)
+      errors.push_back(SnmpError(
+            SESSION_ERROR,
+            host,
+            errno,
+            {},
+            {},
+            {},
+            {},
+            "Failed to create the event loop"
+      ));
+    return false;
+  }
 
-      // check if the socket is ready to read
-      if (count) {
-        // read the socket data; this triggers the callback function
-        snmp_sess_read(st.session, &fdset);
-      } else {
-        // retry or timeout otherwise, this also triggers the callback function for both
-        // cases with the appropriate op code in the callback
-        snmp_sess_timeout(st.session);
-      }
+  // limit the request PDUs of every session together
+  state.loop.bucket = init_token_bucket(config.max_pdus_per_second);
+  state.loop.wake_at = 0;
+
+  // cancel the outstanding work at the deadline; a deadline too far to represent is none
+  uint64_t now = monotonic_time();
+  state.loop.cancel_at = (
+      config.deadline && config.deadline < (UINT64_MAX - now) / 1000000
+  ) ? now + config.deadline * 1000000 : 0;
+
+  // open the shared sockets and register them with the event loop
+  state.loop.next_shared = 0;
+  state.loop.shared.assign(config.shared_sockets, shared_socket { -1, AF_UNSPEC, {}, {}, 0 });
+  for (auto &&socket: state.loop.shared) {
+    struct epoll_event event;
+    event.events = EPOLLIN;
+    event.data.ptr = &socket;
+    if (
+        open_shared_socket(socket) &&
+        epoll_ctl(state.loop.epoll_fd, EPOLL_CTL_ADD, socket.sock, &event) != -1
+    ) {
+      socket.events = EPOLLIN;
+      continue;
+    }
+
+    // log an error for each host if a shared socket cannot be opened
+    int sys_errno = errno;
+    for (auto &&host: hosts)
+      errors.push_back(SnmpError(
+            SESSION_ERROR,
+            host,
+            sys_errno,
+            {},
+            {},
+            {},
+            {},
+            "Failed to open the shared sockets"
+      ));
+    for (auto &&opened: state.loop.shared)
+      close_shared_socket(opened);
+    close(state.loop.epoll_fd);
+    return false;
+  }
+
+  // init the scratch socket set passed to net-snmp; it grows as needed
+  netsnmp_large_fd_set_init(&state.loop.fdset, FD_SETSIZE);
+
+  // init a list of pending hosts in reverse to work back to front to reduce copies as hosts are
+  // removed
+  state.pending_hosts.resize(hosts.size());
+  std::reverse_copy(hosts.begin(), hosts.end(), state.pending_hosts.begin());
+
+  // reference the request and the output of the caller
+  state.pdu_type = pdu_type;
+  state.var_binds = &var_binds;
+  state.root_index = &root_index;
+  state.index_specs = &index_specs;
+  state.results = &results;
+  state.errors = &errors;
+  state.config = &config;
+  state.buffer_hosts = buffer_hosts;
+
+  return true;
+
+}
+
+
+/**
+ *  fetch_done
+ */
+bool fetch_done(
+    fetch_state &state
+) {
+  return state.pending_hosts.empty() && state.active_sessions.empty();
+}
+
+
+/**
+ *  step_fetch
+ */
+size_t step_fetch(
+    fetch_state &state,
+    bool block
+) {
+
+  // cancel the outstanding work once the deadline is reached
+  size_t completed = 0;
+  if (state.loop.cancel_at && monotonic_time() >= state.loop.cancel_at)
+    completed += cancel_fetch(state);
+
+  // remove active sessions with no more work
+  completed += close_completed_sessions(
+      state.active_sessions, *state.results, state.loop.epoll_fd
+  );
+
+  // Move pending hosts to active sessions up to config.max_active_sessions.  Pending hosts
+  // should be consumed from the back else the entire pending hosts vector will need to be moved
+  // in memory.
+  while (
+      state.active_sessions.size() <= state.config->max_active_sessions
+      && !state.pending_hosts.empty()
+  ) {
+    // Create the state wrapped net-snmp session and append to active sessions.  If this fails
+    // the append will not occur and the host will be discarded.  create_session is responsible
+    // for logging the error.
+    size_t session_count = state.active_sessions.size();
+    // spread the sessions round robin over the shared sockets
+    shared_socket *socket = state.loop.shared.empty() ? NULL : &state.loop.shared[
+      state.loop.next_shared++ % state.loop.shared.size()
+    ];
+    create_session(
+        state.pdu_type,
+        state.pending_hosts.back(),
+        *state.var_binds,
+        *state.root_index,
+        *state.index_specs,
+        *state.results,
+        *state.errors,
+        *state.config,
+        state.active_sessions,
+        socket
+    );
+    // register the new session with the event loop; discard the session on failure
+    if (
+        state.active_sessions.size() > session_count &&
+        !watch_session(state.active_sessions.back(), state.loop)
+    ) {
+      snmp_sess_close(state.active_sessions.back().session);
+      state.active_sessions.pop_back();
     }
+    // a discarded host is complete
+    if (state.active_sessions.size() == session_count)
+      ++completed;
+    // Buffer the results of the host in the session.  The session does not move in the list so
+    // it can point at its own host results.
+    else if (state.buffer_hosts) {
+      auto &st = state.active_sessions.back();
+      st.host_results = init_results(state.var_binds->size(), *state.config);
+      st.results = &st.host_results;
+    }
+    // remove the host from pending hosts
+    state.pending_hosts.erase(state.pending_hosts.end() - 1);
+  }
+
+  // send the async requests
+  async_sessions_send(state.active_sessions, async_cb, state.loop);
+  // receive the async requests which triggers the session's callback
+  async_sessions_read(state.loop, block);
+
+  return completed;
+
+}
+
+
+/**
+ *  cancel_fetch
+ */
+size_t cancel_fetch(
+    fetch_state &state
+) {
+
+  // log an error for each active session with work left
+  for (auto &&st: state.active_sessions) {
+    if (st.next_var_binds.empty() && st.inflight.empty())
+      continue;
+    st.errors->push_back(SnmpError(
+          DEADLINE_ERROR,
+          st.host,
+          {},
+          {},
+          {},
+          {},
+          {},
+          "Deadline exceeded"
+    ));
+    // clear all work for this session; requests in flight are abandoned
+    st.next_var_binds.clear();
+    st.broken |= !st.inflight.empty();
+    st.inflight.clear();
+    st.async_status = ASYNC_IDLE;
+    schedule_timeout(st, state.loop);
+  }
+
+  // log an error for each pending host; these are never opened
+  size_t cancelled = state.pending_hosts.size();
+  for (auto host = state.pending_hosts.rbegin(); host != state.pending_hosts.rend(); ++host)
+    state.errors->push_back(SnmpError(
+          DEADLINE_ERROR,
+          *host,
+          {},
+          {},
+          {},
+          {},
+          {},
+          "Deadline exceeded"
+    ));
+  state.pending_hosts.clear();
+
+  // the deadline only fires once
+  state.loop.cancel_at = 0;
+
+  return cancelled;
+
+}
+
+
+/**
+ *  close_fetch
+ */
+void close_fetch(
+    fetch_state &state
+) {
+
+  // close the sessions of an abandoned run; their sockets are removed from epoll as they close
+  for (auto &&st: state.active_sessions)
+    snmp_sess_close(st.session);
+  state.active_sessions.clear();
+  state.pending_hosts.clear();
+
+  // tear down the event loop; the shared sockets are closed once no transport is left on them
+  for (auto &&socket: state.loop.shared)
+    close_shared_socket(socket);
+  state.loop.shared.clear();
+  netsnmp_large_fd_set_cleanup(&state.loop.fdset);
+  close(state.loop.epoll_fd);
+
+}
+
+
+/**
+ *  prioritize_hosts
+ */
+void prioritize_hosts(
+    std::vector<host_t> &hosts,
+    std::vector<double> &weights
+) {
+
+  if (weights.empty())
+    return;
+
+  // sort the positions of the hosts by weight keeping the order of hosts of equal weight
+  std::vector<size_t> order(hosts.size());
+  std::iota(order.begin(), order.end(), 0);
+  std::stable_sort(order.begin(), order.end(), [&](size_t a, size_t b) {
+      return weights[a] > weights[b];
+  });
+
+  // reorder the hosts and their weights together
+  std::vector<host_t> sorted_hosts;
+  std::vector<double> sorted_weights;
+  sorted_hosts.reserve(hosts.size());
+  sorted_weights.reserve(weights.size());
+  for (auto i: order) {
+    sorted_hosts.push_back(std::move(hosts[i]));
+    sorted_weights.push_back(weights[i]);
+  }
+  hosts.swap(sorted_hosts);
+  weights.swap(sorted_weights);
 
 }
 
@@ -144,58 +693,158 @@ run(
     int pdu_type,
     std::vector<host_t> &hosts,
     std::vector<var_bind_t> &var_binds,
-    std::vector<std::vector<uint8_t>> &results,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
     std::vector<SnmpError> &errors,
     SnmpConfig &config
 ) {
-  
-  // do NOT init net-snmp to disable config loading and mib processing
-  //init_snmp("snmp_fetch");
 
-  // init a list of pending hosts in reverse to work back to front to reduce copies as hosts are
-  // removed
-  std::vector<host_t> pending_hosts(hosts.size());
-  std::reverse_copy(hosts.begin(), hosts.end(), pending_hosts.begin());
-
-  // Define an active sessions list which MUST be a data structure which does not move the
-  // memory location of the sessions.  net-snmp will store the location of the session via a
-  // pointer once the PDU is sent.  Using a vector could cause the memory to move as sessions
-  // are removed.  Sessions will last multiple iterations of the event loop during retries.
-  std::list<async_state> active_sessions;
+  // init the event loop
+  fetch_state state;
+  if (!open_fetch(
+        state, pdu_type, hosts, var_binds, root_index, index_specs, results, errors, config
+  ))
+    return;
 
   // run the event loop until no pending hosts/active sessions are left
-  while (!(pending_hosts.empty() && active_sessions.empty())) {
-    // remove active sessions with no more work
-    close_completed_sessions(active_sessions);
-
-    // Move pending hosts to active sessions up to config.max_active_sessions.  Pending hosts
-    // should be consumed from the back else the entire pending hosts vector will need to be moved
-    // in memory.
-    while (
-        active_sessions.size() <= config.max_active_sessions
-        && !pending_hosts.empty()
-    ) {
-      // Create the state wrapped net-snmp session and append to active sessions.  If this fails
-      // the append will not occur and the host will be discarded.  create_session is responsible
-      // for logging the error.
-      create_session(
-          pdu_type,
-          pending_hosts.back(),
-          var_binds,
-          results,
-          errors,
-          config,
-          active_sessions
+  while (!fetch_done(state))
+    step_fetch(state);
+
+  // tear down the event loop
+  close_fetch(state);
+
+}
+
+
+/*
+ *  run_threads
+ */
+void
+run_threads(
+    int pdu_type,
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
+    std::vector<SnmpError> &errors,
+    SnmpConfig &config,
+    const std::vector<double> &weights
+) {
+
+  // use no more threads than hosts
+  size_t threads = std::min(std::max<size_t>(config.threads, 1), hosts.size());
+
+  // a single thread runs the event loop on the calling thread
+  if (threads <= 1) {
+    reserve_results(pdu_type, hosts.size(), var_binds, results, config);
+    run(pdu_type, hosts, var_binds, root_index, index_specs, results, errors, config);
+    return;
+  }
+
+  // net-snmp initializes its library state on the first session; do it before any thread starts
+  netsnmp_session session;
+  snmp_sess_init(&session);
+
+  // each shard owns a copy of the config with its share of config.max_active_sessions and
+  // config.max_pdus_per_second
+  SnmpConfig shard_config = config;
+  shard_config.max_active_sessions = std::max<size_t>(
+      (config.max_active_sessions + threads - 1) / threads, 1
+  );
+  if (config.max_pdus_per_second)
+    shard_config.max_pdus_per_second = std::max<size_t>(
+        config.max_pdus_per_second / threads, 1
+    );
+
+  // split the hosts into contiguous shards without weights
+  std::vector<std::vector<host_t>> shard_hosts(threads);
+  if (weights.empty())
+    for (size_t i = 0; i < threads; ++i)
+      shard_hosts[i].assign(
+          hosts.begin() + i * hosts.size() / threads,
+          hosts.begin() + (i + 1) * hosts.size() / threads
       );
-      // remove the host from pending hosts
-      pending_hosts.erase(pending_hosts.end() - 1);
+  // else deal each host to the shard with the least weight, then the fewest hosts, so far
+  else {
+    std::vector<double> shard_weights(threads, 0);
+    for (size_t i = 0; i < hosts.size(); ++i) {
+      size_t shard = 0;
+      for (size_t j = 1; j < threads; ++j)
+        if (
+            std::make_tuple(shard_weights[j], shard_hosts[j].size()) <
+            std::make_tuple(shard_weights[shard], shard_hosts[shard].size())
+        )
+          shard = j;
+      shard_hosts[shard].push_back(hosts[i]);
+      shard_weights[shard] += weights[i];
     }
+  }
+
+  // init the results and errors of each shard
+  std::vector<std::vector<result_buffer>> shard_results(threads);
+  std::vector<std::vector<SnmpError>> shard_errors(threads);
+  std::vector<std::exception_ptr> shard_exceptions(threads);
+
+  // allocate the results of every shard before any thread starts so a failure has none to join
+  for (size_t i = 0; i < threads; ++i) {
+    shard_results[i] = init_results(var_binds.size(), config);
+    reserve_results(pdu_type, shard_hosts[i].size(), var_binds, shard_results[i], config);
+  }
+
+  // run an event loop per shard
+  std::vector<std::thread> workers;
+  workers.reserve(threads);
+  try {
+    for (size_t i = 0; i < threads; ++i)
+      workers.emplace_back([&, i]() {
+        try {
+          run(
+              pdu_type,
+              shard_hosts[i],
+              var_binds,
+              root_index,
+              index_specs,
+              shard_results[i],
+              shard_errors[i],
+              shard_config
+          );
+        } catch (...) {
+          // exceptions cannot cross threads; rethrown on the calling thread once joined
+          shard_exceptions[i] = std::current_exception();
+        }
+      });
+  } catch (...) {
+    // a thread failed to start; the started threads MUST be joined before they are destroyed
+    for (auto &&worker: workers)
+      worker.join();
+    throw;
+  }
 
-    // send the async requests
-    async_sessions_send(active_sessions, async_cb);
-    // receive the async requests which triggers the session's callback
-    async_sessions_read(active_sessions);
+  // wait for every shard to complete
+  for (auto &&worker: workers)
+    worker.join();
+
+  // rethrow the first exception from a shard
+  for (auto &&exception: shard_exceptions)
+    if (exception)
+      std::rethrow_exception(exception);
+
+  // Merge the shards.  The first shard's buffers are moved into the results without a copy and
+  // the remaining shards are appended to them.
+  for (size_t i = 0; i < var_binds.size(); ++i) {
+    size_t size = 0;
+    for (auto &&shard: shard_results)
+      size += shard[i].size;
+    results[i] = std::move(shard_results[0][i]);
+    results[i].reserve(size);
+    // each shard is freed once appended to limit the peak memory
+    for (size_t j = 1; j < threads; ++j)
+      results[i].append(std::move(shard_results[j][i]));
   }
+  for (auto &&shard: shard_errors)
+    errors.insert(errors.end(), shard.begin(), shard.end());
 
 }
 
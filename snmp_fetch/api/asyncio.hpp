@@ -5,54 +5,323 @@
 #ifndef SNMP_FETCH__ASYNCIO_HPP
 #define SNMP_FETCH__ASYNCIO_HPP
 
+#include <exception>
+#include <functional>
+#include <numeric>
+#include <set>
+#include <thread>
+#include <sys/epoll.h>
+#include <unistd.h>
+
 #include "results.hpp"
 #include "session.hpp"
 
+// maximum number of socket events returned from a single wait on the event loop
+#define SNMP_FETCH__MAX_EPOLL_EVENTS 1024
+
 namespace snmp_fetch {
 
+/**
+ *  timer_queue_t - Ordered set of (deadline, session) timers.  The earliest deadline is always
+ *  at the front of the set; sessions are removed by rebuilding the key from async_state.deadline.
+ */
+using timer_queue_t = std::set<std::tuple<uint64_t, async_state *>>;
+
+
+/**
+ *  event_loop - A single readiness wait over all the session sockets.
+ *
+ *  Each active session registers its socket with the epoll instance using a pointer to the state
+ *  wrapped session as the event data.  Sessions waiting on a response also schedule a timer so
+ *  net-snmp can retry or timeout the request without polling every session each iteration.
+ *
+ *  When config.shared_sockets is set, sessions are opened round robin on the shared sockets of
+ *  the event loop instead.  The shared sockets are registered once, using a pointer to the
+ *  shared socket as the event data, and their datagrams are demultiplexed to the sessions.  A
+ *  shared socket with queued outgoing datagrams is also watched for writes.
+ *  Sessions on their own socket, e.g. SNMPv3 sessions, are still registered individually.
+ *
+ *  Bucket limits the request PDUs sent by all the sessions to config.max_pdus_per_second.  Wake
+ *  at is the earliest monotonic time (microseconds) a session held back by a rate limit may send
+ *  or 0 when no session is held back.  Held back sessions are not scheduled on the timers; the
+ *  event loop wakes for them once instead.
+ *
+ *  Cancel at is the monotonic time (microseconds) of config.deadline, when the outstanding work
+ *  is cancelled, or 0 when there is no deadline.  The event loop wakes for it like a timer.
+ */
+struct event_loop {
+  int epoll_fd;
+  timer_queue_t timers;
+  netsnmp_large_fd_set fdset;
+  std::vector<shared_socket> shared;
+  size_t next_shared;
+  token_bucket bucket;
+  uint64_t wake_at;
+  uint64_t cancel_at;
+};
+
+
+/**
+ *  watch_session - Register the socket of a state wrapped net-snmp session with the event loop.
+ *
+ *  @param session Reference to the state wrapped net-snmp session.
+ *  @param loop    Reference to the event loop.
+ *
+ *  @return        Returns false and logs the error to the session on failure.
+ */
+bool watch_session(
+    async_state &session,
+    event_loop &loop
+);
+
+
+/**
+ *  schedule_timeout - Reschedule the timer of a state wrapped net-snmp session.  Waiting sessions
+ *  are scheduled at the next net-snmp timeout.  A session with a partition backing off after a
+ *  failure is scheduled no later than the partition may be resent.  Other idle sessions are
+ *  removed from the timers.
+ *
+ *  @param session Reference to the state wrapped net-snmp session.
+ *  @param loop    Reference to the event loop.
+ */
+void schedule_timeout(
+    async_state &session,
+    event_loop &loop
+);
+
+
 /**
  *  async_sessions_send - Dispatch request PDUs.
  *
+ *  Each request PDU takes a token from the bucket of its session and of the event loop.  A
+ *  session without a token stops sending until the next call while the other sessions continue.
+ *  When the bucket of the event loop runs out, the sessions which were not served are moved to the
+ *  front of the list so every session is served in turn.
+ *
  *  @param sessions Reference to a list of state wrapped net-snmp sessions.  This function sends
  *                  a request PDU to each.
  *  @param callback Pointer to a callback function once the async request is completed.
+ *  @param loop     Reference to the event loop used to schedule the request timeouts.
  */
 void async_sessions_send(
     std::list<async_state> &sessions,
-    netsnmp_callback cb
+    netsnmp_callback cb,
+    event_loop &loop
 );
 
 
 /**
- *  async_sessions_read - Read all sockets for response PDUs.
+ *  async_sessions_read - Wait on all sockets for response PDUs.
  *
- *  @param sessions Reference to a list of state wrapped net-snmp sessions.  This function checks
- *  each for response PDUs which triggers the callback function on the session.
+ *  @param loop  Reference to the event loop.  This function waits once for any session socket to
+ *               become readable or the earliest timer to expire.  Ready sockets are read and
+ *               expired timers are processed, both of which trigger the callback function on the
+ *               session.  Ready shared sockets are read and demultiplexed before the sessions
+ *               with received datagrams are read.
+ *  @param block Wait for a socket or timer.  When false, only sockets that are already readable
+ *               and timers that have already expired are processed.
  */
 void async_sessions_read(
-    std::list<async_state> &sessions
+    event_loop &loop,
+    bool block = true
+);
+
+
+/**
+ *  next_timeout - Get the time until the earliest timer of the event loop expires, a session
+ *  held back by a rate limit may send or the deadline is reached.
+ *
+ *  @param loop Reference to the event loop.
+ *  @return     Microseconds until the earliest timer expires; 0 if expired or there are none.
+ */
+uint64_t next_timeout(
+    event_loop &loop
+);
+
+
+/**
+ *  fetch_state - State of a resumable run of the main event loop.
+ *
+ *  Pending hosts are stored in reverse to consume them from the back; hosts are opened in the
+ *  order supplied.  The variable bindings,
+ *  root index, index specs, results, errors and config are owned by the caller and MUST outlive
+ *  the state.  When buffer hosts is set, each session appends to its own host results which are moved into
+ *  the results once the host is complete; the results then only ever hold complete hosts.
+ *
+ *  Active sessions MUST be a data structure which does not move the memory location of the
+ *  sessions.  net-snmp will store the location of the session via a pointer once the PDU is sent.
+ *  Using a vector could cause the memory to move as sessions are removed.  Sessions will last
+ *  multiple iterations of the event loop during retries.
+ */
+struct fetch_state {
+  int pdu_type;
+  std::vector<host_t> pending_hosts;
+  std::vector<var_bind_t> *var_binds;
+  root_index_t *root_index;
+  std::vector<index_spec_t> *index_specs;
+  std::vector<result_buffer> *results;
+  std::vector<SnmpError> *errors;
+  SnmpConfig *config;
+  bool buffer_hosts;
+  event_loop loop;
+  std::list<async_state> active_sessions;
+};
+
+
+/**
+ *  open_fetch - Initialize the state of a run of the main event loop.
+ *
+ *  @param state        Reference to the state to initialize.
+ *  @param pdu_type     PDU type of this request.
+ *  @param hosts        Reference to the hosts for collection.
+ *  @param var_binds    Reference to the variable for collection.
+ *  @param root_index   Reference to the positions of the variable bindings sorted by root oid.
+ *  @param index_specs  Reference to the index spec of each variable binding; empty if none.
+ *  @param results      Reference to the results collected.
+ *  @param errors       Reference to the errors collected.
+ *  @param config       Reference to the configuration.
+ *  @param buffer_hosts Buffer the results of each host until the host is complete.
+ *
+ *  @return             Returns false and logs an error for each host if the event loop cannot be
+ *                      created.  The state must not be run or closed.
+ */
+bool open_fetch(
+    fetch_state &state,
+    int pdu_type,
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
+    std::vector<SnmpError> &errors,
+    SnmpConfig &config,
+    bool buffer_hosts = false
+);
+
+
+/**
+ *  fetch_done - Test if a run of the main event loop has no pending hosts or active sessions.
+ *
+ *  @param state Reference to the state of the run.
+ *  @return      True when the run is complete.
+ */
+bool fetch_done(
+    fetch_state &state
+);
+
+
+/**
+ *  step_fetch - Run one iteration of the main event loop.  Completed sessions are closed, pending
+ *  hosts are opened up to config.max_active_sessions, requests are sent and responses are read.
+ *  Once config.deadline is reached, the outstanding work is cancelled instead.  See cancel_fetch.
+ *
+ *  @param state Reference to the state of the run.
+ *  @param block Wait for a response or timeout.  See async_sessions_read.
+ *  @return      Number of hosts completed this iteration, including hosts that failed to open.
+ */
+size_t step_fetch(
+    fetch_state &state,
+    bool block = true
+);
+
+
+/**
+ *  cancel_fetch - Cancel the outstanding work of a run once config.deadline is reached.  A
+ *  DEADLINE_ERROR is logged for each pending host and each active session with work left.  The
+ *  pending hosts are discarded and the work of the active sessions is cleared so they are closed
+ *  on the next step with the results collected so far.  Requests in flight are abandoned.
+ *
+ *  @param state Reference to the state of the run.
+ *  @return      Number of pending hosts discarded; these are complete.
+ */
+size_t cancel_fetch(
+    fetch_state &state
+);
+
+
+/**
+ *  close_fetch - Tear down the event loop.  Any active sessions are closed without completing.
+ *
+ *  @param state Reference to the state of the run.
+ */
+void close_fetch(
+    fetch_state &state
+);
+
+
+/**
+ *  prioritize_hosts - Order the hosts by weight, heaviest first, so the most expensive hosts are
+ *  opened first and do not start last and hold up the end of the run.  Hosts of equal weight keep
+ *  the order supplied.
+ *
+ *  @param hosts   Reference to the hosts for collection.
+ *  @param weights Reference to the weight of each host; empty to leave the order as is.  The
+ *                 weights are reordered with the hosts.
+ */
+void prioritize_hosts(
+    std::vector<host_t> &hosts,
+    std::vector<double> &weights
 );
 
 
 /*
  *  run - Run the main event loop.
  *
- *  @param pdu_type  PDU type of this request.
- *  @param hosts     Reference to the hosts for collection.
- *  @param var_binds Reference to the variable for collection.
- *  @param results   Reference to the results collected.
- *  @param errors    Reference to the errors collected.
+ *  @param pdu_type   PDU type of this request.
+ *  @param hosts      Reference to the hosts for collection.
+ *  @param var_binds  Reference to the variable for collection.
+ *  @param root_index Reference to the positions of the variable bindings sorted by root oid.
+ *  @param index_specs Reference to the index spec of each variable binding; empty if none.
+ *  @param results    Reference to the results collected.
+ *  @param errors     Reference to the errors collected.
  */
 void
 run(
     int pdu_type,
     std::vector<host_t> &hosts,
     std::vector<var_bind_t> &var_binds,
-    std::vector<std::vector<uint8_t>> &results,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
     std::vector<SnmpError> &errors,
     SnmpConfig &config
 );
 
+
+/*
+ *  run_threads - Run the main event loop on config.threads worker threads.
+ *
+ *  Hosts are sharded across the threads, each with its own event loop, active sessions, results
+ *  and errors.  Without weights, the shards are contiguous.  With weights, the hosts are dealt in
+ *  order to the shard with the least weight so far so each thread has an even share of the work
+ *  and keeps the order of the hosts; see prioritize_hosts.  Each thread applies config.deadline
+ *  from when it starts.  Config.max_active_sessions and config.max_pdus_per_second are divided between the
+ *  threads.  The variable bindings,
+ *  root index and index specs are shared read-only.  Once every thread completes, the results and
+ *  errors are merged in shard order into the results and errors of the caller.
+ *
+ *  @param pdu_type   PDU type of this request.
+ *  @param hosts      Reference to the hosts for collection.
+ *  @param var_binds  Reference to the variable for collection.
+ *  @param root_index Reference to the positions of the variable bindings sorted by root oid.
+ *  @param index_specs Reference to the index spec of each variable binding; empty if none.
+ *  @param results    Reference to the results collected.
+ *  @param errors     Reference to the errors collected.
+ *  @param weights    Reference to the weight of each host; empty if none.
+ */
+void
+run_threads(
+    int pdu_type,
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
+    std::vector<SnmpError> &errors,
+    SnmpConfig &config,
+    const std::vector<double> &weights = {}
+);
+
 }
 
 #endif
@@ -11,26 +11,48 @@ namespace snmp_fetch {
 /**
  *  as_pyarray
  */
-template <typename Sequence>
-inline py::array_t<typename Sequence::value_type>
-as_pyarray(Sequence& seq) {
-  Sequence* seq_ptr = new Sequence(std::move(seq));
-  auto capsule = py::capsule(seq_ptr, [](void* p) {
-    delete reinterpret_cast<Sequence*>(p);
+py::array_t<uint8_t>
+as_pyarray(result_buffer &buffer) {
+  size_t size = buffer.size;
+
+  // Map a spilled buffer from its file with numpy.  The file is removed once mapped; the pages
+  // live until the memmap is collected.  array_t would convert the memmap to a plain ndarray so
+  // the memmap is wrapped as is.
+  if (buffer.spilled() && size) {
+    std::string path = buffer.release_file();
+    py::object memmap = py::module::import("numpy").attr("memmap")(
+        path, "uint8", "r+", 0, py::make_tuple(size)
+    );
+    unlink(path.c_str());
+    return py::reinterpret_steal<py::array_t<uint8_t>>(memmap.release());
+  }
+  // an empty spilled buffer has nothing worth mapping
+  if (buffer.spilled())
+    unlink(buffer.release_file().c_str());
+
+  // a buffer which was never allocated, e.g. a column without rows in a chunk, has no data for
+  // a capsule to own
+  uint8_t *data = buffer.release();
+  if (data == NULL)
+    return py::array_t<uint8_t>(0);
+
+  auto capsule = py::capsule(data, [](void* p) {
+    free(p);
   });
-  return py::array(seq_ptr->size(), seq_ptr->data(), capsule);
+  return py::array(size, data, capsule);
 }
 
 
 /**
- *  fetch
+ *  check_request
  */
-std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
-fetch(
-    PDU_TYPE pdu_type,
-    std::vector<host_t> hosts,
-    std::vector<var_bind_t> var_binds,
-    SnmpConfig config
+root_index_t
+check_request(
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<double> &weights,
+    const SnmpConfig &config
 ) {
 
   /**
@@ -48,54 +70,135 @@ fetch(
     // raise an exception to the caller
     throw std::runtime_error("No variable bindings supplied");
 
+  // check the index specs are empty or one per var_bind
+  if (!index_specs.empty() && index_specs.size() != var_binds.size())
+    // raise an exception to the caller
+    throw std::invalid_argument("Expected one index spec per variable binding");
+
+  // check the weights are empty or one per host
+  if (!weights.empty() && weights.size() != hosts.size())
+    // raise an exception to the caller
+    throw std::invalid_argument("Expected one weight per host");
+
+  // check each weight is a finite, non-negative cost
+  for (auto &&weight: weights)
+    if (!std::isfinite(weight) || weight < 0)
+      // raise an exception to the caller
+      throw std::invalid_argument(
+          "Host weight must be finite and non-negative: " + std::to_string(weight)
+      );
+
+  // check each index spec decodes into the oid buffer of its var_bind
+  for (size_t i = 0; i < index_specs.size(); ++i) {
+    for (auto &&[kind, size, element_size]: index_specs[i])
+      if (element_size != 1 && element_size != 8)
+        // raise an exception to the caller
+        throw std::invalid_argument(
+            "Index spec element size must be 1 or 8: " + std::to_string(element_size)
+        );
+    if (index_spec_size(index_specs[i]) > std::get<0>(std::get<1>(var_binds[i])))
+      // raise an exception to the caller
+      throw std::invalid_argument(
+          "Index spec exceeds the oid buffer size: " + oid_to_string(std::get<0>(var_binds[i]))
+      );
+  }
+
+  // check the spill directory is a writable directory; results are spilled from the response
+  // callbacks where a failure can only be logged
+  if (config.spill_directory.has_value()) {
+    struct stat st;
+    if (
+        stat(config.spill_directory->c_str(), &st) < 0 ||
+        !S_ISDIR(st.st_mode) ||
+        access(config.spill_directory->c_str(), W_OK | X_OK) < 0
+    )
+      // raise an exception to the caller
+      throw std::invalid_argument(
+          "Spill directory is not a writable directory: " + *config.spill_directory
+      );
+  }
+
   /**
    *  One variable binding cannot be a subtree of another or be equal.  Each variable binding
    *  is used as the root to identify which vector to append the results into.  Subtree or equal
    *  roots would cause ambiguity in the result vector selection.
    */
 
-  // loop through 0..n-1 var_binds as 'it'
-  for (auto it = var_binds.begin(); it != std::next(var_binds.end(), -1); ++it)
-    // loop through it..n var_binds as 'jt'
-    for (auto jt = std::next(it, 1); jt != var_binds.end(); ++jt)
-      // Check if either is a subtree of the other.  This comparison checks to the length of the
-      // shortest oid.  If the result is 0, one is a subtree of the other or equal which fails the
-      // check.
-      if (
-          not snmp_oidtree_compare(
-            std::get<0>(*it).data(), std::get<0>(*it).size(),
-            std::get<0>(*jt).data(), std::get<0>(*jt).size()
-          )
-      )
-        // raise an exception to the caller
-        throw std::invalid_argument(
-            "Ambiguous root OIDs: (" +
-            oid_to_string(std::get<0>(*it)) + ", " +
-            oid_to_string(std::get<0>(*jt)) + ")"
-        );
+  // Index the root oids; shared read-only by all sessions to route responses.  Sorted
+  // lexicographically, every oid between a root and one of its subtrees is also in the subtree
+  // of that root, so only adjacent roots need to be compared.
+  root_index_t root_index = build_root_index(var_binds);
+
+  // loop through adjacent pairs of sorted var_binds
+  for (size_t i = 1; i < root_index.size(); ++i) {
+    // report the pair in the order the caller supplied them
+    auto &it = var_binds[std::min(root_index[i - 1], root_index[i])];
+    auto &jt = var_binds[std::max(root_index[i - 1], root_index[i])];
+    // Check if either is a subtree of the other.  This comparison checks to the length of the
+    // shortest oid.  If the result is 0, one is a subtree of the other or equal which fails the
+    // check.
+    if (
+        not snmp_oidtree_compare(
+          std::get<0>(it).data(), std::get<0>(it).size(),
+          std::get<0>(jt).data(), std::get<0>(jt).size()
+        )
+    )
+      // raise an exception to the caller
+      throw std::invalid_argument(
+          "Ambiguous root OIDs: (" +
+          oid_to_string(std::get<0>(it)) + ", " +
+          oid_to_string(std::get<0>(jt)) + ")"
+      );
+  }
+
+  return root_index;
+
+}
+
+
+/**
+ *  fetch
+ */
+std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
+fetch(
+    PDU_TYPE pdu_type,
+    std::vector<host_t> hosts,
+    std::vector<var_bind_t> var_binds,
+    SnmpConfig config,
+    std::vector<index_spec_t> index_specs,
+    std::vector<double> weights
+) {
+
+  // validate the parameters; outside of this call, nothing should be thrown
+  root_index_t root_index = check_request(hosts, var_binds, index_specs, weights, config);
+
+  // open the heaviest hosts first
+  prioritize_hosts(hosts, weights);
 
   // release the GIL - entering pure C++ code
   py::gil_scoped_release release;
 
-  // init the results vector; stores one vector per var_bind in the request
-  std::vector<std::vector<uint8_t>> results(var_binds.size(), std::vector<uint8_t>());
+  // init the results vector; stores one buffer per var_bind in the request
+  std::vector<result_buffer> results = init_results(var_binds.size(), config);
   // init the errors return list
   std::vector<SnmpError> errors;
 
   // run the IO loop
-  run(pdu_type, hosts, var_binds, results, errors, config);
+  run_threads(
+      pdu_type, hosts, var_binds, root_index, index_specs, results, errors, config, weights
+  );
 
   // acquire the GIL - exiting pure C++ code
   py::gil_scoped_acquire acquire;
 
   // init the python results vector
   std::vector<py::array_t<uint8_t>> py_results;
-  // wrap C++ vectors with numpy arrays
+  // wrap C++ buffers with numpy arrays
   std::transform(
       results.begin(),
       results.end(),
       std::back_inserter(py_results),
-      [](std::vector<uint8_t> v) { return as_pyarray(v); }
+      [](result_buffer &buffer) { return as_pyarray(buffer); }
   );
 
   // return the results and errors as a tuple
@@ -103,6 +206,177 @@ fetch(
 
 }
 
+
+/**
+ *  fetch_iterator::fetch_iterator
+ */
+fetch_iterator::fetch_iterator(
+    PDU_TYPE pdu_type,
+    std::vector<host_t> hosts,
+    std::vector<var_bind_t> var_binds,
+    SnmpConfig config,
+    size_t chunk_size,
+    std::vector<index_spec_t> index_specs,
+    std::vector<double> weights
+) : hosts(hosts), var_binds(var_binds), index_specs(index_specs), config(config) {
+
+  // validate the parameters; outside of this call, nothing should be thrown
+  this->root_index = check_request(
+      this->hosts, this->var_binds, this->index_specs, weights, this->config
+  );
+
+  // open the heaviest hosts first
+  prioritize_hosts(this->hosts, weights);
+
+  this->chunk_size = std::max<size_t>(chunk_size, 1);
+  this->completed = 0;
+  this->results = init_results(this->var_binds.size(), this->config);
+
+  // start the event loop buffering the results of each host until it is complete
+  this->running = open_fetch(
+      this->state,
+      pdu_type,
+      this->hosts,
+      this->var_binds,
+      this->root_index,
+      this->index_specs,
+      this->results,
+      this->errors,
+      this->config,
+      true
+  );
+  this->exhausted = false;
+
+}
+
+
+/**
+ *  fetch_iterator::~fetch_iterator
+ */
+fetch_iterator::~fetch_iterator() {
+  this->close();
+}
+
+
+/**
+ *  fetch_iterator::next
+ */
+std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
+fetch_iterator::next() {
+
+  // the last chunk has been returned
+  if (this->exhausted)
+    throw py::stop_iteration();
+
+  // release the GIL - entering pure C++ code
+  {
+    py::gil_scoped_release release;
+
+    // run the IO loop until the chunk is complete
+    while (
+        this->running &&
+        this->completed < this->chunk_size &&
+        !fetch_done(this->state)
+    )
+      this->completed += step_fetch(this->state);
+  }
+
+  auto chunk = this->take_chunk();
+
+  // tear down the IO loop once the request is complete
+  if (this->exhausted)
+    this->close();
+
+  return chunk;
+
+}
+
+
+/**
+ *  fetch_iterator::poll
+ */
+py::object
+fetch_iterator::poll() {
+
+  // the last chunk has been returned
+  if (this->exhausted)
+    throw py::stop_iteration();
+
+  // release the GIL - entering pure C++ code
+  {
+    py::gil_scoped_release release;
+
+    // run one iteration of the IO loop without waiting
+    if (this->running && !fetch_done(this->state))
+      this->completed += step_fetch(this->state, false);
+  }
+
+  // the chunk is not complete
+  if (
+      this->running &&
+      this->completed < this->chunk_size &&
+      !fetch_done(this->state)
+  )
+    return py::none();
+
+  return py::cast(this->take_chunk());
+
+}
+
+
+/**
+ *  fetch_iterator::fileno
+ */
+int
+fetch_iterator::fileno() {
+  return this->running ? this->state.loop.epoll_fd : -1;
+}
+
+
+/**
+ *  fetch_iterator::timeout
+ */
+double
+fetch_iterator::timeout() {
+  return this->running ? next_timeout(this->state.loop) / 1e6 : 0.0;
+}
+
+
+/**
+ *  fetch_iterator::close
+ */
+void
+fetch_iterator::close() {
+  if (this->running)
+    close_fetch(this->state);
+  this->running = false;
+}
+
+
+/**
+ *  fetch_iterator::take_chunk
+ */
+std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
+fetch_iterator::take_chunk() {
+
+  // the request is complete once the IO loop has no work left; this is the last chunk
+  this->exhausted = !this->running || fetch_done(this->state);
+  this->completed = 0;
+
+  // Take the chunk leaving empty results and errors in place.  The sessions point at the
+  // results and errors vectors so the vectors themselves must not be replaced.
+  std::vector<py::array_t<uint8_t>> py_results;
+  for (auto &&buffer: this->results)
+    py_results.push_back(as_pyarray(buffer));
+  std::vector<SnmpError> errors;
+  std::swap(errors, this->errors);
+
+  // return the results and errors as a tuple
+  return std::make_tuple(py_results, errors);
+
+}
+
+
 /**
  *  api - Python module definition.
  */
@@ -126,13 +400,43 @@ PYBIND11_MODULE(api, m) {
           ssize_t,
           size_t,
           size_t,
+          size_t,
+          size_t,
+          size_t,
+          std::optional<std::string>,
+          size_t,
+          bool,
+          size_t,
+          size_t,
+          size_t,
+          size_t,
+          bool,
+          size_t,
+          size_t,
+          size_t,
+          size_t,
           size_t
         >(),
         py::arg("retries") = SNMP_FETCH__DEFAULT_RETRIES,
         py::arg("timeout") = SNMP_FETCH__DEFAULT_TIMEOUT,
         py::arg("max_active_sessions") = SNMP_FETCH__DEFAULT_MAX_ACTIVE_SESSIONS,
         py::arg("max_var_binds_per_pdu") = SNMP_FETCH__DEFAULT_MAX_VAR_BINDS_PER_PDU,
-        py::arg("max_bulk_repetitions") = SNMP_FETCH__DEFAULT_MAX_BULK_REPETITIONS
+        py::arg("max_bulk_repetitions") = SNMP_FETCH__DEFAULT_MAX_BULK_REPETITIONS,
+        py::arg("max_inflight_pdus_per_host") = SNMP_FETCH__DEFAULT_MAX_INFLIGHT_PDUS_PER_HOST,
+        py::arg("threads") = SNMP_FETCH__DEFAULT_THREADS,
+        py::arg("spill_directory") = py::none(),
+        py::arg("max_result_bytes_in_memory") = SNMP_FETCH__DEFAULT_MAX_RESULT_BYTES_IN_MEMORY,
+        py::arg("session_pool") = SNMP_FETCH__DEFAULT_SESSION_POOL,
+        py::arg("session_idle_timeout") = SNMP_FETCH__DEFAULT_SESSION_IDLE_TIMEOUT,
+        py::arg("dns_cache_ttl") = SNMP_FETCH__DEFAULT_DNS_CACHE_TTL,
+        py::arg("shared_sockets") = SNMP_FETCH__DEFAULT_SHARED_SOCKETS,
+        py::arg("engine_cache_ttl") = SNMP_FETCH__DEFAULT_ENGINE_CACHE_TTL,
+        py::arg("adaptive_bulk_repetitions") = SNMP_FETCH__DEFAULT_ADAPTIVE_BULK_REPETITIONS,
+        py::arg("min_bulk_repetitions") = SNMP_FETCH__DEFAULT_MIN_BULK_REPETITIONS,
+        py::arg("partition_retries") = SNMP_FETCH__DEFAULT_PARTITION_RETRIES,
+        py::arg("max_pdus_per_second_per_host") = SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND_PER_HOST,
+        py::arg("max_pdus_per_second") = SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND,
+        py::arg("deadline") = SNMP_FETCH__DEFAULT_DEADLINE
     )
     // allow direct access to all the SnmpConfig properties from python
     .def_readwrite("retries", &SnmpConfig::retries)
@@ -140,6 +444,21 @@ PYBIND11_MODULE(api, m) {
     .def_readwrite("max_active_sessions", &SnmpConfig::max_active_sessions)
     .def_readwrite("max_var_binds_per_pdu", &SnmpConfig::max_var_binds_per_pdu)
     .def_readwrite("max_bulk_repetitions",  &SnmpConfig::max_bulk_repetitions)
+    .def_readwrite("max_inflight_pdus_per_host",  &SnmpConfig::max_inflight_pdus_per_host)
+    .def_readwrite("threads", &SnmpConfig::threads)
+    .def_readwrite("spill_directory", &SnmpConfig::spill_directory)
+    .def_readwrite("max_result_bytes_in_memory", &SnmpConfig::max_result_bytes_in_memory)
+    .def_readwrite("session_pool", &SnmpConfig::session_pool)
+    .def_readwrite("session_idle_timeout", &SnmpConfig::session_idle_timeout)
+    .def_readwrite("dns_cache_ttl", &SnmpConfig::dns_cache_ttl)
+    .def_readwrite("shared_sockets", &SnmpConfig::shared_sockets)
+    .def_readwrite("engine_cache_ttl", &SnmpConfig::engine_cache_ttl)
+    .def_readwrite("adaptive_bulk_repetitions", &SnmpConfig::adaptive_bulk_repetitions)
+    .def_readwrite("min_bulk_repetitions", &SnmpConfig::min_bulk_repetitions)
+    .def_readwrite("partition_retries", &SnmpConfig::partition_retries)
+    .def_readwrite("max_pdus_per_second_per_host", &SnmpConfig::max_pdus_per_second_per_host)
+    .def_readwrite("max_pdus_per_second", &SnmpConfig::max_pdus_per_second)
+    .def_readwrite("deadline", &SnmpConfig::deadline)
     // comparison operator
     .def("__eq__", [](SnmpConfig &a, const SnmpConfig &b) {
         return a == b;
@@ -156,7 +475,22 @@ PYBIND11_MODULE(api, m) {
           snmp_config.timeout,
           snmp_config.max_active_sessions,
           snmp_config.max_var_binds_per_pdu,
-          snmp_config.max_bulk_repetitions
+          snmp_config.max_bulk_repetitions,
+          snmp_config.max_inflight_pdus_per_host,
+          snmp_config.threads,
+          snmp_config.spill_directory,
+          snmp_config.max_result_bytes_in_memory,
+          snmp_config.session_pool,
+          snmp_config.session_idle_timeout,
+          snmp_config.dns_cache_ttl,
+          snmp_config.shared_sockets,
+          snmp_config.engine_cache_ttl,
+          snmp_config.adaptive_bulk_repetitions,
+          snmp_config.min_bulk_repetitions,
+          snmp_config.partition_retries,
+          snmp_config.max_pdus_per_second_per_host,
+          snmp_config.max_pdus_per_second,
+          snmp_config.deadline
         );
       },
       [](py::tuple t) {
@@ -165,11 +499,92 @@ PYBIND11_MODULE(api, m) {
             t[1].cast<ssize_t>(),
             t[2].cast<size_t>(),
             t[3].cast<size_t>(),
-            t[4].cast<size_t>()
+            t[4].cast<size_t>(),
+            t[5].cast<size_t>(),
+            t[6].cast<size_t>(),
+            t[7].cast<std::optional<std::string>>(),
+            t[8].cast<size_t>(),
+            t[9].cast<bool>(),
+            t[10].cast<size_t>(),
+            t[11].cast<size_t>(),
+            t[12].cast<size_t>(),
+            t[13].cast<size_t>(),
+            t[14].cast<bool>(),
+            t[15].cast<size_t>(),
+            t[16].cast<size_t>(),
+            t[17].cast<size_t>(),
+            t[18].cast<size_t>(),
+            t[19].cast<size_t>()
+        );
+      }
+    ));
+
+  // expose the UsmCredentials class to python
+  py::class_<UsmCredentials>(m, "UsmCredentials")
+    // init function with defaults
+    .def(
+        py::init<
+          std::string,
+          std::optional<std::string>,
+          std::optional<std::string>,
+          std::optional<std::string>,
+          std::optional<std::string>,
+          std::string
+        >(),
+        py::arg("security_name"),
+        py::arg("auth_protocol") = py::none(),
+        py::arg("auth_passphrase") = py::none(),
+        py::arg("priv_protocol") = py::none(),
+        py::arg("priv_passphrase") = py::none(),
+        py::arg("context_name") = ""
+    )
+    // read only access to the UsmCredentials properties; they are validated on init
+    .def_readonly("security_name", &UsmCredentials::security_name)
+    .def_readonly("auth_protocol", &UsmCredentials::auth_protocol)
+    .def_readonly("auth_passphrase", &UsmCredentials::auth_passphrase)
+    .def_readonly("priv_protocol", &UsmCredentials::priv_protocol)
+    .def_readonly("priv_passphrase", &UsmCredentials::priv_passphrase)
+    .def_readonly("context_name", &UsmCredentials::context_name)
+    // comparison operator
+    .def("__eq__", [](UsmCredentials &a, const UsmCredentials &b) {
+        return a == b;
+    }, py::is_operator())
+    // attr style printing of the UsmCredentials object
+    .def("__str__", [](UsmCredentials &credentials) { return credentials.to_string(); })
+    // attr style representation of the UsmCredentials object
+    .def("__repr__", [](UsmCredentials &credentials) { return credentials.to_string(); })
+    // pickle support
+    .def(py::pickle(
+      [](const UsmCredentials &credentials) {
+        return py::make_tuple(
+          credentials.security_name,
+          credentials.auth_protocol,
+          credentials.auth_passphrase,
+          credentials.priv_protocol,
+          credentials.priv_passphrase,
+          credentials.context_name
+        );
+      },
+      [](py::tuple t) {
+        return UsmCredentials(
+            t[0].cast<std::string>(),
+            t[1].cast<std::optional<std::string>>(),
+            t[2].cast<std::optional<std::string>>(),
+            t[3].cast<std::optional<std::string>>(),
+            t[4].cast<std::optional<std::string>>(),
+            t[5].cast<std::string>()
         );
       }
     ));
 
+  // expose index field kinds to python
+  py::enum_<INDEX_KIND>(m, "IndexKind")
+    .value("INDEX_INTEGER", INDEX_INTEGER)
+    .value("INDEX_FIXED", INDEX_FIXED)
+    .value("INDEX_LENGTH_PREFIXED", INDEX_LENGTH_PREFIXED)
+    .value("INDEX_IMPLIED", INDEX_IMPLIED)
+    .export_values();
+
   // expose error types to python
   py::enum_<SNMP_ERROR_TYPE>(m, "SnmpErrorType")
     .value("SESSION_ERROR", SESSION_ERROR)
@@ -181,6 +596,7 @@ PYBIND11_MODULE(api, m) {
     .value("TRANSPORT_DISCONNECT_ERROR", TRANSPORT_DISCONNECT_ERROR)
     .value("CREATE_RESPONSE_PDU_ERROR", CREATE_RESPONSE_PDU_ERROR)
     .value("VALUE_WARNING", VALUE_WARNING)
+    .value("DEADLINE_ERROR", DEADLINE_ERROR)
     .export_values();
 
   // expose the SnmpError class to python
@@ -257,7 +673,71 @@ PYBIND11_MODULE(api, m) {
       py::arg("pdu_type"),
       py::arg("hosts"),
       py::arg("var_binds"),
-      py::arg("config") = SnmpConfig()
+      py::arg("config") = SnmpConfig(),
+      py::arg("index_specs") = std::vector<index_spec_t>(),
+      py::arg("weights") = std::vector<double>()
+  );
+
+  // expose the streaming fetch iterator to python
+  py::class_<fetch_iterator>(m, "FetchIterator")
+    .def("__iter__", [](py::object self) { return self; })
+    .def("__next__", &fetch_iterator::next)
+    .def("poll", &fetch_iterator::poll)
+    .def("fileno", &fetch_iterator::fileno)
+    .def("timeout", &fetch_iterator::timeout)
+    .def("close", &fetch_iterator::close);
+
+  // expose the streaming fetch function to python
+  m.def(
+      "fetch_iter",
+      [](
+          PDU_TYPE pdu_type,
+          std::vector<host_t> hosts,
+          std::vector<var_bind_t> var_binds,
+          SnmpConfig config,
+          size_t chunk_size,
+          std::vector<index_spec_t> index_specs,
+          std::vector<double> weights
+      ) {
+        return std::make_unique<fetch_iterator>(
+            pdu_type, hosts, var_binds, config, chunk_size, index_specs, weights
+        );
+      },
+      "Fetch SNMP objects from remote devices yielding the results as hosts complete",
+      py::arg("pdu_type"),
+      py::arg("hosts"),
+      py::arg("var_binds"),
+      py::arg("config") = SnmpConfig(),
+      py::arg("chunk_size") = 1,
+      py::arg("index_specs") = std::vector<index_spec_t>(),
+      py::arg("weights") = std::vector<double>()
+  );
+
+  // module method for closing the idle sessions of the session pool
+  m.def(
+      "clear_session_pool", &clear_session_pool,
+      "Close every idle session kept open by SnmpConfig.session_pool"
+  );
+
+  // module method for forgetting the cached SNMPv3 keys and engines
+  m.def(
+      "clear_usm_cache", &clear_usm_cache,
+      "Forget every SNMPv3 key and engine cached by the process"
+  );
+
+  // module methods for reporting and seeding the max-repetitions of adaptive bulk repetitions
+  m.def(
+      "get_bulk_repetitions", &get_bulk_repetitions,
+      "Get the max-repetitions each host settled on with SnmpConfig.adaptive_bulk_repetitions"
+  );
+  m.def(
+      "set_bulk_repetitions", &set_bulk_repetitions,
+      "Seed the max-repetitions later sessions to each host start from",
+      py::arg("repetitions")
+  );
+  m.def(
+      "clear_bulk_repetitions", &clear_bulk_repetitions,
+      "Forget the max-repetitions of every host"
   );
 
 }
@@ -5,6 +5,9 @@
 #ifndef SNMP_FETCH__CAPIMODULE_HPP
 #define SNMP_FETCH__CAPIMODULE_HPP
 
+#include <cmath>
+#include <sys/stat.h>
+
 #include <pybind11/pybind11.h>
 #include <pybind11/numpy.h>
 #include <pybind11/stl.h>
@@ -17,15 +20,38 @@ namespace py = pybind11;
 namespace snmp_fetch {
 
 /**
- *  as_pyarray - Wraps a C++ sequence in a numpy array.  This object will free the underlying data
- *               when the numpy array is garbage collected.
+ *  as_pyarray - Wraps a result buffer in a numpy array without a copy.  The numpy array takes
+ *               ownership of the underlying data and frees it when the numpy array is garbage
+ *               collected.  A spilled buffer is returned as a numpy.memmap of its file and an
+ *               unallocated buffer as an empty array.
  *
- *  @param seq Sequence to be wrapped in a numpy array.
- *  @return    Numpy array.
+ *  @param buffer Result buffer to be wrapped in a numpy array.  The buffer is left empty.
+ *  @return       Numpy array.
  */
-template <typename Sequence>
-inline py::array_t<typename Sequence::value_type>
-as_pyarray(Sequence& seq);
+py::array_t<uint8_t>
+as_pyarray(result_buffer &buffer);
+
+
+/**
+ *  check_request - Validate the parameters of a request and index the root oids.  Raises an
+ *                  exception to the caller if the parameters are invalid.
+ *
+ *  @param hosts       Reference to the hosts for collection.
+ *  @param var_binds   Reference to the variable bindings for collection.
+ *  @param index_specs Reference to the index spec of each variable binding; empty if none.
+ *  @param weights     Reference to the weight of each host; empty if none.
+ *  @param config      Reference to the configuration.
+ *  @return            Positions of the variable bindings sorted by root oid.
+ */
+root_index_t
+check_request(
+    std::vector<host_t> &hosts,
+    std::vector<var_bind_t> &var_binds,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<double> &weights,
+    const SnmpConfig &config
+);
+
 
 /**
  *  fetch - Python interface for making an SNMP request.
@@ -48,6 +74,16 @@ as_pyarray(Sequence& seq);
  *                   be null terminated).
  *  @param config    Configuration object defined in types.hpp.  This object is exposed to
  *                   python and can be directly setup by the caller.
+ *  @param index_specs
+ *                   A list of index specs, empty or one per var_bind.  Each index spec is a list
+ *                   of tuples (INDEX_KIND, suboids, bytes per suboid) defining the fields of the
+ *                   table index following the root oid.  When the index spec of a var_bind is
+ *                   not empty, the trailing bytes of its oid buffer hold the decoded index
+ *                   instead of the raw suboids.  See decode_index in results.hpp.
+ *  @param weights   A list of weights, empty or one per host.  A weight is the expected cost of
+ *                   collecting a host, e.g. the size of its tables.  Heavier hosts are opened
+ *                   first and spread evenly across config.threads.  See prioritize_hosts in
+ *                   asyncio.hpp.
  *  @return          A tuple of (results, errors).
  *
  *                   Results is a list of structured numpy arrays.
@@ -65,16 +101,129 @@ as_pyarray(Sequence& seq);
  *                   Errors is a list of SnmpError objects defined in types.hpp which is exposed
  *                   to python.  Errors during collection do not throw unless there is an issue
  *                   with the parameters of this function.  This is to reduce the need to acquire
- *                   the GIL and promote multithreading.
+ *                   the GIL and promote multithreading.  Hosts still outstanding at
+ *                   config.deadline are cancelled with a DEADLINE_ERROR.
  */
 std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
 fetch(
     PDU_TYPE pdu_type,
     std::vector<host_t> hosts,
     std::vector<var_bind_t> var_binds,
-    SnmpConfig config
+    SnmpConfig config,
+    std::vector<index_spec_t> index_specs = {},
+    std::vector<double> weights = {}
 );
 
+
+/**
+ *  fetch_iterator - Python iterator over the results of an SNMP request as hosts complete.
+ *
+ *  The iterator owns the request and runs the main event loop on each call to next until
+ *  chunk_size hosts are complete or the request is complete.  The GIL is only held at chunk
+ *  boundaries.  Results are buffered per host so a chunk never contains a partial host.
+ *
+ *  For use with an external event loop (e.g. asyncio), fileno exposes a file descriptor that is
+ *  readable whenever a response is waiting, timeout is the time until net-snmp must retry or
+ *  timeout a request, and poll runs the main event loop without blocking.
+ */
+struct fetch_iterator {
+
+  std::vector<host_t> hosts;
+  std::vector<var_bind_t> var_binds;
+  root_index_t root_index;
+  std::vector<index_spec_t> index_specs;
+  SnmpConfig config;
+  size_t chunk_size;
+  size_t completed;
+  std::vector<result_buffer> results;
+  std::vector<SnmpError> errors;
+  fetch_state state;
+  bool running;
+  bool exhausted;
+
+  /**
+   *  fetch_iterator - Validate the request and start the event loop.  The iterator MUST NOT be
+   *  moved once constructed as the running sessions point into it.
+   *
+   *  @param pdu_type   PDU type of this request.
+   *  @param hosts      Hosts for collection.  See fetch.
+   *  @param var_binds  Variable bindings for collection.  See fetch.
+   *  @param config     Configuration object.  Config.threads is not used.
+   *  @param chunk_size Minimum number of complete hosts in a chunk.
+   *  @param index_specs Index spec of each variable binding.  See fetch.
+   *  @param weights    Weight of each host.  See fetch.
+   */
+  fetch_iterator(
+      PDU_TYPE pdu_type,
+      std::vector<host_t> hosts,
+      std::vector<var_bind_t> var_binds,
+      SnmpConfig config,
+      size_t chunk_size,
+      std::vector<index_spec_t> index_specs = {},
+      std::vector<double> weights = {}
+  );
+
+  fetch_iterator(const fetch_iterator &) = delete;
+  fetch_iterator &operator=(const fetch_iterator &) = delete;
+
+  /**
+   *  ~fetch_iterator - Close any active sessions of an abandoned request.
+   */
+  ~fetch_iterator();
+
+  /**
+   *  next - Run the request until the next chunk of hosts is complete.
+   *
+   *  @return A tuple of (results, errors) in the same format as fetch for the hosts completed
+   *          since the last chunk.  Errors are returned in the chunk they occur.  Raises
+   *          StopIteration once the request is complete.
+   */
+  std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
+  next();
+
+  /**
+   *  poll - Run one iteration of the request without blocking.
+   *
+   *  @return The next chunk in the same format as next once it is complete, else None.  Raises
+   *          StopIteration once the request is complete.
+   */
+  py::object
+  poll();
+
+  /**
+   *  fileno - Get the file descriptor of the event loop which is readable when a response is
+   *           waiting to be read.
+   *
+   *  @return File descriptor or -1 once closed.
+   */
+  int
+  fileno();
+
+  /**
+   *  timeout - Get the time until the next retry or timeout of a request is due.
+   *
+   *  @return Seconds until poll must be called even if no response is readable.
+   */
+  double
+  timeout();
+
+  /**
+   *  close - Stop the request closing any active sessions and the event loop.
+   */
+  void
+  close();
+
+  /**
+   *  take_chunk - Take the results and errors collected since the last chunk.  The results and
+   *               errors are left empty in place as the sessions point at them.
+   *
+   *  @return A tuple of (results, errors).
+   */
+  std::tuple<std::vector<py::array_t<uint8_t>>, std::vector<SnmpError>>
+  take_chunk();
+
+};
+
 }
 
 #endif
@@ -0,0 +1,412 @@
+/**
+ *  pool.cpp
+ */
+
+#include "pool.hpp"
+#include "usm.hpp"
+
+namespace snmp_fetch {
+
+/**
+ *  global_session_pool
+ */
+session_pool &
+global_session_pool() {
+  static session_pool *pool = []() {
+    session_pool *created = new session_pool();
+    created->last_eviction = 0;
+    created->pid = getpid();
+    return created;
+  }();
+  return *pool;
+}
+
+
+/**
+ *  global_resolution_cache
+ */
+resolution_cache &
+global_resolution_cache() {
+  static resolution_cache *cache = new resolution_cache();
+  return *cache;
+}
+
+
+/**
+ *  global_repetitions_cache
+ */
+repetitions_cache &
+global_repetitions_cache() {
+  static repetitions_cache *cache = new repetitions_cache();
+  return *cache;
+}
+
+
+/**
+ *  register_fork_handler - Create the pools and caches of the process and reset them in forked
+ *  children.  They are created up front so the child handler never allocates.
+ *
+ *  @return Result of pthread_atfork.
+ */
+static int
+register_fork_handler() {
+  global_session_pool();
+  global_resolution_cache();
+  global_repetitions_cache();
+  global_usm_cache();
+  return pthread_atfork(NULL, NULL, reset_after_fork);
+}
+
+[[maybe_unused]] static int fork_handler = register_fork_handler();
+
+
+/**
+ *  reset_after_fork
+ */
+void
+reset_after_fork() {
+  new (&global_session_pool().mutex) std::mutex();
+  new (&global_resolution_cache().mutex) std::mutex();
+  new (&global_repetitions_cache().mutex) std::mutex();
+  new (&global_usm_cache().mutex) std::mutex();
+  new (&global_usm_cache().open_mutex) std::mutex();
+}
+
+
+/**
+ *  drop_inherited_sessions
+ */
+size_t
+drop_inherited_sessions(
+    session_pool &pool
+) {
+
+  if (pool.pid == getpid())
+    return 0;
+
+  // close the descriptors of the child; the sockets stay open in the parent
+  size_t dropped = pool.idle.size();
+  for (auto &&[key, idle]: pool.idle) {
+    netsnmp_transport *transport = snmp_sess_transport(std::get<0>(idle));
+    if (transport != NULL && transport->sock >= 0)
+      close(transport->sock);
+  }
+  pool.idle.clear();
+  pool.pid = getpid();
+
+  return dropped;
+
+}
+
+
+/**
+ *  session_key
+ */
+pool_key_t
+session_key(
+    const host_t &host,
+    const SnmpConfig &config
+) {
+  return std::make_tuple(
+      std::get<1>(host),
+      std::get<2>(host),
+      std::holds_alternative<UsmCredentials>(std::get<2>(host))
+        ? SNMP_VERSION_3
+        : SNMP_VERSION_2c,
+      config.retries,
+      config.timeout
+  );
+}
+
+
+/**
+ *  evict_sessions
+ */
+size_t
+evict_sessions(
+    session_pool &pool,
+    uint64_t idle_timeout,
+    uint64_t now
+) {
+
+  // number of sessions closed
+  size_t closed = 0;
+
+  for (auto it = pool.idle.begin(); it != pool.idle.end();) {
+    auto [session, released] = it->second;
+    if (now - released > idle_timeout) {
+      snmp_sess_close(session);
+      it = pool.idle.erase(it);
+      ++closed;
+      continue;
+    }
+    ++it;
+  }
+  pool.last_eviction = now;
+
+  return closed;
+
+}
+
+
+/**
+ *  maybe_evict_sessions - Evict idle sessions if the pool was not scanned in the last second.
+ *
+ *  @param pool   Reference to the session pool; the caller MUST hold the mutex.
+ *  @param config Reference to the configuration.
+ */
+static void
+maybe_evict_sessions(
+    session_pool &pool,
+    const SnmpConfig &config
+) {
+  uint64_t now = monotonic_time();
+  if (now - pool.last_eviction >= 1000000)
+    evict_sessions(pool, config.session_idle_timeout * 1000000, now);
+}
+
+
+/**
+ *  acquire_session
+ */
+void *
+acquire_session(
+    session_pool &pool,
+    const pool_key_t &key,
+    const SnmpConfig &config
+) {
+
+  std::lock_guard<std::mutex> lock(pool.mutex);
+  drop_inherited_sessions(pool);
+  maybe_evict_sessions(pool, config);
+
+  // take the most recently released session of the key
+  auto [first, last] = pool.idle.equal_range(key);
+  if (first == last)
+    return NULL;
+  auto it = std::max_element(first, last, [](auto &a, auto &b) {
+      return std::get<1>(a.second) < std::get<1>(b.second);
+  });
+  void *session = std::get<0>(it->second);
+  pool.idle.erase(it);
+
+  return session;
+
+}
+
+
+/**
+ *  release_session
+ */
+void
+release_session(
+    session_pool &pool,
+    const pool_key_t &key,
+    void *session,
+    const SnmpConfig &config
+) {
+
+  std::lock_guard<std::mutex> lock(pool.mutex);
+  drop_inherited_sessions(pool);
+  pool.idle.emplace(key, std::make_tuple(session, monotonic_time()));
+  maybe_evict_sessions(pool, config);
+
+}
+
+
+/**
+ *  clear_session_pool
+ */
+size_t
+clear_session_pool() {
+  session_pool &pool = global_session_pool();
+  std::lock_guard<std::mutex> lock(pool.mutex);
+  drop_inherited_sessions(pool);
+  size_t closed = pool.idle.size();
+  for (auto &&[key, idle]: pool.idle)
+    snmp_sess_close(std::get<0>(idle));
+  pool.idle.clear();
+  return closed;
+}
+
+
+/**
+ *  get_bulk_repetitions
+ */
+std::map<std::string, size_t>
+get_bulk_repetitions() {
+  repetitions_cache &cache = global_repetitions_cache();
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  return cache.hosts;
+}
+
+
+/**
+ *  set_bulk_repetitions
+ */
+void
+set_bulk_repetitions(
+    const std::map<std::string, size_t> &repetitions
+) {
+  repetitions_cache &cache = global_repetitions_cache();
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  for (auto &&[host, value]: repetitions)
+    cache.hosts[host] = value;
+}
+
+
+/**
+ *  clear_bulk_repetitions
+ */
+size_t
+clear_bulk_repetitions() {
+  repetitions_cache &cache = global_repetitions_cache();
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  size_t cleared = cache.hosts.size();
+  cache.hosts.clear();
+  return cleared;
+}
+
+
+/**
+ *  resolve - Resolve a host name to a numeric address.
+ *
+ *  @param host   Reference to the host name.
+ *  @param family Address family to resolve.
+ *  @return       Numeric address or an empty string on failure.
+ */
+static std::string
+resolve(
+    const std::string &host,
+    int family
+) {
+
+  struct addrinfo hints;
+  memset(&hints, 0, sizeof(hints));
+  hints.ai_family = family;
+  hints.ai_socktype = SOCK_DGRAM;
+
+  struct addrinfo *addresses = NULL;
+  if (getaddrinfo(host.c_str(), NULL, &hints, &addresses) != 0 || addresses == NULL)
+    return "";
+
+  // take the first address as net-snmp would
+  char address[INET6_ADDRSTRLEN];
+  int error = getnameinfo(
+      addresses->ai_addr, addresses->ai_addrlen, address, sizeof(address), NULL, 0,
+      NI_NUMERICHOST
+  );
+  freeaddrinfo(addresses);
+
+  return error ? "" : std::string(address);
+
+}
+
+
+/**
+ *  split_peername
+ */
+bool
+split_peername(
+    const std::string &peername,
+    std::string &domain,
+    std::string &host,
+    std::string &port
+) {
+
+  // split the transport from the address; only UDP is understood
+  domain = "udp";
+  std::string address = peername;
+  size_t colon = peername.find(':');
+  if (colon != std::string::npos) {
+    std::string prefix = peername.substr(0, colon);
+    if (prefix == "udp" || prefix == "udp6") {
+      domain = prefix;
+      address = peername.substr(colon + 1);
+    }
+  }
+
+  // Split the port from the host.  IPv6 literals are either bracketed with an optional port or
+  // unbracketed without one.  Another transport leaves a port which is not a number.
+  host = address;
+  port = SNMP_FETCH__DEFAULT_PORT;
+  uint8_t scratch[sizeof(struct in6_addr)];
+  if (inet_pton(AF_INET6, address.c_str(), scratch) == 1)
+    return true;
+  if (!address.empty() && address[0] == '[') {
+    size_t bracket = address.find(']');
+    if (bracket == std::string::npos)
+      return false;
+    host = address.substr(1, bracket - 1);
+    if (bracket + 1 < address.size()) {
+      if (address[bracket + 1] != ':')
+        return false;
+      port = address.substr(bracket + 2);
+    }
+  } else if ((colon = address.find(':')) != std::string::npos) {
+    host = address.substr(0, colon);
+    port = address.substr(colon + 1);
+  }
+
+  return !(
+      host.empty() ||
+      port.empty() || port.find_first_not_of("0123456789") != std::string::npos
+  );
+
+}
+
+
+/**
+ *  resolve_peername
+ */
+std::string
+resolve_peername(
+    resolution_cache &cache,
+    const std::string &peername,
+    uint64_t ttl
+) {
+
+  // other transports are not understood here and are left to net-snmp
+  std::string domain;
+  std::string host;
+  std::string port;
+  if (!split_peername(peername, domain, host, port))
+    return peername;
+
+  // a numeric address needs no resolution
+  uint8_t scratch[sizeof(struct in6_addr)];
+  if (
+      inet_pton(AF_INET, host.c_str(), scratch) == 1 ||
+      inet_pton(AF_INET6, host.c_str(), scratch) == 1
+  )
+    return peername;
+
+  // use the cached resolution if it has not expired
+  uint64_t now = monotonic_time();
+  if (ttl) {
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    auto cached = cache.peernames.find(peername);
+    if (cached != cache.peernames.end() && std::get<1>(cached->second) > now)
+      return std::get<0>(cached->second);
+  }
+
+  // Resolve without holding the lock so one slow lookup does not stall the others.  Failures
+  // are not cached and net-snmp reports them when opening the original peername.
+  int family = (domain == "udp6") ? AF_INET6 : AF_INET;
+  std::string resolved = resolve(host, family);
+  if (resolved.empty())
+    return peername;
+  resolved = (family == AF_INET6)
+    ? domain + ":[" + resolved + "]:" + port
+    : domain + ":" + resolved + ":" + port;
+
+  if (ttl) {
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    cache.peernames[peername] = std::make_tuple(resolved, now + ttl);
+  }
+
+  return resolved;
+
+}
+
+}
@@ -0,0 +1,276 @@
+/**
+ *  pool.hpp - Session pool, host resolution cache and bulk repetitions shared by every fetch in
+ *  the process.
+ */
+
+#ifndef SNMP_FETCH__POOL_HPP
+#define SNMP_FETCH__POOL_HPP
+
+#include <mutex>
+#include <new>
+#include <netdb.h>
+#include <pthread.h>
+#include <unistd.h>
+#include <arpa/inet.h>
+#include <sys/socket.h>
+
+#include "types.hpp"
+
+extern "C" {
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+}
+
+namespace snmp_fetch {
+
+// default port of an SNMP agent
+#define SNMP_FETCH__DEFAULT_PORT "161"
+
+/**
+ *  pool_key_t - Everything a net-snmp session is opened with; (peername, community or SNMPv3
+ *  credentials, version, retries, timeout).  A pooled session is only reused for an identical key.
+ */
+using pool_key_t = std::tuple<std::string, credentials_t, long, ssize_t, ssize_t>;
+
+
+/**
+ *  pooled_session_t - An idle net-snmp session and the monotonic time (microseconds) it was
+ *  released to the pool.
+ */
+using pooled_session_t = std::tuple<void *, uint64_t>;
+
+
+/**
+ *  session_pool - Idle net-snmp sessions kept open between fetches.
+ *
+ *  A session is checked out of the pool for the life of a host in the event loop and is never
+ *  shared while checked out.  Sessions idle for longer than config.session_idle_timeout are
+ *  closed the next time the pool is used.  Eviction scans the pool at most once per second.
+ *
+ *  Pid is the process the idle sessions were opened in.  A forked child inherits the idle
+ *  sessions with the sockets the parent still uses; the child drops them the next time the pool
+ *  is used without closing the sessions of the parent.
+ */
+struct session_pool {
+  std::mutex mutex;
+  std::multimap<pool_key_t, pooled_session_t> idle;
+  uint64_t last_eviction;
+  pid_t pid;
+};
+
+
+/**
+ *  resolution_cache - Numeric peernames resolved from host names, each with the monotonic time
+ *  (microseconds) the resolution expires.
+ */
+struct resolution_cache {
+  std::mutex mutex;
+  std::map<std::string, std::tuple<std::string, uint64_t>> peernames;
+};
+
+
+/**
+ *  repetitions_cache - The max-repetitions each host settled on, keyed by host name, when
+ *  config.adaptive_bulk_repetitions is set.  A later session to the host starts from it.
+ */
+struct repetitions_cache {
+  std::mutex mutex;
+  std::map<std::string, size_t> hosts;
+};
+
+
+/**
+ *  global_session_pool - Get the session pool of the process.  The pool is never destroyed so
+ *  that pooled sessions are not closed after net-snmp is torn down at exit.
+ *
+ *  @return Reference to the session pool.
+ */
+session_pool &
+global_session_pool();
+
+
+/**
+ *  drop_inherited_sessions - Drop the idle sessions a forked child inherited from its parent.
+ *  The socket of each session is closed in the child only; the net-snmp sessions are left to
+ *  the parent.
+ *
+ *  @param pool Reference to the session pool; the caller MUST hold the mutex.
+ *  @return     Number of sessions dropped.
+ */
+size_t
+drop_inherited_sessions(
+    session_pool &pool
+);
+
+
+/**
+ *  reset_after_fork - Reinitialize the pools and caches of the process in a forked child.  The
+ *  mutexes may have been held by another thread of the parent at the fork, which does not exist
+ *  in the child, so they are replaced without being unlocked.  Registered with pthread_atfork
+ *  once the extension is loaded.
+ */
+void
+reset_after_fork();
+
+
+/**
+ *  global_resolution_cache - Get the resolution cache of the process.
+ *
+ *  @return Reference to the resolution cache.
+ */
+resolution_cache &
+global_resolution_cache();
+
+
+/**
+ *  global_repetitions_cache - Get the bulk repetitions cache of the process.
+ *
+ *  @return Reference to the bulk repetitions cache.
+ */
+repetitions_cache &
+global_repetitions_cache();
+
+
+/**
+ *  session_key - Get the pool key of the session for a host.
+ *
+ *  @param host   Reference to the host for collection.
+ *  @param config Reference to the configuration.
+ *  @return       Pool key.
+ */
+pool_key_t
+session_key(
+    const host_t &host,
+    const SnmpConfig &config
+);
+
+
+/**
+ *  acquire_session - Check out an idle session from the pool.
+ *
+ *  @param pool   Reference to the session pool.
+ *  @param key    Reference to the pool key of the session.
+ *  @param config Reference to the configuration.
+ *  @return       Returns a void* to the net-snmp session object or NULL if none is idle.
+ */
+void *
+acquire_session(
+    session_pool &pool,
+    const pool_key_t &key,
+    const SnmpConfig &config
+);
+
+
+/**
+ *  release_session - Return a session to the pool.  The session MUST have no outstanding
+ *  requests and its socket MUST NOT be registered with an event loop.
+ *
+ *  @param pool    Reference to the session pool.
+ *  @param key     Reference to the pool key of the session.
+ *  @param session Pointer to the net-snmp session object.
+ *  @param config  Reference to the configuration.
+ */
+void
+release_session(
+    session_pool &pool,
+    const pool_key_t &key,
+    void *session,
+    const SnmpConfig &config
+);
+
+
+/**
+ *  evict_sessions - Close the sessions idle for longer than the idle timeout.
+ *
+ *  @param pool         Reference to the session pool; the caller MUST hold the mutex.
+ *  @param idle_timeout Microseconds a session may stay idle.
+ *  @param now          Monotonic time (microseconds).
+ *  @return             Number of sessions closed.
+ */
+size_t
+evict_sessions(
+    session_pool &pool,
+    uint64_t idle_timeout,
+    uint64_t now
+);
+
+
+/**
+ *  clear_session_pool - Close every idle session in the pool of the process.
+ *
+ *  @return Number of sessions closed.
+ */
+size_t
+clear_session_pool();
+
+
+/**
+ *  get_bulk_repetitions - Get the max-repetitions each host settled on.
+ *
+ *  @return Max-repetitions keyed by host name.
+ */
+std::map<std::string, size_t>
+get_bulk_repetitions();
+
+
+/**
+ *  set_bulk_repetitions - Seed the max-repetitions later sessions to each host start from, e.g.
+ *  with the values reported by a previous process.
+ *
+ *  @param repetitions Reference to the max-repetitions keyed by host name.
+ */
+void
+set_bulk_repetitions(
+    const std::map<std::string, size_t> &repetitions
+);
+
+
+/**
+ *  clear_bulk_repetitions - Forget the max-repetitions of every host.
+ *
+ *  @return Number of hosts forgotten.
+ */
+size_t
+clear_bulk_repetitions();
+
+
+/**
+ *  split_peername - Split a UDP peername into its transport domain, host and port, e.g.
+ *  "udp6:[2001:db8::1]:1161" to ("udp6", "2001:db8::1", "1161").  The domain defaults to "udp" and
+ *  the port to SNMP_FETCH__DEFAULT_PORT.
+ *
+ *  @param peername Reference to the peername of the host.
+ *  @param domain   Reference to the transport domain to fill.
+ *  @param host     Reference to the host name or address to fill.
+ *  @param port     Reference to the port to fill.
+ *  @return         Returns false if the peername is not a UDP peername.
+ */
+bool
+split_peername(
+    const std::string &peername,
+    std::string &domain,
+    std::string &host,
+    std::string &port
+);
+
+
+/**
+ *  resolve_peername - Resolve the host name of a UDP peername to a numeric peername, e.g.
+ *  "router1:1161" to "udp:192.0.2.1:1161".  Any other transport, a numeric address or a host
+ *  name that fails to resolve is returned as is for net-snmp to open or report.
+ *
+ *  @param cache    Reference to the resolution cache.
+ *  @param peername Reference to the peername of the host.
+ *  @param ttl      Microseconds a resolution is cached; 0 resolves without the cache.
+ *  @return         Numeric peername.
+ */
+std::string
+resolve_peername(
+    resolution_cache &cache,
+    const std::string &peername,
+    uint64_t ttl
+);
+
+}
+
+#endif
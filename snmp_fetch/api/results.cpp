@@ -13,12 +13,217 @@ std::map<uint8_t, std::string> warning_value_types = {
 };
 
 
+/**
+ *  var_bind_dtype_size
+ */
+size_t var_bind_dtype_size(
+    const var_bind_t &var_bind
+) {
+  return (
+      // host index
+      sizeof(uint64_t) +
+      // oid buffer size (in suboids, not bytes)
+      sizeof(uint64_t) +
+      // result buffer size (bytes)
+      sizeof(uint64_t) +
+      // result type code
+      sizeof(uint64_t) +
+      // timestamp
+      sizeof(time_t) +
+      // oid buffer
+      UINT64_ALIGN(std::get<0>(std::get<1>(var_bind))) +
+      // result buffer
+      UINT64_ALIGN(std::get<1>(std::get<1>(var_bind)))
+  );
+}
+
+
+/**
+ *  init_results
+ */
+std::vector<result_buffer> init_results(
+    size_t count,
+    const SnmpConfig &config
+) {
+  std::vector<result_buffer> results;
+  results.reserve(count);
+  for (size_t i = 0; i < count; ++i)
+    results.emplace_back(config);
+  return results;
+}
+
+
+/**
+ *  reserve_results
+ */
+void reserve_results(
+    int pdu_type,
+    size_t host_count,
+    std::vector<var_bind_t> &var_binds,
+    std::vector<result_buffer> &results,
+    SnmpConfig &config
+) {
+  // estimate the number of results per host for each variable binding
+  size_t results_per_host = (
+      (pdu_type == SNMP_MSG_GETBULK) ? std::max<size_t>(config.max_bulk_repetitions, 1) : 1
+  );
+
+  // reserve each column up to SNMP_FETCH__MAX_RESULT_RESERVATION bytes
+  for (size_t i = 0; i < var_binds.size(); ++i) {
+    size_t dtype_size = var_bind_dtype_size(var_binds[i]);
+    size_t max_count = SNMP_FETCH__MAX_RESULT_RESERVATION / dtype_size;
+    size_t count = (
+        (host_count && results_per_host > max_count / host_count) ?
+        max_count : std::min(host_count * results_per_host, max_count)
+    );
+    size_t capacity = count * dtype_size;
+    if (results[i].spill_directory.has_value())
+      capacity = std::min(capacity, results[i].max_bytes_in_memory);
+    results[i].reserve(capacity);
+  }
+}
+
+
+/**
+ *  build_root_index
+ */
+root_index_t build_root_index(
+    std::vector<var_bind_t> &var_binds
+) {
+  // init the positions in request order
+  root_index_t root_index(var_binds.size());
+  std::iota(root_index.begin(), root_index.end(), 0);
+
+  // sort the positions by the root oid of each variable binding
+  std::sort(
+      root_index.begin(),
+      root_index.end(),
+      [&var_binds](size_t a, size_t b) {
+        return snmp_oid_compare(
+            std::get<0>(var_binds[a]).data(), std::get<0>(var_binds[a]).size(),
+            std::get<0>(var_binds[b]).data(), std::get<0>(var_binds[b]).size()
+        ) < 0;
+      }
+  );
+
+  return root_index;
+}
+
+
+/**
+ *  find_root
+ */
+std::optional<size_t> find_root(
+    variable_list &resp_var_bind,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index
+) {
+  // find the first root greater than the response variable binding
+  auto it = std::upper_bound(
+      root_index.begin(),
+      root_index.end(),
+      resp_var_bind,
+      [&var_binds](const variable_list &resp_var_bind, size_t idx) {
+        return snmp_oid_compare(
+            resp_var_bind.name, resp_var_bind.name_length,
+            std::get<0>(var_binds[idx]).data(), std::get<0>(var_binds[idx]).size()
+        ) < 0;
+      }
+  );
+
+  // every root is greater than the response variable binding
+  if (it == root_index.begin())
+    return {};
+
+  // the previous root is the only candidate; verify the response is in its subtree
+  size_t idx = *std::prev(it);
+  if (
+      netsnmp_oid_is_subtree(
+        std::get<0>(var_binds[idx]).data(),
+        std::get<0>(var_binds[idx]).size(),
+        resp_var_bind.name,
+        resp_var_bind.name_length
+      )
+  )
+    return {};
+
+  return idx;
+}
+
+
+/**
+ *  index_spec_size
+ */
+size_t index_spec_size(
+    const index_spec_t &spec
+) {
+  size_t size = 0;
+  for (auto &&[kind, count, element_size]: spec) {
+    if (kind != INDEX_INTEGER && kind != INDEX_FIXED)
+      // length
+      size += sizeof(uint64_t);
+    // elements
+    size += (kind == INDEX_INTEGER) ? sizeof(uint64_t) : UINT64_ALIGN(count * element_size);
+  }
+  return size;
+}
+
+
+/**
+ *  decode_index
+ */
+void decode_index(
+    uint8_t *buffer,
+    const oid *suboids,
+    size_t n_suboids,
+    const index_spec_t &spec
+) {
+  size_t pos = 0;
+  const oid *end = suboids + n_suboids;
+
+  for (auto &&[kind, count, element_size]: spec) {
+    // integers are a single uint64_t element
+    if (kind == INDEX_INTEGER) {
+      if (suboids < end)
+        memcpy(&buffer[pos], suboids++, sizeof(uint64_t));
+      pos += sizeof(uint64_t);
+      continue;
+    }
+
+    // get the number of elements encoded in the suboids
+    uint64_t length = count;
+    if (kind == INDEX_LENGTH_PREFIXED)
+      length = (suboids < end) ? *suboids++ : 0;
+    else if (kind == INDEX_IMPLIED)
+      length = end - suboids;
+    length = std::min<uint64_t>(length, end - suboids);
+
+    // copy the length
+    if (kind != INDEX_FIXED) {
+      memcpy(&buffer[pos], &length, sizeof(uint64_t));
+      pos += sizeof(uint64_t);
+    }
+
+    // copy the elements up to the size of the field; the rest are consumed and discarded
+    for (uint64_t i = 0; i < std::min(length, count); ++i) {
+      if (element_size == sizeof(uint64_t))
+        memcpy(&buffer[pos + i * sizeof(uint64_t)], &suboids[i], sizeof(uint64_t));
+      else
+        buffer[pos + i] = (uint8_t)suboids[i];
+    }
+    suboids += length;
+    pos += UINT64_ALIGN(count * element_size);
+  }
+}
+
+
 /**
  *  append_result
  */
 void append_result(
     variable_list &resp_var_bind,
-    async_state &state
+    async_state &state,
+    partition_t &partition
 ) {
   // test for non-value types and generate an error if matched
   if (warning_value_types.find(resp_var_bind.type) != warning_value_types.end()) {
@@ -45,53 +250,31 @@ void append_result(
 
   // find the root variable binding supplied in the initial fetch request for this response
   // variable binding
-  auto it = std::find_if(
-      state.var_binds->begin(),
-      state.var_binds->end(),
-      [&resp_var_bind](var_bind_t const &var_bind) {
-        // 0 = true; 1 = false
-        return !netsnmp_oid_is_subtree(
-            std::get<0>(var_bind).data(),
-            std::get<0>(var_bind).size(),
-            resp_var_bind.name,
-            resp_var_bind.name_length
-        );
-      }
-  );
+  auto root = find_root(resp_var_bind, *state.var_binds, *state.root_index);
 
   // if no root variable binding is found, discard the PDU; likely cause for collecting this
   // response is an overrun on a walk
-  if (it == state.var_binds->end())
+  if (!root)
     return;
 
   // get the index position of the root variable binding from the initial fetch request for this
   // response variable binding
-  size_t idx = it - state.var_binds->begin();
+  size_t idx = *root;
+
+  // Verify the root variable binding belongs to the partition of the request.  If it doesn't,
+  // discard the response; a walk likely overran into a slot that exists in another partition.
+  if (idx < partition.offset || idx >= partition.offset + partition.var_binds.size())
+    return;
 
   // Get the last recorded response variable binding for the found root variable binding by looking
-  // at the associated next_var_binds slot.  Modulus is used due to partitioning with
-  // config.max_var_binds_per_pdu.  WARNING: if ambiguous oids are allowed and they cross partitions,
-  // this will likely pick the wrong index in the partition and, at worst, segfault
-  oid_t &last_var_bind = state.next_var_binds.front()[
-    idx % state.config->max_var_binds_per_pdu
-  ];
+  // at the associated slot in the partition.
+  oid_t &last_var_bind = partition.var_binds[idx - partition.offset];
 
   // discard the response variable binding if the last recorded response variable binding was marked
   // as complete (empty); likely cause for collecting this response is an overrun on a walk
   if (last_var_bind.empty())
     return;
 
-  // Verify the last recorded variable binding has the same root as the response variable binding.
-  // If it doesn't, discard the response; a walk likely overran into a slot that exists in another
-  // partition.  0 == True, 1 == False
-  if (netsnmp_oid_is_subtree(
-        std::get<0>(*it).data(),
-        std::get<0>(*it).size(),
-        last_var_bind.data(),
-        last_var_bind.size()
-  ))
-    return;
-
   // perform an oid comparison between the response variable binding and the last recorded
   // variable binding
   int oid_test = snmp_oid_compare(
@@ -120,67 +303,92 @@ void append_result(
   size_t result_buffer_size = UINT64_ALIGN(std::get<1>(std::get<1>((*state.var_binds)[idx])));
 
   // get the struct size of elements in the result slot
-  size_t dtype_size = (
-      // host index
-      sizeof(uint64_t) +
-      // oid buffer size (in suboids, not bytes)
-      sizeof(uint64_t) +
-      // result buffer size (bytes)
-      sizeof(uint64_t) +
-      // result type code
-      sizeof(uint64_t) +
-      // timestamp
-      sizeof(time_t) +
-      // oid buffer
-      oid_buffer_size +
-      // result buffer
-      result_buffer_size
-  );
+  size_t dtype_size = var_bind_dtype_size((*state.var_binds)[idx]);
 
-  // increase the result column to copy in the response variable binding
+  // Increase the result column to copy in the response variable binding.  This is called from
+  // net-snmp so a failure to grow the column, e.g. to spill it to a full disk, MUST NOT be thrown;
+  // log it and complete the slot instead.
   auto &result = (*state.results)[idx];
-  size_t pos = result.size();
-  result.resize(pos + dtype_size);
+  size_t pos = 0;
+  uint8_t *row;
+  try {
+    row = result.extend(dtype_size);
+  } catch (const std::exception &e) {
+    auto error = dynamic_cast<const std::system_error *>(&e);
+    state.errors->push_back(SnmpError(
+          CREATE_RESPONSE_PDU_ERROR,
+          state.host,
+          error ? error->code().value() : ENOMEM,
+          {},
+          {},
+          {},
+          last_var_bind,
+          "Failed to grow the results: " + std::string(e.what())
+    ));
+    last_var_bind.clear();
+    return;
+  }
 
   // copy the host index
   memcpy(
-      &result[pos],
+      &row[pos],
       &std::get<0>(state.host),
       sizeof(uint64_t)
   );
   // copy the oid buffer size (in suboids, not bytes)
   memcpy(
-      &result[pos += sizeof(uint64_t)],
+      &row[pos += sizeof(uint64_t)],
       &resp_var_bind.name_length,
       sizeof(uint64_t)
   );
   // copy the result buffer size (bytes)
   memcpy(
-      &result[pos += sizeof(uint64_t)],
+      &row[pos += sizeof(uint64_t)],
       &resp_var_bind.val_len,
       sizeof(uint64_t)
   );
   // copy the result type code
   memcpy(
-    &result[pos += sizeof(uint64_t)],
+    &row[pos += sizeof(uint64_t)],
     &resp_var_bind.type,
     sizeof(uint64_t)
   );
   // copy the timestamp
   memcpy(
-    &result[pos += sizeof(uint64_t)],
+    &row[pos += sizeof(uint64_t)],
     &timestamp,
     sizeof(time_t)
   );
-  // copy the oid
-  memcpy(
-      &result[pos += sizeof(time_t)],
-      resp_var_bind.name,
-      std::min(oid_buffer_size, resp_var_bind.name_length << 3)
+  // get the index spec of the root variable binding; empty if the index is not decoded
+  static const index_spec_t raw_index;
+  const index_spec_t &index_spec = (
+      state.index_specs->empty() ? raw_index : (*state.index_specs)[idx]
   );
+  if (index_spec.empty()) {
+    // copy the oid
+    memcpy(
+        &row[pos += sizeof(time_t)],
+        resp_var_bind.name,
+        std::min(oid_buffer_size, resp_var_bind.name_length << 3)
+    );
+  } else {
+    // copy the suboids preceding the index
+    size_t index_size = index_spec_size(index_spec);
+    size_t root_length = std::min(
+        (oid_buffer_size - index_size) >> 3, resp_var_bind.name_length
+    );
+    memcpy(&row[pos += sizeof(time_t)], resp_var_bind.name, root_length << 3);
+    // decode the index into the trailing bytes of the oid buffer
+    decode_index(
+        &row[pos + oid_buffer_size - index_size],
+        resp_var_bind.name + root_length,
+        resp_var_bind.name_length - root_length,
+        index_spec
+    );
+  }
   // copy the result
   memcpy(
-      &result[pos += oid_buffer_size],
+      &row[pos += oid_buffer_size],
       resp_var_bind.val.bitstring,
       // Use the caller's buffer size for the result instead of the uint64_t aligned
       // result_buffer_size.  This allows the caller to add up to 7 bytes of padding and is
@@ -191,6 +399,36 @@ void append_result(
 }
 
 
+/**
+ *  retry_partition - Stop tracking the request PDU of a partition so the partition is resent.
+ *
+ *  @param state   Reference to the state wrapped net-snmp session.
+ *  @param request Iterator to the request PDU in flight.
+ *  @param backoff Back off before the partition is resent; otherwise it is resent immediately.
+ */
+static void
+retry_partition(
+    async_state &state,
+    std::map<int, std::list<partition_t>::iterator>::iterator request,
+    bool backoff
+) {
+
+  auto &partition = *request->second;
+  if (backoff) {
+    size_t doublings = std::min<size_t>(
+        partition.attempts++, SNMP_FETCH__MAX_PARTITION_RETRY_DOUBLINGS
+    );
+    partition.retry_at = monotonic_time() + (
+        (uint64_t)SNMP_FETCH__PARTITION_RETRY_BACKOFF << doublings
+    );
+  }
+  partition.reqid = 0;
+  state.inflight.erase(request);
+  state.async_status = state.inflight.empty() ? ASYNC_IDLE : ASYNC_WAITING;
+
+}
+
+
 /**
  *  async_cb
  */
@@ -205,12 +443,16 @@ int async_cb(
   // deconstruct the state
   auto &state = *(async_state *)magic;
 
-  // set the status to idle since response PDU has been collected
-  state.async_status = ASYNC_IDLE;
+  // find the partition of the request PDU; requests abandoned when the work of the session was
+  // cleared are no longer tracked and are ignored
+  auto request = state.inflight.find(reqid);
+  if (request == state.inflight.end())
+    return 1;
+  auto &partition = *request->second;
 
-  // create a reference to the last collected variable bindings in the current
-  // parition (copy on assignment)
-  std::vector<oid_t> last_var_binds = state.next_var_binds.front();
+  // create a reference to the last collected variable bindings in the partition (copy on
+  // assignment)
+  std::vector<oid_t> last_var_binds = partition.var_binds;
 
   // handle each op code
   switch (op) {
@@ -222,11 +464,33 @@ int async_cb(
           // check the PDU doesn't have an error status
           if (pdu->errstat == SNMP_ERR_NOERROR) {
             // append each response variable binding to the results
+            size_t returned = 0;
             for(variable_list *var = pdu->variables; var; var = var->next_variable) {
-              append_result(*var, state);
+              append_result(*var, state, partition);
+              ++returned;
             }
+            // grow the repetitions if the agent quickly returned every repetition requested
+            if (state.pdu_type == SNMP_MSG_GETBULK) {
+              size_t requested = std::count_if(
+                  last_var_binds.begin(), last_var_binds.end(),
+                  [](auto &vb) { return !vb.empty(); }
+              );
+              grow_bulk_repetitions(
+                  state,
+                  monotonic_time() - partition.sent,
+                  returned >= requested * state.bulk_repetitions
+              );
+            }
+          } else if (
+              pdu->errstat == SNMP_ERR_TOOBIG &&
+              state.pdu_type == SNMP_MSG_GETBULK &&
+              shrink_bulk_repetitions(state)
+          ) {
+            // resend the partition with fewer repetitions; nothing was appended from it
+            retry_partition(state, request, false);
+            return 1;
           } else {
-            // find the variable binding with an error
+            // find the variable binding with an error; the error index may be 0 or out of range
             int ix;
             variable_list *vp;
             for (
@@ -234,8 +498,18 @@ int async_cb(
                 vp && ix != pdu->errindex;
                 vp = vp->next_variable, ++ix
             );
-            oid_t err_var_bind;
-            err_var_bind.assign(vp->name, vp->name + vp->name_length);
+            if (pdu->errindex < 1)
+              vp = NULL;
+
+            // resend a partition without an erroneous variable binding after backing off
+            if (vp == NULL && partition.attempts < state.config->partition_retries) {
+              retry_partition(state, request, true);
+              return 1;
+            }
+
+            std::optional<oid_t> err_var_bind;
+            if (vp != NULL)
+              err_var_bind = oid_t(vp->name, vp->name + vp->name_length);
             state.errors->push_back(SnmpError(
                   BAD_RESPONSE_PDU_ERROR,
                   state.host,
@@ -246,8 +520,22 @@ int async_cb(
                   err_var_bind,
                   std::string(snmp_errstring(pdu->errstat))
             ));
-            // clear all work for this session
-            state.next_var_binds.clear();
+
+            // Drop the erroneous variable binding, the Nth requested (non-empty) variable binding
+            // of the partition, and resend the rest of the partition.  Without one, drop the
+            // partition; other partitions of the session continue.
+            if (vp != NULL) {
+              int n = pdu->errindex;
+              for (auto &&vb: partition.var_binds)
+                if (!vb.empty() && --n == 0) {
+                  vb.clear();
+                  break;
+                }
+              retry_partition(state, request, false);
+              return 1;
+            }
+            for (auto &&vb: partition.var_binds)
+              vb.clear();
           }
         } else {
           state.errors->push_back(SnmpError(
@@ -262,8 +550,10 @@ int async_cb(
                 std::string(snmp_pdu_type(pdu->command)) +
                 "-PDU"
           ));
-          // clear all work for this session
+          // clear all work for this session; other requests in flight are abandoned
           state.next_var_binds.clear();
+          state.broken |= state.inflight.size() > 1;
+          state.inflight.clear();
         }
       } else {
         state.errors->push_back(SnmpError(
@@ -276,11 +566,21 @@ int async_cb(
               {},
               "Failed to allocate memory for the response PDU"
         ));
-        // clear all work for this session
+        // clear all work for this session; other requests in flight are abandoned
         state.next_var_binds.clear();
+        state.broken |= state.inflight.size() > 1;
+        state.inflight.clear();
       }
       break;
     case NETSNMP_CALLBACK_OP_TIMED_OUT:
+      // the next request PDU or session to the host asks for fewer repetitions
+      if (state.pdu_type == SNMP_MSG_GETBULK)
+        shrink_bulk_repetitions(state);
+      // resend the partition from its last good oids after backing off
+      if (partition.attempts < state.config->partition_retries) {
+        retry_partition(state, request, true);
+        return 1;
+      }
       state.errors->push_back(SnmpError(
             TIMEOUT_ERROR,
             state.host,
@@ -291,8 +591,10 @@ int async_cb(
             {},
             "Timeout error"
       ));
-      // clear all work for this session
+      // clear all work for this session; other requests in flight are abandoned
       state.next_var_binds.clear();
+      state.broken |= state.inflight.size() > 1;
+      state.inflight.clear();
       break;
     case NETSNMP_CALLBACK_OP_SEND_FAILED:
       state.errors->push_back(SnmpError(
@@ -305,8 +607,10 @@ int async_cb(
             {},
             "Async probe error"
       ));
-      // clear all work for this session
+      // clear all work for this session; the failed transport is not reused
       state.next_var_binds.clear();
+      state.broken = true;
+      state.inflight.clear();
       break;
     case NETSNMP_CALLBACK_OP_DISCONNECT:
       state.errors->push_back(SnmpError(
@@ -319,34 +623,51 @@ int async_cb(
             {},
             "Transport disconnect error"
       ));
-      // clear all work for this session
+      // clear all work for this session; the failed transport is not reused
       state.next_var_binds.clear();
+      state.broken = true;
+      state.inflight.clear();
       break;
     case NETSNMP_CALLBACK_OP_RESEND:
-      // set the status to retry
+      // later request PDUs ask for fewer repetitions; the resent request PDU is unchanged
+      if (state.pdu_type == SNMP_MSG_GETBULK)
+        shrink_bulk_repetitions(state);
+      // set the status to retry; the request PDU is still in flight
       state.async_status = ASYNC_RETRY;
-      break;
+      return 1;
   }
 
-  // validate work for the next pdu if the session is idle and the work isn't already completed
-  if (state.async_status == ASYNC_IDLE && !state.next_var_binds.empty())
-    // zip the work that generated this request with the proposed work found when appending the
-    // results
-    for (
-        auto const &&[last_oid, tail]:
-        boost::combine(last_var_binds, state.next_var_binds.front())
-    ) {
-      auto &next_oid = boost::get<0>(tail);  // deconstruct the (next_oid, nil) tuple
-      // if result oid did not increase from the request oid, mark the slot to no longer
-      // collect; it was either a get request or a walk request that has been exhausted
-      if (snmp_oid_compare(
-          next_oid.data(),
-          next_oid.size(),
-          last_oid.data(),
-          last_oid.size()
-      ) != 1)
-        next_oid.clear();
-    }
+  // the partition no longer exists if all work for this session was cleared
+  if (state.next_var_binds.empty()) {
+    state.async_status = ASYNC_IDLE;
+    return 1;
+  }
+
+  // validate work for the next pdu; zip the work that generated this request with the proposed
+  // work found when appending the results
+  for (
+      auto const &&[last_oid, tail]:
+      boost::combine(last_var_binds, partition.var_binds)
+  ) {
+    auto &next_oid = boost::get<0>(tail);  // deconstruct the (next_oid, nil) tuple
+    // if result oid did not increase from the request oid, mark the slot to no longer
+    // collect; it was either a get request or a walk request that has been exhausted
+    if (snmp_oid_compare(
+        next_oid.data(),
+        next_oid.size(),
+        last_oid.data(),
+        last_oid.size()
+    ) != 1)
+      next_oid.clear();
+  }
+
+  // the request PDU is no longer in flight
+  partition.reqid = 0;
+  partition.attempts = 0;
+  state.inflight.erase(request);
+
+  // set the status to idle once no request PDUs are in flight
+  state.async_status = state.inflight.empty() ? ASYNC_IDLE : ASYNC_WAITING;
 
   return 1;
 
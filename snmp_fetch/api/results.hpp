@@ -6,9 +6,12 @@
 #define SNMP_FETCH__RESULTS_HPP
 
 #include <map>
+#include <numeric>
+#include <optional>
 #include <time.h>
 #include <boost/range/combine.hpp>
 
+#include "session.hpp"
 #include "types.hpp"
 
 extern "C" {
@@ -19,23 +22,160 @@ extern "C" {
 // macro to align a number of bytes to 8 bytes
 #define UINT64_ALIGN(x) ((x + 7) & ~0x07)
 
+// largest number of bytes reserved up front for a single result column
+#define SNMP_FETCH__MAX_RESULT_RESERVATION (64 << 20)
+
+// microseconds before the first retry of a failed partition; doubled on each further retry
+#define SNMP_FETCH__PARTITION_RETRY_BACKOFF 100000
+
+// largest number of doublings of the partition retry backoff
+#define SNMP_FETCH__MAX_PARTITION_RETRY_DOUBLINGS 10
+
 namespace snmp_fetch {
 
 /**
- *  append_result - Append one response variable binding to the results.
+ *  var_bind_dtype_size - Get the size of one packed result of a variable binding.
+ *
+ *  @param var_bind Reference to the variable binding.
+ *  @return         Number of bytes of one element in the variable binding's result column.
+ */
+size_t var_bind_dtype_size(
+    const var_bind_t &var_bind
+);
+
+
+/**
+ *  init_results - Create an empty result column per variable binding which is spilled to disk
+ *                 per config.spill_directory and config.max_result_bytes_in_memory.
+ *
+ *  @param count  Number of variable bindings.
+ *  @param config Reference to the configuration.
+ *  @return       Empty result columns.
+ */
+std::vector<result_buffer> init_results(
+    size_t count,
+    const SnmpConfig &config
+);
+
+
+/**
+ *  reserve_results - Reserve the capacity of each result column from an estimate of the number
+ *                    of results.  GET requests return one result per host.  Walks return at
+ *                    least one PDU of results per host, i.e. config.max_bulk_repetitions results
+ *                    for BULKGET requests.  Walks larger than the estimate grow geometrically.
+ *                    Columns which spill are reserved no more than max bytes in memory so only
+ *                    results which do not fit in memory are spilled.
+ *
+ *  @param pdu_type   PDU type of this request.
+ *  @param host_count Number of hosts for collection.
+ *  @param var_binds  Reference to the variable bindings for collection.
+ *  @param results    Reference to the results to reserve; one per variable binding.
+ *  @param config     Reference to the configuration.
+ */
+void reserve_results(
+    int pdu_type,
+    size_t host_count,
+    std::vector<var_bind_t> &var_binds,
+    std::vector<result_buffer> &results,
+    SnmpConfig &config
+);
+
+
+/**
+ *  build_root_index - Sort the positions of the variable bindings by root oid.
+ *
+ *  @param var_binds Reference to the variable bindings for collection.
+ *  @return          Positions of the variable bindings in lexicographic order of their root oids.
+ */
+root_index_t build_root_index(
+    std::vector<var_bind_t> &var_binds
+);
+
+
+/**
+ *  find_root - Find the root variable binding of a response variable binding.
+ *
+ *  Roots are unambiguous (no root is a subtree of another), so the only root which can contain
+ *  the response is the greatest root lexicographically less than or equal to it.  That root is
+ *  found with a binary search and then tested with a subtree comparison.
+ *
+ *  @param resp_var_bind Reference to a single response variable binding.
+ *  @param var_binds     Reference to the variable bindings for collection.
+ *  @param root_index    Reference to the positions of the variable bindings sorted by root oid.
+ *  @return              Position of the root variable binding or nothing if no root is found.
+ */
+std::optional<size_t> find_root(
+    variable_list &resp_var_bind,
+    std::vector<var_bind_t> &var_binds,
+    root_index_t &root_index
+);
+
+
+/**
+ *  index_spec_size - Get the size of a decoded table index.
+ *
+ *  @param spec Reference to the index spec.
+ *  @return     Number of bytes of the decoded index; each field is uint64_t aligned.
+ */
+size_t index_spec_size(
+    const index_spec_t &spec
+);
+
+
+/**
+ *  decode_index - Decode the suboids of a table index into its fields.
+ *
+ *  Integer fields are decoded to a uint64_t.  Fixed fields are decoded to size elements of
+ *  element size bytes each; suboids are truncated to the element size.  Length prefixed and
+ *  implied fields are decoded to a uint64_t length followed by the elements.  The length of a
+ *  length prefixed field is its first suboid and the length of an implied field is the number
+ *  of remaining suboids.  Elements past the size of the field are discarded and elements
+ *  missing from the suboids are left as is.  Every field is padded to uint64_t alignment.
+ *
+ *  @param buffer    Pointer to the zeroed buffer of index_spec_size(spec) bytes to decode into.
+ *  @param suboids   Pointer to the suboids of the index.
+ *  @param n_suboids Number of suboids of the index.
+ *  @param spec      Reference to the index spec.
+ */
+void decode_index(
+    uint8_t *buffer,
+    const oid *suboids,
+    size_t n_suboids,
+    const index_spec_t &spec
+);
+
+
+/**
+ *  append_result - Append one response variable binding to the results.  A failure to grow the
+ *                  results is logged and completes the slot of the variable binding.
  *
  *  @param resp_var_bind Reference to a single response variable binding.
  *  @param state         Reference to the response's state wrapped net-snmp session.
+ *  @param partition     Reference to the partition the request PDU was built from.
  */
 void append_result(
     variable_list &resp_var_bind,
-    async_state &state
+    async_state &state,
+    partition_t &partition
 );
 
 
 /**
  *  async_cb - Callback function to process async results.
- *  
+ *
+ *  When config.adaptive_bulk_repetitions is set, the max-repetitions of the session grows after
+ *  fast complete responses and shrinks after retries and timeouts.  A tooBig response shrinks the
+ *  max-repetitions and resends the partition instead of failing the session, until
+ *  config.min_bulk_repetitions is reached.
+ *
+ *  Failures are confined to the partition of the request PDU where possible; the variable
+ *  bindings of a partition only advance on success so a resent partition resumes from the last
+ *  good oids.  An error status naming a variable binding by its error index drops that variable
+ *  binding and resends the rest of the partition.  Other error statuses and timeouts resend the
+ *  partition with an exponential backoff up to config.partition_retries times.  Once the retries
+ *  are exhausted, an error status drops the partition and a timeout drops all the work of the
+ *  session.
+ *
  *  @param op    Op code of this response.
  *  @param sp    Pointer to this result's net-snmp session.
  *  @param reqid SNMP request ID.
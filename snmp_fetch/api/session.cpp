@@ -13,23 +13,80 @@ void *
 create_netsnmp_session(
     host_t &host,
     std::vector<SnmpError> &errors,
-    SnmpConfig &config
+    SnmpConfig &config,
+    shared_socket *socket
 ) {
 
+  // Resolve the host name through the cache; net-snmp copies the peername when opening.  A
+  // transport on a shared socket is always opened on the numeric address.
+  std::string peername = (config.dns_cache_ttl || socket != NULL)
+    ? resolve_peername(
+        global_resolution_cache(), std::get<1>(host), config.dns_cache_ttl * 1000000
+    )
+    : std::get<1>(host);
+
   // init a net-snmp session template
   netsnmp_session session;
   snmp_sess_init(&session);
 
   // configure the session template
-  session.peername = strdup(std::get<1>(host).c_str());
-  session.version = SNMP_VERSION_2c;
+  session.peername = peername.data();
   session.retries = (config.retries >= 0) ? config.retries : -1;
   session.timeout = (config.timeout >= 0) ? config.timeout * ONE_SEC : -1;
-  session.community = (u_char *)std::get<2>(host).c_str();
-  session.community_len = strlen((char *)session.community);
 
-  // open the session
-  void *sp = snmp_sess_open(&session);
+  // configure the security of the session template; SNMPv2c with a community or SNMPv3
+  auto credentials = std::get_if<UsmCredentials>(&std::get<2>(host));
+  usm_keys keys;
+  if (credentials == NULL) {
+    session.version = SNMP_VERSION_2c;
+    session.community = (u_char *)std::get<std::string>(std::get<2>(host)).c_str();
+    session.community_len = strlen((char *)session.community);
+  } else if (!configure_usm_session(
+        session, *credentials, std::get<1>(host), global_usm_cache(),
+        config.engine_cache_ttl * 1000000, keys
+  )) {
+    errors.push_back(SnmpError(
+          SESSION_ERROR,
+          host,
+          {},
+          {},
+          {},
+          {},
+          {},
+          "Failed to derive the SNMPv3 keys"
+    ));
+    return NULL;
+  }
+
+  // open the session on its own socket
+  void *sp = NULL;
+  if (socket == NULL) {
+    // net-snmp adds SNMPv3 users to its user list as the session opens
+    std::unique_lock<std::mutex> lock(global_usm_cache().open_mutex, std::defer_lock);
+    if (credentials != NULL)
+      lock.lock();
+    sp = snmp_sess_open(&session);
+  }
+  // else open the session on a transport through the shared socket
+  else {
+    netsnmp_transport *transport = open_shared_transport(*socket, peername);
+    // only numeric UDP peernames can be reached through the shared socket
+    if (transport == NULL) {
+      errors.push_back(SnmpError(
+            SESSION_ERROR,
+            host,
+            {},
+            {},
+            {},
+            {},
+            {},
+            "Failed to open a transport on the shared socket for " + peername
+      ));
+      return NULL;
+    }
+    // net-snmp owns the transport once added and closes it if the session fails to open
+    sp = snmp_sess_add(&session, transport, NULL, NULL);
+  }
 
   // log the error upon session creation failure
   if (sp == NULL) {
@@ -62,14 +119,25 @@ void create_session(
     int pdu_type,
     host_t &host,
     std::vector<var_bind_t> &var_binds,
-    std::vector<std::vector<uint8_t>> &results,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
     std::vector<SnmpError> &errors,
     SnmpConfig &config,
-    std::list<async_state> &sessions
+    std::list<async_state> &sessions,
+    shared_socket *socket
 ) {
 
-    // create the net-snmp session
-    void *session = create_netsnmp_session(host, errors, config);
+    // net-snmp discovers the engine of an SNMPv3 session on the socket of the session
+    if (std::holds_alternative<UsmCredentials>(std::get<2>(host)))
+      socket = NULL;
+
+    // take an idle session from the pool else create the net-snmp session
+    void *session = NULL;
+    if (config.session_pool && socket == NULL)
+      session = acquire_session(global_session_pool(), session_key(host, config), config);
+    if (session == NULL)
+      session = create_netsnmp_session(host, errors, config, socket);
 
     // If session creation failed, do not add a state wrapped session.  create_session is
     // responsible for populating the errors list.  The caller is responsible for discarding the
@@ -77,21 +145,36 @@ void create_session(
     if (session == NULL)
       return;
 
-    // Create a vector of vectors of variable bindings to fetch.  These vectors represent the
+    // Create a list of partitions of variable bindings to fetch.  These partitions represent the
     // partitioning of variable bindings by config.max_var_binds_per_pdu.  These variable bindings
     // define the work needed on the session and are seeded with the var_binds from the caller.
-    std::vector<std::vector<oid_t>> next_var_binds;
-    // iterate through the request var_binds and populate each vector
-    for(auto &&vb: var_binds) {
-      // if the base vector is empty or max_var_binds_per_pdu has been reached in the last vector,
-      // add another partition.
+    std::list<partition_t> next_var_binds;
+    // iterate through the request var_binds and populate each partition
+    for (size_t i = 0; i < var_binds.size(); ++i) {
+      // if there are no partitions or max_var_binds_per_pdu has been reached in the last
+      // partition, add another partition starting at this var_bind
       if (
           next_var_binds.empty() ||
-          next_var_binds.back().size() == config.max_var_binds_per_pdu
+          next_var_binds.back().var_binds.size() == config.max_var_binds_per_pdu
       )
-        next_var_binds.push_back(std::vector<oid_t>());
+        next_var_binds.push_back(partition_t { i, std::vector<oid_t>(), 0, 0, 0, 0 });
       // add the var_bind to the last partition
-      next_var_binds.back().push_back(std::get<0>(vb));
+      next_var_binds.back().var_binds.push_back(std::get<0>(var_binds[i]));
+    }
+
+    // start adaptive sessions from the max-repetitions the host last settled on
+    size_t bulk_repetitions = config.max_bulk_repetitions;
+    if (config.adaptive_bulk_repetitions) {
+      size_t max_repetitions = std::max<size_t>(config.max_bulk_repetitions, 1);
+      size_t min_repetitions = std::clamp<size_t>(
+          config.min_bulk_repetitions, 1, max_repetitions
+      );
+      bulk_repetitions = min_repetitions;
+      repetitions_cache &cache = global_repetitions_cache();
+      std::lock_guard<std::mutex> lock(cache.mutex);
+      auto cached = cache.hosts.find(std::get<1>(host));
+      if (cached != cache.hosts.end())
+        bulk_repetitions = std::clamp(cached->second, min_repetitions, max_repetitions);
     }
 
     // create a state wrapped session for net-snmp callbacks
@@ -101,14 +184,109 @@ void create_session(
       pdu_type,
       host,
       &var_binds,
+      &root_index,
+      &index_specs,
       next_var_binds,  // copy on assignment
+      {},
       &results,
       &errors,
-      &config
+      &config,
+      0,
+      {},
+      false,
+      bulk_repetitions,
+      init_token_bucket(config.max_pdus_per_second_per_host)
     };
 
     // append the state wrapped session to the sessions list
-    sessions.push_back(st);
+    sessions.push_back(std::move(st));
+
+    // the shared socket demultiplexes responses to the state wrapped session
+    if (socket != NULL)
+      bind_shared_transport(sessions.back());
+
+}
+
+
+/**
+ *  grow_bulk_repetitions
+ */
+void grow_bulk_repetitions(
+    async_state &st,
+    uint64_t elapsed,
+    bool complete
+) {
+
+  if (!st.config->adaptive_bulk_repetitions || !complete)
+    return;
+
+  // a slow response is left to shrink the repetitions if it times out
+  netsnmp_session *sp = snmp_sess_session(st.session);
+  if (sp == NULL || elapsed * SNMP_FETCH__FAST_RESPONSE_DIVISOR >= (uint64_t)sp->timeout)
+    return;
+
+  if (st.bulk_repetitions < st.config->max_bulk_repetitions)
+    st.bulk_repetitions = std::min(st.bulk_repetitions * 2, st.config->max_bulk_repetitions);
+
+}
+
+
+/**
+ *  shrink_bulk_repetitions
+ */
+bool shrink_bulk_repetitions(
+    async_state &st
+) {
+
+  size_t min_repetitions = std::max<size_t>(st.config->min_bulk_repetitions, 1);
+  if (!st.config->adaptive_bulk_repetitions || st.bulk_repetitions <= min_repetitions)
+    return false;
+
+  st.bulk_repetitions = std::max(st.bulk_repetitions / 2, min_repetitions);
+  return true;
+
+}
+
+
+/**
+ *  close_session
+ */
+void close_session(
+    async_state &st,
+    int epoll_fd
+) {
+
+  // Remove the socket from the event loop; a pooled session may be reused on another event loop.
+  // A shared socket is registered once by the event loop and outlives its sessions.
+  netsnmp_transport *transport = snmp_sess_transport(st.session);
+  bool shared = is_shared_transport(transport);
+  if (epoll_fd >= 0 && transport != NULL && transport->sock >= 0 && !shared)
+    epoll_ctl(epoll_fd, EPOLL_CTL_DEL, transport->sock, NULL);
+
+  // cache the engine and its boots and time for the next session to the host
+  if (
+      st.config->engine_cache_ttl &&
+      std::holds_alternative<UsmCredentials>(std::get<2>(st.host))
+  )
+    cache_engine(
+        global_usm_cache(), std::get<1>(st.host), st.session,
+        st.config->engine_cache_ttl * 1000000
+    );
+
+  // record the max-repetitions the session settled on for the next session to the host
+  if (st.config->adaptive_bulk_repetitions && st.pdu_type == SNMP_MSG_GETBULK) {
+    repetitions_cache &cache = global_repetitions_cache();
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    cache.hosts[std::get<1>(st.host)] = st.bulk_repetitions;
+  }
+
+  // return the session to the pool if net-snmp will not call back into this state
+  if (st.config->session_pool && !st.broken && !shared)
+    release_session(
+        global_session_pool(), session_key(st.host, *st.config), st.session, *st.config
+    );
+  else
+    snmp_sess_close(st.session);
 
 }
 
@@ -116,53 +294,68 @@ void create_session(
 /**
  *  close_completed_sessions
  */
-void close_completed_sessions(
-    std::list<async_state> &sessions
+size_t close_completed_sessions(
+    std::list<async_state> &sessions,
+    std::vector<result_buffer> &results,
+    int epoll_fd
 ) {
 
+  // number of sessions closed
+  size_t closed = 0;
+
   // Iterate through all the active sessions. Iterator advancement is controlled manually as the
   // list will be modified in-place during iteration.
   for (auto st = sessions.begin(); st != sessions.end();) {
     auto &session = *st; // dereference the iterator
 
-    // do not process non-idle sessions
-    if (session.async_status == ASYNC_IDLE) {
-      // check if there are any next_var_bind partitions (potentially defined work)
-      if (!session.next_var_binds.empty()) {
-        // if there is potential work, verify all var_binds are not empty in the current partition
-        if (
+    // remove the partitions not in flight where all var_binds are empty; the work is complete
+    session.next_var_binds.remove_if([](auto &partition) {
+        return (
+            !partition.reqid &&
             std::all_of(
-              session.next_var_binds.front().begin(),
-              session.next_var_binds.front().end(),
+              partition.var_binds.begin(),
+              partition.var_binds.end(),
               [](auto &vb) { return vb.empty(); }
             )
-        )
-          // If all var_binds are empty, the work is complete, so remove the partition.
-          session.next_var_binds.erase(session.next_var_binds.begin());
-        // otherwise, rotate the partitions to interleave var_binds from other partitions
-        else
-          std::rotate(
-              session.next_var_binds.begin(),
-              session.next_var_binds.begin() + 1,
-              session.next_var_binds.end()
-          );
-      }
-
-      // if there are no partitions left, close the session
-      if (session.next_var_binds.empty()) {
-        // close the net-snmp session
-        snmp_sess_close(session.session);
-        // remove the state wrapped session from active sessions
-        st = sessions.erase(st);
-        // next session is now on this iterator after erasing it; do not incrememnt the iterator
-        continue;
-      }
+        );
+    });
+
+    // if the session is idle and there are no partitions left, close the session
+    if (session.async_status == ASYNC_IDLE && session.next_var_binds.empty()) {
+      // close the net-snmp session or return it to the pool
+      close_session(session, epoll_fd);
+      // move the results buffered for the host into the results; a failure to grow the results
+      // is logged and drops the rest of the results of the host
+      if (session.results != &results)
+        try {
+          for (size_t i = 0; i < results.size(); ++i)
+            results[i].append(std::move((*session.results)[i]));
+        } catch (const std::exception &e) {
+          auto error = dynamic_cast<const std::system_error *>(&e);
+          session.errors->push_back(SnmpError(
+                CREATE_RESPONSE_PDU_ERROR,
+                session.host,
+                error ? error->code().value() : ENOMEM,
+                {},
+                {},
+                {},
+                {},
+                "Failed to grow the results: " + std::string(e.what())
+          ));
+        }
+      // remove the state wrapped session from active sessions
+      st = sessions.erase(st);
+      ++closed;
+      // next session is now on this iterator after erasing it; do not incrememnt the iterator
+      continue;
     }
 
     // increment the iterator if no session was closed this iteration
     ++st;
   }
 
+  return closed;
+
 }
 
 }
@@ -6,7 +6,11 @@
 #define SNMP_FETCH__CAPI_HPP
 
 #include <list>
+#include <sys/epoll.h>
 
+#include "pool.hpp"
+#include "transport.hpp"
+#include "usm.hpp"
 #include "types.hpp"
 
 extern "C" {
@@ -16,13 +20,23 @@ extern "C" {
 
 namespace snmp_fetch {
 
+// a response is fast when it arrives within this fraction of the session timeout
+#define SNMP_FETCH__FAST_RESPONSE_DIVISOR 4
+
 /**
  *  create_netsnmp_session - Create a net-snmp session using the single session API for async
- *  requests.
+ *  requests.  When config.dns_cache_ttl is set, the host name is resolved through the resolution
+ *  cache of the process.  When a shared socket is given, the session is opened on a transport
+ *  through the shared socket instead of its own socket.
+ *
+ *  Hosts with SNMPv3 credentials derive their keys through the SNMPv3 cache of the process.  When
+ *  config.engine_cache_ttl is set and the engine of the host is cached, the session is opened
+ *  without discovering the engine; net-snmp otherwise discovers it synchronously on open.
  *
  *  @param host    Reference to the host for collection.
  *  @param errors  Reference to the errors collected.
  *  @param config  Reference to the configuration.
+ *  @param socket  Pointer to the shared socket of the event loop or NULL.
  *
  *  @return        Returns a void* to the net-snmp session object or NULL on failure.
  */
@@ -30,49 +44,116 @@ void *
 create_netsnmp_session(
     host_t &host,
     std::vector<SnmpError> &errors,
-    SnmpConfig &config
+    SnmpConfig &config,
+    shared_socket *socket = NULL
 );
 
 
 /**
- *  create_session - Create a state wrapped net-snmp sessions for callbacks.
+ *  create_session - Create a state wrapped net-snmp sessions for callbacks.  When
+ *  config.session_pool is set, an idle session is taken from the session pool of the process
+ *  before a new session is created.  Sessions on a shared socket are never pooled.  SNMPv3
+ *  sessions are always opened on their own socket as net-snmp discovers the engine on it.
  *
- *  @param pdu_type  PDU type of this request.
- *  @param host      Reference to the host for collection.
- *  @param var_binds Reference to the variable bindings for collection.
- *  @param results   Reference to the results collected.
- *  @param errors    Reference to the errors collected.
- *  @param config    Reference to the configuration.
- *  @param sessions  Reference to a list of state wrapped net-snmp sessions.  This function
- *                   appends to this list.
+ *  When config.adaptive_bulk_repetitions is set, the session starts from the max-repetitions the
+ *  host last settled on, else from config.min_bulk_repetitions.
+ *
+ *  @param pdu_type   PDU type of this request.
+ *  @param host       Reference to the host for collection.
+ *  @param var_binds  Reference to the variable bindings for collection.
+ *  @param root_index Reference to the positions of the variable bindings sorted by root oid.
+ *  @param index_specs Reference to the index spec of each variable binding; empty if none.
+ *  @param results    Reference to the results collected.
+ *  @param errors     Reference to the errors collected.
+ *  @param config     Reference to the configuration.
+ *  @param sessions   Reference to a list of state wrapped net-snmp sessions.  This function
+ *                    appends to this list.
+ *  @param socket     Pointer to the shared socket of the event loop or NULL.
  */
 void create_session(
     int pdu_type,
     host_t &host,
     std::vector<var_bind_t> &var_binds,
-    std::vector<std::vector<uint8_t>> &results,
+    root_index_t &root_index,
+    std::vector<index_spec_t> &index_specs,
+    std::vector<result_buffer> &results,
     std::vector<SnmpError> &errors,
     SnmpConfig &config,
-    std::list<async_state> &sessions
+    std::list<async_state> &sessions,
+    shared_socket *socket = NULL
+);
+
+
+/**
+ *  grow_bulk_repetitions - Double the max-repetitions of a session up to
+ *  config.max_bulk_repetitions after a fast response which returned every repetition requested.
+ *  Does nothing unless config.adaptive_bulk_repetitions is set.
+ *
+ *  @param session  Reference to the state wrapped net-snmp session.
+ *  @param elapsed  Microseconds between sending the request PDU and receiving the response.
+ *  @param complete True if the response held every repetition requested.
+ */
+void grow_bulk_repetitions(
+    async_state &session,
+    uint64_t elapsed,
+    bool complete
+);
+
+
+/**
+ *  shrink_bulk_repetitions - Halve the max-repetitions of a session down to
+ *  config.min_bulk_repetitions after a tooBig response, a retry or a timeout.  Does nothing
+ *  unless config.adaptive_bulk_repetitions is set.
+ *
+ *  @param session Reference to the state wrapped net-snmp session.
+ *  @return        True if the max-repetitions shrank.
+ */
+bool shrink_bulk_repetitions(
+    async_state &session
+);
+
+
+/**
+ *  close_session - Close a state wrapped net-snmp session.  The socket of the session is removed
+ *  from the event loop first; a pooled session outlives the state its event data points at.
+ *  When config.session_pool is set and the session is not broken, the session is returned to the
+ *  session pool of the process instead of being closed.  A shared socket stays registered with
+ *  the event loop.  When config.engine_cache_ttl is set, the engine of an SNMPv3 session is
+ *  cached first.  When config.adaptive_bulk_repetitions is set, the max-repetitions the session
+ *  settled on is recorded for the host.
+ *
+ *  @param session  Reference to the state wrapped net-snmp session.  It MUST be idle.
+ *  @param epoll_fd Epoll instance of the event loop the session is registered with or -1.
+ */
+void close_session(
+    async_state &session,
+    int epoll_fd
 );
 
 
 /**
  *  close_completed_sessions - Close completed sessions with no remaining work.  Remaining work is
- *  is defined by the contents of next_var_binds.  Recall next_var_binds is a vector of vectors
- *  of var_binds.  The root vector is the partitions based off config.max_var_binds_per_pdu.  The
- *  next vector is the var_binds in that partition.  The size of each partition must not change,
- *  even if work is completed.  The modulus of the request var_binds is used for locating a vector
- *  in next_var_binds when processing results.  To indicate there is no more work, the var_bind
- *  in next_var_bind (also a vector), should be emptied.  When all var_binds in the partition are
- *  empty, it is safe to remove the partition.  A session can be closed when there are no remaining
- *  partition.
+ *  is defined by the contents of next_var_binds.  Recall next_var_binds is a list of partitions
+ *  based off config.max_var_binds_per_pdu.  Each partition holds the var_binds in that partition
+ *  and the offset of the first var_bind in the request.  The size of each partition must not
+ *  change, even if work is completed.  The offset is used for locating a var_bind in the partition
+ *  when processing results.  To indicate there is no more work, the var_bind in the partition
+ *  (also a vector), should be emptied.  When all var_binds in the partition are empty and no
+ *  request PDU is in flight for it, it is safe to remove the partition.  A session can be closed
+ *  when it is idle and there are no remaining partitions.
+ *
+ *  Sessions buffering their own host results append them to the results when closed.
  *
  *  @param sessions Reference to a list of state wrapped net-snmp sessions.  This function removes
  *                  completed sessions from this list.
+ *  @param results  Reference to the results collected.
+ *  @param epoll_fd Epoll instance of the event loop the sessions are registered with or -1.
+ *  @return         Number of sessions closed.
  */
-void close_completed_sessions(
-    std::list<async_state> &sessions
+size_t close_completed_sessions(
+    std::list<async_state> &sessions,
+    std::vector<result_buffer> &results,
+    int epoll_fd = -1
 );
 
 }
@@ -0,0 +1,482 @@
+/**
+ *  transport.cpp
+ */
+
+#include <iterator>
+#include <unistd.h>
+
+#include "pool.hpp"
+#include "transport.hpp"
+
+namespace snmp_fetch {
+
+// transport domain of the shared transports; snmpUDPDomain from SNMPv2-TM
+static const oid shared_udp_domain[] = { 1, 3, 6, 1, 6, 1, 1 };
+
+
+/**
+ *  address_key - Get the key of a peer address.  Only the parts of the address which identify
+ *  the peer are used; IPv4 peers on a dual-stack socket have IPv4-mapped IPv6 addresses.
+ *
+ *  @param address Pointer to the socket address.
+ *  @return        Key of the address.
+ */
+static std::string
+address_key(
+    const struct sockaddr *address
+) {
+
+  if (address->sa_family == AF_INET6) {
+    auto in6 = (const struct sockaddr_in6 *)address;
+    std::string key((const char *)&in6->sin6_addr, sizeof(in6->sin6_addr));
+    key.append((const char *)&in6->sin6_port, sizeof(in6->sin6_port));
+    key.append((const char *)&in6->sin6_scope_id, sizeof(in6->sin6_scope_id));
+    return key;
+  }
+
+  auto in = (const struct sockaddr_in *)address;
+  std::string key((const char *)&in->sin_addr, sizeof(in->sin_addr));
+  key.append((const char *)&in->sin_port, sizeof(in->sin_port));
+  return key;
+
+}
+
+
+/**
+ *  shared_recv - Receive the next datagram queued on the peer of a shared transport.
+ */
+static int
+shared_recv(
+    netsnmp_transport *transport,
+    void *buf,
+    int size,
+    void **opaque,
+    int *olength
+) {
+
+  // the source address is not passed back to net-snmp
+  *opaque = NULL;
+  *olength = 0;
+
+  auto peer = (shared_peer *)transport->data;
+  if (peer == NULL || peer->datagrams.empty()) {
+    errno = EAGAIN;
+    return -1;
+  }
+
+  // a datagram larger than the buffer is truncated as recvfrom would
+  std::string datagram = std::move(peer->datagrams.front());
+  peer->datagrams.pop_front();
+  int length = std::min<int>(size, datagram.size());
+  memcpy(buf, datagram.data(), length);
+
+  return length;
+
+}
+
+
+/**
+ *  shared_send - Send a datagram to the peer of a shared transport.
+ */
+static int
+shared_send(
+    netsnmp_transport *transport,
+    void *buf,
+    int size,
+    void **opaque,
+    int *olength
+) {
+
+  auto peer = (shared_peer *)transport->data;
+  if (peer == NULL) {
+    errno = EBADF;
+    return -1;
+  }
+
+  // The socket is nonblocking and shared by every session of the event loop.  When the send
+  // buffer is full, queue the datagram until the event loop sees the socket writable rather than
+  // blocking the event loop or failing the request.  Datagrams already queued are sent first.
+  if (peer->socket->outgoing.empty()) {
+    ssize_t sent;
+    while ((sent = sendto(
+            peer->socket->sock, buf, size, 0, (struct sockaddr *)&peer->address,
+            peer->address_length
+    )) < 0 && errno == EINTR);
+    if (sent >= 0 || (errno != EAGAIN && errno != EWOULDBLOCK))
+      return (int)sent;
+  }
+  peer->socket->outgoing.emplace_back(
+      peer->address, peer->address_length, std::string((const char *)buf, size)
+  );
+
+  return size;
+
+}
+
+
+/**
+ *  shared_close - Unregister the peer of a shared transport.  The shared socket stays open.
+ */
+static int
+shared_close(
+    netsnmp_transport *transport
+) {
+
+  auto peer = (shared_peer *)transport->data;
+  if (peer != NULL) {
+    auto peers = peer->socket->peers.equal_range(peer->key);
+    for (auto it = peers.first; it != peers.second; ++it)
+      if (it->second == peer) {
+        peer->socket->peers.erase(it);
+        break;
+      }
+    delete peer;
+  }
+
+  // net-snmp frees the protocol data with the transport; it is not malloc'd
+  transport->data = NULL;
+  transport->data_length = 0;
+  transport->sock = -1;
+
+  return 0;
+
+}
+
+
+/**
+ *  shared_fmtaddr - Format the peer address of a shared transport.
+ */
+static char *
+shared_fmtaddr(
+    netsnmp_transport *transport,
+    void *data,
+    int length
+) {
+
+  auto peer = (shared_peer *)transport->data;
+  char host[INET6_ADDRSTRLEN];
+  char port[8];
+  if (
+      peer == NULL ||
+      getnameinfo(
+        (struct sockaddr *)&peer->address, peer->address_length, host, sizeof(host), port,
+        sizeof(port), NI_NUMERICHOST | NI_NUMERICSERV
+      ) != 0
+  )
+    return strdup("UDP: unknown");
+
+  return strdup(("UDP: [" + std::string(host) + "]:" + std::string(port)).c_str());
+
+}
+
+
+/**
+ *  open_shared_socket
+ */
+bool
+open_shared_socket(
+    shared_socket &socket
+) {
+
+  // prefer a dual-stack socket; fall back to IPv4 where IPv6 is not available
+  socket.family = AF_INET6;
+  socket.sock = ::socket(AF_INET6, SOCK_DGRAM | SOCK_NONBLOCK | SOCK_CLOEXEC, 0);
+  if (socket.sock >= 0) {
+    int v6only = 0;
+    setsockopt(socket.sock, IPPROTO_IPV6, IPV6_V6ONLY, &v6only, sizeof(v6only));
+  } else {
+    socket.family = AF_INET;
+    socket.sock = ::socket(AF_INET, SOCK_DGRAM | SOCK_NONBLOCK | SOCK_CLOEXEC, 0);
+  }
+  if (socket.sock < 0)
+    return false;
+
+  // Every response of the event loop queues on this socket.  The kernel caps the buffers at
+  // net.core.rmem_max and net.core.wmem_max; a smaller buffer is not an error.
+  int buffer_size = SNMP_FETCH__SHARED_SOCKET_BUFFER_SIZE;
+  setsockopt(socket.sock, SOL_SOCKET, SO_RCVBUF, &buffer_size, sizeof(buffer_size));
+  setsockopt(socket.sock, SOL_SOCKET, SO_SNDBUF, &buffer_size, sizeof(buffer_size));
+
+  return true;
+
+}
+
+
+/**
+ *  close_shared_socket
+ */
+void
+close_shared_socket(
+    shared_socket &socket
+) {
+  if (socket.sock >= 0)
+    close(socket.sock);
+  socket.sock = -1;
+  socket.peers.clear();
+  socket.outgoing.clear();
+}
+
+
+/**
+ *  peername_address
+ */
+bool
+peername_address(
+    const std::string &peername,
+    struct sockaddr_storage &address,
+    socklen_t &address_length
+) {
+
+  std::string domain;
+  std::string host;
+  std::string port;
+  if (!split_peername(peername, domain, host, port))
+    return false;
+
+  // only numeric addresses are parsed; host names are resolved by resolve_peername
+  struct addrinfo hints;
+  memset(&hints, 0, sizeof(hints));
+  hints.ai_family = AF_UNSPEC;
+  hints.ai_socktype = SOCK_DGRAM;
+  hints.ai_flags = AI_NUMERICHOST | AI_NUMERICSERV;
+
+  struct addrinfo *addresses = NULL;
+  if (
+      getaddrinfo(host.c_str(), port.c_str(), &hints, &addresses) != 0 ||
+      addresses == NULL
+  )
+    return false;
+
+  memcpy(&address, addresses->ai_addr, addresses->ai_addrlen);
+  address_length = addresses->ai_addrlen;
+  freeaddrinfo(addresses);
+
+  return true;
+
+}
+
+
+/**
+ *  open_shared_transport
+ */
+netsnmp_transport *
+open_shared_transport(
+    shared_socket &socket,
+    const std::string &peername
+) {
+
+  struct sockaddr_storage address;
+  socklen_t address_length;
+  if (!peername_address(peername, address, address_length))
+    return NULL;
+
+  // an IPv4 socket cannot reach an IPv6 peer
+  if (socket.family == AF_INET && address.ss_family == AF_INET6)
+    return NULL;
+
+  // address an IPv4 peer on a dual-stack socket by its IPv4-mapped IPv6 address
+  if (socket.family == AF_INET6 && address.ss_family == AF_INET) {
+    struct sockaddr_in in;
+    memcpy(&in, &address, sizeof(in));
+    struct sockaddr_in6 in6;
+    memset(&in6, 0, sizeof(in6));
+    in6.sin6_family = AF_INET6;
+    in6.sin6_port = in.sin_port;
+    in6.sin6_addr.s6_addr[10] = 0xff;
+    in6.sin6_addr.s6_addr[11] = 0xff;
+    memcpy(&in6.sin6_addr.s6_addr[12], &in.sin_addr, sizeof(in.sin_addr));
+    memcpy(&address, &in6, sizeof(in6));
+    address_length = sizeof(in6);
+  }
+
+  netsnmp_transport *transport = SNMP_MALLOC_TYPEDEF(netsnmp_transport);
+  if (transport == NULL)
+    return NULL;
+
+  auto peer = new shared_peer {
+    &socket,
+    address,
+    address_length,
+    address_key((struct sockaddr *)&address),
+    {},
+    NULL
+  };
+
+  // the transport reads and writes the shared socket through the callbacks
+  transport->domain = shared_udp_domain;
+  transport->domain_length = sizeof(shared_udp_domain) / sizeof(oid);
+  transport->sock = socket.sock;
+  transport->data = peer;
+  transport->data_length = 0;
+  transport->msgMaxSize = SNMP_FETCH__MAX_DATAGRAM_SIZE - 8 - (
+      (socket.family == AF_INET6) ? 40 : 20
+  );
+  transport->f_recv = shared_recv;
+  transport->f_send = shared_send;
+  transport->f_close = shared_close;
+  transport->f_fmtaddr = shared_fmtaddr;
+
+  socket.peers.emplace(peer->key, peer);
+
+  return transport;
+
+}
+
+
+/**
+ *  is_shared_transport
+ */
+bool
+is_shared_transport(
+    netsnmp_transport *transport
+) {
+  return transport != NULL && transport->f_recv == shared_recv;
+}
+
+
+/**
+ *  bind_shared_transport
+ */
+void
+bind_shared_transport(
+    async_state &st
+) {
+  netsnmp_transport *transport = snmp_sess_transport(st.session);
+  if (is_shared_transport(transport) && transport->data != NULL)
+    ((shared_peer *)transport->data)->state = &st;
+}
+
+
+/**
+ *  response_reqid
+ */
+int
+response_reqid(
+    const std::string &datagram
+) {
+
+  // the net-snmp parsers do not modify the data
+  u_char *data = (u_char *)const_cast<char *>(datagram.data());
+  size_t length = datagram.size();
+  u_char type;
+
+  // Message ::= SEQUENCE { version INTEGER, community OCTET STRING, data PDUs }
+  data = asn_parse_sequence(
+      data, &length, &type, (u_char)(ASN_SEQUENCE | ASN_CONSTRUCTOR), "message"
+  );
+  if (data == NULL)
+    return 0;
+
+  // the request-id of an SNMPv3 message is in the scoped PDU which may be encrypted
+  long version;
+  data = asn_parse_int(data, &length, &type, &version, sizeof(version));
+  if (data == NULL || version == SNMP_VERSION_3)
+    return 0;
+
+  std::vector<u_char> community(datagram.size());
+  size_t community_length = community.size();
+  data = asn_parse_string(data, &length, &type, community.data(), &community_length);
+  if (data == NULL)
+    return 0;
+
+  // PDU ::= [tag] IMPLICIT SEQUENCE { request-id INTEGER, ... }
+  data = asn_parse_header(data, &length, &type);
+  if (data == NULL)
+    return 0;
+
+  long reqid;
+  data = asn_parse_int(data, &length, &type, &reqid, sizeof(reqid));
+
+  return (data == NULL) ? 0 : (int)reqid;
+
+}
+
+
+/**
+ *  flush_shared_socket
+ */
+void
+flush_shared_socket(
+    shared_socket &socket
+) {
+  while (!socket.outgoing.empty()) {
+    auto &[address, address_length, datagram] = socket.outgoing.front();
+    if (sendto(
+            socket.sock, datagram.data(), datagram.size(), 0, (struct sockaddr *)&address,
+            address_length
+    ) < 0) {
+      if (errno == EINTR)
+        continue;
+      if (errno == EAGAIN || errno == EWOULDBLOCK)
+        return;
+    }
+    socket.outgoing.pop_front();
+  }
+}
+
+
+/**
+ *  read_shared_socket
+ */
+void
+read_shared_socket(
+    shared_socket &socket,
+    std::vector<async_state *> &ready
+) {
+
+  // queue a datagram on a peer; the session is ready the first time a datagram is queued
+  auto queue = [&](shared_peer *peer, const std::string &datagram) {
+    if (peer->state == NULL)
+      return;
+    if (peer->datagrams.empty())
+      ready.push_back(peer->state);
+    peer->datagrams.push_back(datagram);
+  };
+
+  std::vector<char> buffer(SNMP_FETCH__MAX_DATAGRAM_SIZE);
+
+  // Read until the socket would block.  The reads per event are capped so one busy socket does
+  // not starve the timers; the socket stays readable for the next wait.
+  for (size_t i = 0; i < SNMP_FETCH__MAX_SHARED_SOCKET_READS; ++i) {
+    struct sockaddr_storage from;
+    socklen_t from_length = sizeof(from);
+    ssize_t length = recvfrom(
+        socket.sock, buffer.data(), buffer.size(), MSG_DONTWAIT, (struct sockaddr *)&from,
+        &from_length
+    );
+    if (length < 0) {
+      if (errno == EINTR)
+        continue;
+      break;
+    }
+
+    // drop datagrams from unknown peers, e.g. late responses to a closed session
+    auto peers = socket.peers.equal_range(address_key((struct sockaddr *)&from));
+    if (peers.first == peers.second)
+      continue;
+
+    std::string datagram(buffer.data(), length);
+
+    // a single session at the address receives every datagram from it
+    if (std::next(peers.first) == peers.second) {
+      queue(peers.first->second, datagram);
+      continue;
+    }
+
+    // Multiple sessions to the same agent are told apart by the request-id.  A message that
+    // cannot be parsed is queued on each of them; net-snmp discards responses it did not
+    // request.
+    int reqid = response_reqid(datagram);
+    for (auto it = peers.first; it != peers.second; ++it) {
+      auto state = it->second->state;
+      if (!reqid || (state != NULL && state->inflight.count(reqid))) {
+        queue(it->second, datagram);
+        if (reqid)
+          break;
+      }
+    }
+  }
+
+}
+
+}
@@ -0,0 +1,195 @@
+/**
+ *  transport.hpp - UDP transport shared by the sessions of an event loop.
+ */
+
+#ifndef SNMP_FETCH__TRANSPORT_HPP
+#define SNMP_FETCH__TRANSPORT_HPP
+
+#include <deque>
+#include <tuple>
+#include <unordered_map>
+#include <netinet/in.h>
+#include <sys/socket.h>
+
+#include "types.hpp"
+
+extern "C" {
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+}
+
+namespace snmp_fetch {
+
+// maximum size of a UDP datagram
+#define SNMP_FETCH__MAX_DATAGRAM_SIZE 65535
+
+// receive and send buffer size requested for a shared socket
+#define SNMP_FETCH__SHARED_SOCKET_BUFFER_SIZE (8 * 1024 * 1024)
+
+// maximum number of datagrams read from a shared socket on a single readiness event
+#define SNMP_FETCH__MAX_SHARED_SOCKET_READS 1024
+
+
+struct shared_peer;
+
+
+/**
+ *  shared_socket - A nonblocking UDP socket every session of an event loop may send and receive
+ *  through.
+ *
+ *  The socket is dual-stack where IPv6 is available; IPv4 peers are addressed as IPv4-mapped IPv6
+ *  addresses.  Peers are keyed by their address so received datagrams can be demultiplexed back
+ *  to the session which sent the request.
+ *
+ *  Datagrams sent while the send buffer is full are queued in outgoing, in order, with the
+ *  address of their peer until the socket is writable.  Events is the epoll interest of the
+ *  socket in the event loop; it includes EPOLLOUT while datagrams are queued.
+ */
+struct shared_socket {
+  int sock;
+  int family;
+  std::unordered_multimap<std::string, shared_peer *> peers;
+  std::deque<std::tuple<struct sockaddr_storage, socklen_t, std::string>> outgoing;
+  uint32_t events;
+};
+
+
+/**
+ *  shared_peer - Protocol data of a net-snmp transport on a shared socket.  Datagrams received
+ *  for the peer are queued until net-snmp reads the session.
+ */
+struct shared_peer {
+  shared_socket *socket;
+  struct sockaddr_storage address;
+  socklen_t address_length;
+  std::string key;
+  std::deque<std::string> datagrams;
+  async_state *state;
+};
+
+
+/**
+ *  open_shared_socket - Open a shared socket.
+ *
+ *  @param socket Reference to the shared socket to open.
+ *  @return       Returns false and sets errno on failure.
+ */
+bool
+open_shared_socket(
+    shared_socket &socket
+);
+
+
+/**
+ *  close_shared_socket - Close a shared socket.  Every transport on the socket MUST be closed.
+ *
+ *  @param socket Reference to the shared socket to close.
+ */
+void
+close_shared_socket(
+    shared_socket &socket
+);
+
+
+/**
+ *  peername_address - Parse a numeric UDP peername, e.g. "udp:192.0.2.1:1161" or
+ *  "udp6:[2001:db8::1]:161", into a socket address.
+ *
+ *  @param peername       Reference to the numeric peername.
+ *  @param address        Reference to the socket address to fill.
+ *  @param address_length Reference to the length of the socket address to fill.
+ *  @return               Returns false if the peername is not a numeric UDP peername.
+ */
+bool
+peername_address(
+    const std::string &peername,
+    struct sockaddr_storage &address,
+    socklen_t &address_length
+);
+
+
+/**
+ *  open_shared_transport - Create a net-snmp transport which sends to and receives from a single
+ *  peer through a shared socket.  The transport is owned by the net-snmp session it is added to;
+ *  closing the session unregisters the peer and leaves the shared socket open.
+ *
+ *  @param socket   Reference to the shared socket.
+ *  @param peername Reference to the numeric peername of the host.
+ *  @return         Pointer to the transport or NULL if the peername is not a numeric UDP
+ *                  peername the socket can reach.
+ */
+netsnmp_transport *
+open_shared_transport(
+    shared_socket &socket,
+    const std::string &peername
+);
+
+
+/**
+ *  is_shared_transport - Test if a net-snmp transport was opened on a shared socket.
+ *
+ *  @param transport Pointer to the net-snmp transport.
+ *  @return          True when the transport is on a shared socket.
+ */
+bool
+is_shared_transport(
+    netsnmp_transport *transport
+);
+
+
+/**
+ *  bind_shared_transport - Point the peer of a session on a shared socket at its state wrapped
+ *  session.  Datagrams are only demultiplexed to bound peers.
+ *
+ *  @param st Reference to the state wrapped net-snmp session.
+ */
+void
+bind_shared_transport(
+    async_state &st
+);
+
+
+/**
+ *  response_reqid - Parse the request-id of a community based SNMP message without decoding the
+ *  variable bindings.
+ *
+ *  @param datagram Reference to the received datagram.
+ *  @return         Request-id of the message or 0 if it cannot be parsed.
+ */
+int
+response_reqid(
+    const std::string &datagram
+);
+
+
+/**
+ *  flush_shared_socket - Send the queued datagrams of a shared socket until its send buffer is
+ *  full.  A datagram which fails for any other reason is dropped; net-snmp retries the request.
+ *
+ *  @param socket Reference to the shared socket.
+ */
+void
+flush_shared_socket(
+    shared_socket &socket
+);
+
+
+/**
+ *  read_shared_socket - Read every waiting datagram from a shared socket and queue each on the
+ *  peer it was received from.  When multiple sessions share the source address, the datagram is
+ *  queued on the session with the request-id in flight.  Datagrams from unknown peers are
+ *  dropped.
+ *
+ *  @param socket Reference to the shared socket.
+ *  @param ready  Reference to the sessions with queued datagrams.  This function appends each
+ *                session the first time a datagram is queued on it.
+ */
+void
+read_shared_socket(
+    shared_socket &socket,
+    std::vector<async_state *> &ready
+);
+
+}
+
+#endif
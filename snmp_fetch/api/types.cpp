@@ -14,13 +14,43 @@ SnmpConfig::SnmpConfig(
       ssize_t timeout,
       size_t max_active_sessions,
       size_t max_var_binds_per_pdu,
-      size_t max_bulk_repetitions
+      size_t max_bulk_repetitions,
+      size_t max_inflight_pdus_per_host,
+      size_t threads,
+      std::optional<std::string> spill_directory,
+      size_t max_result_bytes_in_memory,
+      bool session_pool,
+      size_t session_idle_timeout,
+      size_t dns_cache_ttl,
+      size_t shared_sockets,
+      size_t engine_cache_ttl,
+      bool adaptive_bulk_repetitions,
+      size_t min_bulk_repetitions,
+      size_t partition_retries,
+      size_t max_pdus_per_second_per_host,
+      size_t max_pdus_per_second,
+      size_t deadline
   ) {
     this->retries = retries;
     this->timeout = timeout;
     this->max_active_sessions = max_active_sessions;
     this->max_var_binds_per_pdu = max_var_binds_per_pdu;
     this->max_bulk_repetitions = max_bulk_repetitions;
+    this->max_inflight_pdus_per_host = max_inflight_pdus_per_host;
+    this->threads = threads;
+    this->spill_directory = spill_directory;
+    this->max_result_bytes_in_memory = max_result_bytes_in_memory;
+    this->session_pool = session_pool;
+    this->session_idle_timeout = session_idle_timeout;
+    this->dns_cache_ttl = dns_cache_ttl;
+    this->shared_sockets = shared_sockets;
+    this->engine_cache_ttl = engine_cache_ttl;
+    this->adaptive_bulk_repetitions = adaptive_bulk_repetitions;
+    this->min_bulk_repetitions = min_bulk_repetitions;
+    this->partition_retries = partition_retries;
+    this->max_pdus_per_second_per_host = max_pdus_per_second_per_host;
+    this->max_pdus_per_second = max_pdus_per_second;
+    this->deadline = deadline;
   }
 
 
@@ -33,7 +63,22 @@ bool SnmpConfig::operator==(const SnmpConfig &a) {
       (a.timeout == this->timeout) &
       (a.max_active_sessions == this->max_active_sessions) &
       (a.max_var_binds_per_pdu == this->max_var_binds_per_pdu) &
-      (a.max_bulk_repetitions == this->max_bulk_repetitions)
+      (a.max_bulk_repetitions == this->max_bulk_repetitions) &
+      (a.max_inflight_pdus_per_host == this->max_inflight_pdus_per_host) &
+      (a.threads == this->threads) &
+      (a.spill_directory == this->spill_directory) &
+      (a.max_result_bytes_in_memory == this->max_result_bytes_in_memory) &
+      (a.session_pool == this->session_pool) &
+      (a.session_idle_timeout == this->session_idle_timeout) &
+      (a.dns_cache_ttl == this->dns_cache_ttl) &
+      (a.shared_sockets == this->shared_sockets) &
+      (a.engine_cache_ttl == this->engine_cache_ttl) &
+      (a.adaptive_bulk_repetitions == this->adaptive_bulk_repetitions) &
+      (a.min_bulk_repetitions == this->min_bulk_repetitions) &
+      (a.partition_retries == this->partition_retries) &
+      (a.max_pdus_per_second_per_host == this->max_pdus_per_second_per_host) &
+      (a.max_pdus_per_second == this->max_pdus_per_second) &
+      (a.deadline == this->deadline)
   );
 }
 
@@ -49,7 +94,22 @@ std::string SnmpConfig::to_string() {
         "timeout=%2%, "
         "max_active_sessions=%3%, "
         "max_var_binds_per_pdu=%4%, "
-        "max_bulk_repetitions=%5%"
+        "max_bulk_repetitions=%5%, "
+        "max_inflight_pdus_per_host=%6%, "
+        "threads=%7%, "
+        "spill_directory=%8%, "
+        "max_result_bytes_in_memory=%9%, "
+        "session_pool=%10%, "
+        "session_idle_timeout=%11%, "
+        "dns_cache_ttl=%12%, "
+        "shared_sockets=%13%, "
+        "engine_cache_ttl=%14%, "
+        "adaptive_bulk_repetitions=%15%, "
+        "min_bulk_repetitions=%16%, "
+        "partition_retries=%17%, "
+        "max_pdus_per_second_per_host=%18%, "
+        "max_pdus_per_second=%19%, "
+        "deadline=%20%"
         ")"
       )
       % this->retries
@@ -57,6 +117,129 @@ std::string SnmpConfig::to_string() {
       % this->max_active_sessions
       % this->max_var_binds_per_pdu
       % this->max_bulk_repetitions
+      % this->max_inflight_pdus_per_host
+      % this->threads
+      % (this->spill_directory.has_value() ? "'" + *this->spill_directory + "'" : "None")
+      % this->max_result_bytes_in_memory
+      % (this->session_pool ? "True" : "False")
+      % this->session_idle_timeout
+      % this->dns_cache_ttl
+      % this->shared_sockets
+      % this->engine_cache_ttl
+      % (this->adaptive_bulk_repetitions ? "True" : "False")
+      % this->min_bulk_repetitions
+      % this->partition_retries
+      % this->max_pdus_per_second_per_host
+      % this->max_pdus_per_second
+      % this->deadline
+  );
+}
+
+
+/**
+ *  UsmCredentials::UsmCredentials
+ */
+UsmCredentials::UsmCredentials(
+    std::string security_name,
+    std::optional<std::string> auth_protocol,
+    std::optional<std::string> auth_passphrase,
+    std::optional<std::string> priv_protocol,
+    std::optional<std::string> priv_passphrase,
+    std::string context_name
+) {
+
+  if (security_name.empty())
+    throw std::invalid_argument("Expected a security name");
+  if (auth_protocol.has_value() && *auth_protocol != "MD5" && *auth_protocol != "SHA")
+    throw std::invalid_argument("Unknown auth protocol " + *auth_protocol);
+  if (priv_protocol.has_value() && *priv_protocol != "DES" && *priv_protocol != "AES")
+    throw std::invalid_argument("Unknown priv protocol " + *priv_protocol);
+  if (priv_protocol.has_value() && !auth_protocol.has_value())
+    throw std::invalid_argument("A priv protocol requires an auth protocol");
+  if (auth_protocol.has_value() != auth_passphrase.has_value())
+    throw std::invalid_argument("Expected both an auth protocol and an auth passphrase");
+  if (priv_protocol.has_value() != priv_passphrase.has_value())
+    throw std::invalid_argument("Expected both a priv protocol and a priv passphrase");
+  if (
+      (auth_passphrase.has_value() && auth_passphrase->size() < 8) ||
+      (priv_passphrase.has_value() && priv_passphrase->size() < 8)
+  )
+    throw std::invalid_argument("Passphrases must be at least 8 characters");
+
+  this->security_name = security_name;
+  this->auth_protocol = auth_protocol;
+  this->auth_passphrase = auth_passphrase;
+  this->priv_protocol = priv_protocol;
+  this->priv_passphrase = priv_passphrase;
+  this->context_name = context_name;
+
+}
+
+
+/**
+ *  UsmCredentials::operator==
+ */
+bool UsmCredentials::operator==(const UsmCredentials &a) const {
+  return (
+      (a.security_name == this->security_name) &
+      (a.auth_protocol == this->auth_protocol) &
+      (a.auth_passphrase == this->auth_passphrase) &
+      (a.priv_protocol == this->priv_protocol) &
+      (a.priv_passphrase == this->priv_passphrase) &
+      (a.context_name == this->context_name)
+  );
+}
+
+
+/**
+ *  UsmCredentials::operator<
+ */
+bool UsmCredentials::operator<(const UsmCredentials &a) const {
+  return std::tie(
+      this->security_name,
+      this->auth_protocol,
+      this->auth_passphrase,
+      this->priv_protocol,
+      this->priv_passphrase,
+      this->context_name
+  ) < std::tie(
+      a.security_name,
+      a.auth_protocol,
+      a.auth_passphrase,
+      a.priv_protocol,
+      a.priv_passphrase,
+      a.context_name
+  );
+}
+
+
+/**
+ *  UsmCredentials::to_string
+ */
+std::string UsmCredentials::to_string() const {
+  auto quoted = [](const std::optional<std::string> &value) {
+    return value.has_value() ? "'" + *value + "'" : "None";
+  };
+  auto masked = [](const std::optional<std::string> &value) {
+    return value.has_value() ? "'********'" : "None";
+  };
+  return str(
+      boost::format(
+        "UsmCredentials("
+        "security_name='%1%', "
+        "auth_protocol=%2%, "
+        "auth_passphrase=%3%, "
+        "priv_protocol=%4%, "
+        "priv_passphrase=%5%, "
+        "context_name='%6%'"
+        ")"
+      )
+      % this->security_name
+      % quoted(this->auth_protocol)
+      % masked(this->auth_passphrase)
+      % quoted(this->priv_protocol)
+      % masked(this->priv_passphrase)
+      % this->context_name
   );
 }
 
@@ -139,13 +322,16 @@ std::string SnmpError::to_string() {
     case VALUE_WARNING:
       type_string = "VALUE_WARNING";
       break;
+    case DEADLINE_ERROR:
+      type_string = "DEADLINE_ERROR";
+      break;
   };
 
   return str(
       boost::format(
         "SnmpError("
         "type=%1%, "
-        "Host(index=%2%, hostname='%3%', community='%4%'), "
+        "Host(index=%2%, hostname='%3%', %4%), "
         "sys_errno=%5%, "
         "snmp_errno=%6%, "
         "err_stat=%7%, "
@@ -157,7 +343,11 @@ std::string SnmpError::to_string() {
       % type_string
       % std::to_string(std::get<0>(this->host))
       % std::get<1>(this->host)
-      % std::get<2>(this->host)
+      % (
+        std::holds_alternative<std::string>(std::get<2>(this->host))
+        ? "community='" + std::get<std::string>(std::get<2>(this->host)) + "'"
+        : "credentials=" + std::get<UsmCredentials>(std::get<2>(this->host)).to_string()
+      )
       % (this->sys_errno.has_value() ? std::to_string(*this->sys_errno) : "None")
       % (this->snmp_errno.has_value() ? std::to_string(*this->snmp_errno) : "None")
       % (this->err_stat.has_value() ? std::to_string(*this->err_stat) : "None")
@@ -172,4 +362,230 @@ std::string SnmpError::to_string() {
   );
 }
 
+
+/**
+ *  free_buffer - Free the memory of a result buffer.  A spilled buffer is unmapped and its file is
+ *  closed and removed.
+ *
+ *  @param a Reference to the buffer.
+ */
+static void free_buffer(result_buffer &a) {
+  if (a.fd < 0) {
+    free(a.data);
+    return;
+  }
+  if (a.data != NULL)
+    munmap(a.data, a.capacity);
+  close(a.fd);
+  unlink(a.path.c_str());
+}
+
+
+/**
+ *  take_buffer - Take the memory of one result buffer into another, leaving it empty.
+ *
+ *  @param a Reference to the buffer to take into.
+ *  @param b Reference to the buffer to take from.
+ */
+static void take_buffer(result_buffer &a, result_buffer &b) {
+  a.data = b.data;
+  a.size = b.size;
+  a.capacity = b.capacity;
+  a.fd = b.fd;
+  a.path = std::move(b.path);
+  a.spill_directory = b.spill_directory;
+  a.max_bytes_in_memory = b.max_bytes_in_memory;
+  b.data = NULL;
+  b.size = 0;
+  b.capacity = 0;
+  b.fd = -1;
+  b.path.clear();
+}
+
+
+/**
+ *  result_buffer::result_buffer
+ */
+result_buffer::result_buffer() {
+  this->data = NULL;
+  this->size = 0;
+  this->capacity = 0;
+  this->fd = -1;
+  this->max_bytes_in_memory = 0;
+}
+
+
+/**
+ *  result_buffer::result_buffer
+ */
+result_buffer::result_buffer(const SnmpConfig &config) : result_buffer() {
+  this->spill_directory = config.spill_directory;
+  this->max_bytes_in_memory = config.max_result_bytes_in_memory;
+}
+
+
+/**
+ *  result_buffer::result_buffer
+ */
+result_buffer::result_buffer(result_buffer &&a) {
+  take_buffer(*this, a);
+}
+
+
+/**
+ *  result_buffer::operator=
+ */
+result_buffer &result_buffer::operator=(result_buffer &&a) {
+  if (this != &a) {
+    free_buffer(*this);
+    take_buffer(*this, a);
+  }
+  return *this;
+}
+
+
+/**
+ *  result_buffer::~result_buffer
+ */
+result_buffer::~result_buffer() {
+  free_buffer(*this);
+}
+
+
+/**
+ *  result_buffer::spilled
+ */
+bool result_buffer::spilled() const {
+  return this->fd >= 0;
+}
+
+
+/**
+ *  result_buffer::reserve
+ */
+void result_buffer::reserve(size_t capacity) {
+  if (capacity <= this->capacity)
+    return;
+
+  // grow in memory until the buffer would exceed max bytes in memory
+  if (
+      !this->spilled() &&
+      !(this->spill_directory.has_value() && capacity > this->max_bytes_in_memory)
+  ) {
+    void *data = realloc(this->data, capacity);
+    if (data == NULL)
+      throw std::bad_alloc();
+    this->data = (uint8_t *)data;
+    this->capacity = capacity;
+    return;
+  }
+
+  // move the buffer into a new file in the spill directory
+  if (!this->spilled()) {
+    std::string path = *this->spill_directory + "/snmp-fetch-XXXXXX";
+    int fd = mkstemp(path.data());
+    if (fd < 0)
+      throw std::system_error(errno, std::generic_category(), "failed to create spill file");
+    if (ftruncate(fd, capacity) < 0) {
+      int err = errno;
+      close(fd);
+      unlink(path.c_str());
+      throw std::system_error(err, std::generic_category(), "failed to grow spill file");
+    }
+    void *data = mmap(NULL, capacity, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+    if (data == MAP_FAILED) {
+      int err = errno;
+      close(fd);
+      unlink(path.c_str());
+      throw std::system_error(err, std::generic_category(), "failed to map spill file");
+    }
+    if (this->size)
+      memcpy(data, this->data, this->size);
+    free(this->data);
+    this->data = (uint8_t *)data;
+    this->capacity = capacity;
+    this->fd = fd;
+    this->path = path;
+    return;
+  }
+
+  // grow the file and its mapping
+  if (ftruncate(this->fd, capacity) < 0)
+    throw std::system_error(errno, std::generic_category(), "failed to grow spill file");
+  void *data = mremap(this->data, this->capacity, capacity, MREMAP_MAYMOVE);
+  if (data == MAP_FAILED)
+    throw std::system_error(errno, std::generic_category(), "failed to map spill file");
+  this->data = (uint8_t *)data;
+  this->capacity = capacity;
+}
+
+
+/**
+ *  result_buffer::extend
+ */
+uint8_t *result_buffer::extend(size_t n) {
+  if (this->size + n > this->capacity)
+    this->reserve(std::max({
+        this->size + n,
+        this->capacity << 1,
+        (size_t)SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY
+    }));
+  uint8_t *p = this->data + this->size;
+  memset(p, 0, n);
+  this->size += n;
+  return p;
+}
+
+
+/**
+ *  result_buffer::append
+ */
+void result_buffer::append(result_buffer &&a) {
+  if (this->data == NULL) {
+    *this = std::move(a);
+    return;
+  }
+  if (a.size)
+    memcpy(this->extend(a.size), a.data, a.size);
+  a = result_buffer();
+}
+
+
+/**
+ *  result_buffer::release
+ */
+uint8_t *result_buffer::release() {
+  // Drop the unused capacity so it does not live as long as the caller.  Shrinking in place is
+  // cheap for the allocator; failing only leaves the memory larger than the results.
+  if (this->data != NULL && this->size && this->size < this->capacity) {
+    void *data = realloc(this->data, this->size);
+    if (data != NULL)
+      this->data = (uint8_t *)data;
+  }
+  uint8_t *data = this->data;
+  this->data = NULL;
+  this->size = 0;
+  this->capacity = 0;
+  return data;
+}
+
+
+/**
+ *  result_buffer::release_file
+ */
+std::string result_buffer::release_file() {
+  std::string path = std::move(this->path);
+  munmap(this->data, this->capacity);
+  // drop the unused capacity from the file; failing only leaves the file larger than the results
+  int truncated = ftruncate(this->fd, this->size);
+  (void)truncated;
+  close(this->fd);
+  this->data = NULL;
+  this->size = 0;
+  this->capacity = 0;
+  this->fd = -1;
+  this->path.clear();
+  return path;
+}
+
 }
@@ -5,8 +5,20 @@
 #ifndef SNMP_FETCH__TYPES_H
 #define SNMP_FETCH__TYPES_H
 
+#include <algorithm>
+#include <cstdlib>
+#include <cstring>
 #include <iostream>
+#include <list>
+#include <map>
+#include <new>
+#include <optional>
+#include <system_error>
+#include <variant>
 #include <boost/format.hpp>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
 
 extern "C" {
 #include <net-snmp/net-snmp-config.h>
@@ -23,15 +35,87 @@ namespace snmp_fetch {
 #define SNMP_FETCH__DEFAULT_MAX_ACTIVE_SESSIONS 10
 #define SNMP_FETCH__DEFAULT_MAX_VAR_BINDS_PER_PDU 10
 #define SNMP_FETCH__DEFAULT_MAX_BULK_REPETITIONS 10
+#define SNMP_FETCH__DEFAULT_MAX_INFLIGHT_PDUS_PER_HOST 1
+#define SNMP_FETCH__DEFAULT_THREADS 1
+#define SNMP_FETCH__DEFAULT_SPILL_DIRECTORY std::nullopt
+#define SNMP_FETCH__DEFAULT_MAX_RESULT_BYTES_IN_MEMORY (64 << 20)
+#define SNMP_FETCH__DEFAULT_SESSION_POOL false
+#define SNMP_FETCH__DEFAULT_SESSION_IDLE_TIMEOUT 300
+#define SNMP_FETCH__DEFAULT_DNS_CACHE_TTL 0
+#define SNMP_FETCH__DEFAULT_SHARED_SOCKETS 0
+#define SNMP_FETCH__DEFAULT_ENGINE_CACHE_TTL 0
+#define SNMP_FETCH__DEFAULT_ADAPTIVE_BULK_REPETITIONS false
+#define SNMP_FETCH__DEFAULT_MIN_BULK_REPETITIONS 1
+#define SNMP_FETCH__DEFAULT_PARTITION_RETRIES 0
+#define SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND_PER_HOST 0
+#define SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND 0
+#define SNMP_FETCH__DEFAULT_DEADLINE 0
+
+// smallest allocation made for a result buffer
+#define SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY 4096
+
+
+/**
+ *  UsmCredentials - SNMPv3 credentials of a host for the user-based security model.
+ *
+ *  The security level follows from the protocols set: noAuthNoPriv without an auth protocol,
+ *  authNoPriv with only an auth protocol and authPriv with both.  Auth protocols are "MD5" and
+ *  "SHA"; priv protocols are "DES" and "AES".  Passphrases are at least 8 characters.
+ */
+struct UsmCredentials {
+
+  std::string security_name;
+  std::optional<std::string> auth_protocol;
+  std::optional<std::string> auth_passphrase;
+  std::optional<std::string> priv_protocol;
+  std::optional<std::string> priv_passphrase;
+  std::string context_name;
+
+  /**
+   *  UsmCredentials - Constructor which validates the protocols and passphrases.
+   *
+   *  @throws std::invalid_argument for an unknown protocol, a protocol without a passphrase or a
+   *          priv protocol without an auth protocol.
+   */
+  UsmCredentials(
+      std::string security_name,
+      std::optional<std::string> auth_protocol = {},
+      std::optional<std::string> auth_passphrase = {},
+      std::optional<std::string> priv_protocol = {},
+      std::optional<std::string> priv_passphrase = {},
+      std::string context_name = ""
+  );
+
+  /**
+   *  UsmCredentials::operator==
+   */
+  bool operator==(const UsmCredentials &a) const;
+
+  /**
+   *  UsmCredentials::operator< - Order used to key the session pool.
+   */
+  bool operator<(const UsmCredentials &a) const;
+
+  /**
+   *  to_string - String method used for __str__ and __repr__ which mimics attrs.  Passphrases
+   *  are masked.
+   *
+   *  @return String representation of UsmCredentials.
+   */
+  std::string to_string() const;
+
+};
 
 
 // type aliases
-using host_t = std::tuple<uint64_t, std::string, std::string>;
+using credentials_t = std::variant<std::string, UsmCredentials>;
+using host_t = std::tuple<uint64_t, std::string, credentials_t>;
 using oid_t = std::vector<uint64_t>;
 using oid_size_t = uint64_t;
 using value_size_t = uint64_t;
 using var_bind_size_t = std::tuple<oid_size_t, value_size_t>;
 using var_bind_t = std::tuple<oid_t, var_bind_size_t>;
+using root_index_t = std::vector<size_t>;
 
 
 /**
@@ -54,6 +138,30 @@ enum PDU_TYPE {
 };
 
 
+/**
+ *  INDEX_KIND - Constants exposed to python for decoding the table index of a variable binding
+ *  from the suboids following its root oid.
+ *
+ *  INDEX_INTEGER         - One suboid decoded to a uint64.
+ *  INDEX_FIXED           - A fixed number of suboids, e.g. an IpAddress.
+ *  INDEX_LENGTH_PREFIXED - A suboid holding the number of suboids that follow, e.g. an OCTET
+ *                          STRING.  Decoded to a uint64 length followed by the suboids.
+ *  INDEX_IMPLIED         - The remaining suboids; an IMPLIED index.  Decoded like
+ *                          INDEX_LENGTH_PREFIXED.
+ */
+enum INDEX_KIND {
+    INDEX_INTEGER = 0,
+    INDEX_FIXED,
+    INDEX_LENGTH_PREFIXED,
+    INDEX_IMPLIED
+};
+
+
+// (kind, maximum number of suboids, bytes per decoded suboid) of one field of a table index
+using index_field_t = std::tuple<INDEX_KIND, uint64_t, uint64_t>;
+using index_spec_t = std::vector<index_field_t>;
+
+
 /**
  *  SnmpConfig - Pure C++ config type exposed through the to python module.
  */
@@ -64,6 +172,21 @@ struct SnmpConfig {
   size_t max_active_sessions;
   size_t max_var_binds_per_pdu;
   size_t max_bulk_repetitions;
+  size_t max_inflight_pdus_per_host;
+  size_t threads;
+  std::optional<std::string> spill_directory;
+  size_t max_result_bytes_in_memory;
+  bool session_pool;
+  size_t session_idle_timeout;
+  size_t dns_cache_ttl;
+  size_t shared_sockets;
+  size_t engine_cache_ttl;
+  bool adaptive_bulk_repetitions;
+  size_t min_bulk_repetitions;
+  size_t partition_retries;
+  size_t max_pdus_per_second_per_host;
+  size_t max_pdus_per_second;
+  size_t deadline;
 
   /**
    *  SnmpConfig - Constructor with default values.
@@ -73,7 +196,22 @@ struct SnmpConfig {
       ssize_t timeout = SNMP_FETCH__DEFAULT_TIMEOUT,
       size_t max_active_sessions = SNMP_FETCH__DEFAULT_MAX_ACTIVE_SESSIONS,
       size_t max_var_binds_per_pdu = SNMP_FETCH__DEFAULT_MAX_VAR_BINDS_PER_PDU,
-      size_t max_bulk_repetitions = SNMP_FETCH__DEFAULT_MAX_BULK_REPETITIONS
+      size_t max_bulk_repetitions = SNMP_FETCH__DEFAULT_MAX_BULK_REPETITIONS,
+      size_t max_inflight_pdus_per_host = SNMP_FETCH__DEFAULT_MAX_INFLIGHT_PDUS_PER_HOST,
+      size_t threads = SNMP_FETCH__DEFAULT_THREADS,
+      std::optional<std::string> spill_directory = SNMP_FETCH__DEFAULT_SPILL_DIRECTORY,
+      size_t max_result_bytes_in_memory = SNMP_FETCH__DEFAULT_MAX_RESULT_BYTES_IN_MEMORY,
+      bool session_pool = SNMP_FETCH__DEFAULT_SESSION_POOL,
+      size_t session_idle_timeout = SNMP_FETCH__DEFAULT_SESSION_IDLE_TIMEOUT,
+      size_t dns_cache_ttl = SNMP_FETCH__DEFAULT_DNS_CACHE_TTL,
+      size_t shared_sockets = SNMP_FETCH__DEFAULT_SHARED_SOCKETS,
+      size_t engine_cache_ttl = SNMP_FETCH__DEFAULT_ENGINE_CACHE_TTL,
+      bool adaptive_bulk_repetitions = SNMP_FETCH__DEFAULT_ADAPTIVE_BULK_REPETITIONS,
+      size_t min_bulk_repetitions = SNMP_FETCH__DEFAULT_MIN_BULK_REPETITIONS,
+      size_t partition_retries = SNMP_FETCH__DEFAULT_PARTITION_RETRIES,
+      size_t max_pdus_per_second_per_host = SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND_PER_HOST,
+      size_t max_pdus_per_second = SNMP_FETCH__DEFAULT_MAX_PDUS_PER_SECOND,
+      size_t deadline = SNMP_FETCH__DEFAULT_DEADLINE
   );
 
   /**
@@ -103,7 +241,8 @@ enum SNMP_ERROR_TYPE {
     ASYNC_PROBE_ERROR,
     TRANSPORT_DISCONNECT_ERROR,
     CREATE_RESPONSE_PDU_ERROR,
-    VALUE_WARNING
+    VALUE_WARNING,
+    DEADLINE_ERROR
 };
 
 
@@ -150,11 +289,163 @@ struct SnmpError {
 };
 
 
+/**
+ *  result_buffer - Growable byte buffer holding the packed results of one variable binding.
+ *
+ *  Memory is managed with malloc/realloc rather than std::vector.  Large allocations are grown in
+ *  place by the allocator (mremap on linux) instead of being copied into a new buffer, which keeps
+ *  the peak memory of large walks close to the size of the results.  The memory can be released
+ *  to a numpy array without a copy.
+ *
+ *  When a spill directory is set, a buffer grown past max bytes in memory is moved into a
+ *  temporary file in the directory and mapped with mmap.  The pages of the file are written back
+ *  by the kernel under memory pressure so the resident memory stays bounded by the page cache
+ *  rather than the size of the results.  Fd is -1 while the buffer is in memory.
+ */
+struct result_buffer {
+
+  uint8_t *data;
+  size_t size;
+  size_t capacity;
+  int fd;
+  std::string path;
+  std::optional<std::string> spill_directory;
+  size_t max_bytes_in_memory;
+
+  /**
+   *  result_buffer - Constructor for an empty buffer which is never spilled.
+   */
+  result_buffer();
+
+  /**
+   *  result_buffer - Constructor for an empty buffer which is spilled per the config.
+   *
+   *  @param config Reference to the configuration.
+   */
+  explicit result_buffer(const SnmpConfig &config);
+
+  /**
+   *  result_buffer - Move constructor.
+   */
+  result_buffer(result_buffer &&a);
+
+  /**
+   *  result_buffer::operator= - Move assignment.
+   */
+  result_buffer &operator=(result_buffer &&a);
+
+  // copying would double free the underlying memory
+  result_buffer(const result_buffer &) = delete;
+  result_buffer &operator=(const result_buffer &) = delete;
+
+  /**
+   *  ~result_buffer - Free the underlying memory if not released.  A spilled buffer is unmapped
+   *  and its file is removed.
+   */
+  ~result_buffer();
+
+  /**
+   *  spilled - Test if the buffer is backed by a file.
+   *
+   *  @return True when the buffer is mapped from a file in the spill directory.
+   */
+  bool spilled() const;
+
+  /**
+   *  reserve - Grow the capacity to at least the requested number of bytes.
+   *
+   *  @param capacity Minimum number of bytes.
+   */
+  void reserve(size_t capacity);
+
+  /**
+   *  extend - Grow the buffer by a number of zeroed bytes.  The capacity at least doubles when
+   *           exceeded to amortize the cost of growing.
+   *
+   *  @param n Number of bytes to append.
+   *  @return  Pointer to the first appended byte.
+   */
+  uint8_t *extend(size_t n);
+
+  /**
+   *  append - Append the contents of another buffer.  The memory of the other buffer is taken
+   *           without a copy when this buffer is empty.  The other buffer is left empty.
+   *
+   *  @param a Buffer to append.
+   */
+  void append(result_buffer &&a);
+
+  /**
+   *  release - Release ownership of the underlying memory to the caller, who is responsible for
+   *            calling free.  The memory is shrunk to the size of the results first.  The buffer
+   *            is left empty.  MUST NOT be called on a spilled buffer.
+   *
+   *  @return Pointer to the underlying memory.
+   */
+  uint8_t *release();
+
+  /**
+   *  release_file - Release ownership of the file of a spilled buffer to the caller, who is
+   *                 responsible for removing it.  The file is unmapped and truncated to the size
+   *                 of the results.  The buffer is left empty.
+   *
+   *  @return Path to the file.
+   */
+  std::string release_file();
+
+};
+
+
+/**
+ *  partition_t - A slice of the request variable bindings sent together in one PDU.
+ *
+ *  Offset is the position of the first variable binding of the slice in the request.  Reqid is
+ *  the id of the request PDU in flight for this partition or 0 when there is none.  Sent is the
+ *  monotonic time (microseconds) the request PDU in flight was sent.
+ *
+ *  Attempts counts the consecutive requests for the partition which failed and were retried, up
+ *  to config.partition_retries.  Retry at is the monotonic time (microseconds) before which the
+ *  partition is not resent or 0 when it may be sent immediately.
+ */
+struct partition_t {
+  size_t offset;
+  std::vector<oid_t> var_binds;
+  int reqid;
+  uint64_t sent;
+  size_t attempts;
+  uint64_t retry_at;
+};
+
+
 /**
  *  async_state - State wrapper for net-snmp sessions.
  *
  *  Host should be left as copy as the underlying pending host list destroys the elements that
  *  were used to build this structure.
+ *
+ *  Root index holds the positions of var_binds sorted by root oid.  It is built once per fetch and
+ *  shared read-only by all sessions to route response variable bindings to their result column.
+ *  Index specs are shared read-only in the same way; a var_bind without an index spec has its
+ *  oid copied as is.
+ *
+ *  Next var_binds is a list of partitions which MUST be a data structure which does not move the
+ *  memory location of the partitions.  In flight maps the id of each outstanding request PDU to
+ *  the partition it was built from.  A session is idle when no request PDUs are in flight.
+ *
+ *  Results points to the result columns the session appends to.  These are either shared by all
+ *  sessions or, when results are buffered per host, the host results owned by the session.
+ *
+ *  Deadline is the monotonic time (microseconds) at which net-snmp must be given a chance to
+ *  retry or timeout the outstanding request.  A deadline of 0 indicates no timer is scheduled.
+ *
+ *  Broken is set once net-snmp may call back into the state after the session is closed, i.e.
+ *  requests were abandoned while in flight, or once the transport of the session failed.  A
+ *  broken session is closed instead of being returned to the session pool.
+ *
+ *  Bulk repetitions is the max-repetitions of the next GETBULK request PDU.  It is fixed at
+ *  config.max_bulk_repetitions unless config.adaptive_bulk_repetitions is set.
+ *
+ *  Bucket limits the request PDUs sent to the host to config.max_pdus_per_second_per_host.
  */
 struct async_state {
   async_status_t async_status;
@@ -162,10 +453,18 @@ struct async_state {
   int pdu_type;
   host_t host;
   std::vector<var_bind_t> *var_binds;
-  std::vector<std::vector<oid_t>> next_var_binds;
-  std::vector<std::vector<uint8_t>> *results;
+  root_index_t *root_index;
+  std::vector<index_spec_t> *index_specs;
+  std::list<partition_t> next_var_binds;
+  std::map<int, std::list<partition_t>::iterator> inflight;
+  std::vector<result_buffer> *results;
   std::vector<SnmpError> *errors;
   SnmpConfig *config;
+  uint64_t deadline;
+  std::vector<result_buffer> host_results;
+  bool broken;
+  size_t bulk_repetitions;
+  token_bucket bucket;
 };
 
 }
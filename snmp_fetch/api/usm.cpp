@@ -0,0 +1,283 @@
+/**
+ *  usm.cpp
+ */
+
+#include "usm.hpp"
+
+namespace snmp_fetch {
+
+/**
+ *  global_usm_cache
+ */
+usm_cache &
+global_usm_cache() {
+  static usm_cache *cache = new usm_cache();
+  return *cache;
+}
+
+
+/**
+ *  clear_usm_cache
+ */
+size_t
+clear_usm_cache() {
+  usm_cache &cache = global_usm_cache();
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  size_t cleared = cache.keys.size() + cache.localized_keys.size() + cache.engines.size();
+  cache.keys.clear();
+  cache.localized_keys.clear();
+  cache.engines.clear();
+  return cleared;
+}
+
+
+/**
+ *  auth_protocol_oid - Get the oid of an auth protocol.
+ *
+ *  @param protocol Reference to the name of the protocol.
+ *  @param length   Reference to the length of the oid to fill.
+ *  @return         Pointer to the oid.
+ */
+static oid *
+auth_protocol_oid(
+    const std::string &protocol,
+    size_t &length
+) {
+  if (protocol == "MD5") {
+    length = USM_AUTH_PROTO_MD5_LEN;
+    return usmHMACMD5AuthProtocol;
+  }
+  length = USM_AUTH_PROTO_SHA_LEN;
+  return usmHMACSHA1AuthProtocol;
+}
+
+
+/**
+ *  priv_protocol_oid - Get the oid of a priv protocol.
+ *
+ *  @param protocol Reference to the name of the protocol.
+ *  @param length   Reference to the length of the oid to fill.
+ *  @return         Pointer to the oid.
+ */
+static oid *
+priv_protocol_oid(
+    const std::string &protocol,
+    size_t &length
+) {
+  if (protocol == "DES") {
+    length = USM_PRIV_PROTO_DES_LEN;
+    return usmDESPrivProtocol;
+  }
+  length = USM_PRIV_PROTO_AES_LEN;
+  return usmAESPrivProtocol;
+}
+
+
+/**
+ *  master_key - Derive the master key (Ku) of a passphrase through the cache.
+ *
+ *  @param cache      Reference to the SNMPv3 cache.
+ *  @param protocol   Reference to the name of the auth protocol hashing the passphrase.
+ *  @param passphrase Reference to the passphrase.
+ *  @return           Master key or an empty string on failure.
+ */
+static std::string
+master_key(
+    usm_cache &cache,
+    const std::string &protocol,
+    const std::string &passphrase
+) {
+
+  auto key = std::make_tuple(protocol, passphrase);
+  {
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    auto cached = cache.keys.find(key);
+    if (cached != cache.keys.end())
+      return cached->second;
+  }
+
+  // derive without holding the lock so one derivation does not stall the others
+  size_t length;
+  oid *hash = auth_protocol_oid(protocol, length);
+  u_char ku[USM_AUTH_KU_LEN];
+  size_t ku_length = sizeof(ku);
+  if (generate_Ku(
+        hash, length, (const u_char *)passphrase.data(), passphrase.size(), ku, &ku_length
+  ) != SNMPERR_SUCCESS)
+    return "";
+
+  std::string derived((const char *)ku, ku_length);
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  cache.keys[key] = derived;
+  return derived;
+
+}
+
+
+/**
+ *  localized_key - Localize a master key (Kul) to an engine through the cache.
+ *
+ *  @param cache     Reference to the SNMPv3 cache.
+ *  @param protocol  Reference to the name of the auth protocol.
+ *  @param ku        Reference to the master key.
+ *  @param engine_id Reference to the engine id.
+ *  @return          Localized key or an empty string on failure.
+ */
+static std::string
+localized_key(
+    usm_cache &cache,
+    const std::string &protocol,
+    const std::string &ku,
+    const std::string &engine_id
+) {
+
+  auto key = std::make_tuple(protocol, ku, engine_id);
+  {
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    auto cached = cache.localized_keys.find(key);
+    if (cached != cache.localized_keys.end())
+      return cached->second;
+  }
+
+  size_t length;
+  oid *hash = auth_protocol_oid(protocol, length);
+  u_char kul[USM_AUTH_KU_LEN];
+  size_t kul_length = sizeof(kul);
+  if (generate_kul(
+        hash, length, (const u_char *)engine_id.data(), engine_id.size(),
+        (const u_char *)ku.data(), ku.size(), kul, &kul_length
+  ) != SNMPERR_SUCCESS)
+    return "";
+
+  std::string localized((const char *)kul, kul_length);
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  cache.localized_keys[key] = localized;
+  return localized;
+
+}
+
+
+/**
+ *  configure_usm_session
+ */
+bool
+configure_usm_session(
+    netsnmp_session &session,
+    const UsmCredentials &credentials,
+    const std::string &peername,
+    usm_cache &cache,
+    uint64_t engine_ttl,
+    usm_keys &keys
+) {
+
+  session.version = SNMP_VERSION_3;
+  session.securityName = (char *)credentials.security_name.c_str();
+  session.securityNameLen = credentials.security_name.size();
+  session.contextName = (char *)credentials.context_name.c_str();
+  session.contextNameLen = credentials.context_name.size();
+  session.securityLevel = !credentials.auth_protocol.has_value()
+    ? SNMP_SEC_LEVEL_NOAUTH
+    : !credentials.priv_protocol.has_value()
+      ? SNMP_SEC_LEVEL_AUTHNOPRIV
+      : SNMP_SEC_LEVEL_AUTHPRIV;
+
+  // use the engine discovered by an earlier session if it has not expired
+  if (engine_ttl) {
+    uint64_t now = monotonic_time();
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    auto cached = cache.engines.find(peername);
+    if (cached != cache.engines.end() && std::get<4>(cached->second) > now) {
+      keys.engine_id = std::get<0>(cached->second);
+      session.engineBoots = std::get<1>(cached->second);
+      // the engine time advanced since it was read
+      session.engineTime = std::get<2>(cached->second) + (
+          (now - std::get<3>(cached->second)) / 1000000
+      );
+    }
+  }
+  if (!keys.engine_id.empty()) {
+    session.securityEngineID = (u_char *)keys.engine_id.data();
+    session.securityEngineIDLen = keys.engine_id.size();
+    session.contextEngineID = (u_char *)keys.engine_id.data();
+    session.contextEngineIDLen = keys.engine_id.size();
+  }
+
+  if (!credentials.auth_protocol.has_value())
+    return true;
+
+  // the auth key; localized here if the engine is known else by net-snmp after discovery
+  const std::string &auth_protocol = *credentials.auth_protocol;
+  session.securityAuthProto = auth_protocol_oid(auth_protocol, session.securityAuthProtoLen);
+  std::string ku = master_key(cache, auth_protocol, *credentials.auth_passphrase);
+  if (ku.empty())
+    return false;
+  memcpy(session.securityAuthKey, ku.data(), ku.size());
+  session.securityAuthKeyLen = ku.size();
+  if (!keys.engine_id.empty()) {
+    keys.auth_key = localized_key(cache, auth_protocol, ku, keys.engine_id);
+    if (keys.auth_key.empty())
+      return false;
+    session.securityAuthLocalKey = (u_char *)keys.auth_key.data();
+    session.securityAuthLocalKeyLen = keys.auth_key.size();
+  }
+
+  if (!credentials.priv_protocol.has_value())
+    return true;
+
+  // the priv key is derived and localized with the hash of the auth protocol
+  session.securityPrivProto = priv_protocol_oid(
+      *credentials.priv_protocol, session.securityPrivProtoLen
+  );
+  ku = master_key(cache, auth_protocol, *credentials.priv_passphrase);
+  if (ku.empty())
+    return false;
+  memcpy(session.securityPrivKey, ku.data(), ku.size());
+  session.securityPrivKeyLen = ku.size();
+  if (!keys.engine_id.empty()) {
+    keys.priv_key = localized_key(cache, auth_protocol, ku, keys.engine_id);
+    if (keys.priv_key.empty())
+      return false;
+    session.securityPrivLocalKey = (u_char *)keys.priv_key.data();
+    session.securityPrivLocalKeyLen = keys.priv_key.size();
+  }
+
+  return true;
+
+}
+
+
+/**
+ *  cache_engine
+ */
+void
+cache_engine(
+    usm_cache &cache,
+    const std::string &peername,
+    void *session,
+    uint64_t ttl
+) {
+
+  netsnmp_session *sp = snmp_sess_session(session);
+  if (sp == NULL || !sp->securityEngineIDLen)
+    return;
+  std::string engine_id((const char *)sp->securityEngineID, sp->securityEngineIDLen);
+
+  // read the boots and time net-snmp keeps for the engine as of now
+  u_int boots = 0;
+  u_int time = 0;
+  get_enginetime(
+      sp->securityEngineID, sp->securityEngineIDLen, &boots, &time, FALSE
+  );
+
+  uint64_t now = monotonic_time();
+  std::lock_guard<std::mutex> lock(cache.mutex);
+  auto cached = cache.engines.find(peername);
+  uint64_t expires = (
+      cached != cache.engines.end() && std::get<0>(cached->second) == engine_id &&
+      std::get<4>(cached->second) > now
+  ) ? std::get<4>(cached->second) : now + ttl;
+  cache.engines[peername] = std::make_tuple(engine_id, boots, time, now, expires);
+
+}
+
+}
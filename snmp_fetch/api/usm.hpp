@@ -0,0 +1,120 @@
+/**
+ *  usm.hpp - SNMPv3 keys and engines cached by every fetch in the process.
+ */
+
+#ifndef SNMP_FETCH__USM_HPP
+#define SNMP_FETCH__USM_HPP
+
+#include <mutex>
+
+#include "types.hpp"
+
+extern "C" {
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+}
+
+namespace snmp_fetch {
+
+/**
+ *  cached_engine_t - An authoritative engine discovered by an earlier session; (engine id, boots,
+ *  time, monotonic time (microseconds) boots and time were read, monotonic time (microseconds)
+ *  the engine expires).
+ */
+using cached_engine_t = std::tuple<std::string, u_int, u_int, uint64_t, uint64_t>;
+
+
+/**
+ *  usm_cache - Keys derived from passphrases and engines discovered from agents.
+ *
+ *  Deriving a key from a passphrase hashes a megabyte of the repeated passphrase, so master keys
+ *  (Ku) are cached by (auth protocol, passphrase) and localized keys (Kul) by (auth protocol,
+ *  Ku, engine id).  Engines are cached by peername for config.engine_cache_ttl so a session to a
+ *  known agent is opened without the discovery round trip.
+ *
+ *  Opening an SNMPv3 session adds the user to the user list of net-snmp, which is not thread
+ *  safe; sessions are opened under the open mutex.
+ */
+struct usm_cache {
+  std::mutex mutex;
+  std::mutex open_mutex;
+  std::map<std::tuple<std::string, std::string>, std::string> keys;
+  std::map<std::tuple<std::string, std::string, std::string>, std::string> localized_keys;
+  std::map<std::string, cached_engine_t> engines;
+};
+
+
+/**
+ *  usm_keys - Storage for the engine id and localized keys referenced by a session template.
+ *  It MUST outlive the call opening the session; net-snmp copies them.
+ */
+struct usm_keys {
+  std::string engine_id;
+  std::string auth_key;
+  std::string priv_key;
+};
+
+
+/**
+ *  global_usm_cache - Get the SNMPv3 cache of the process.  The cache is never destroyed.
+ *
+ *  @return Reference to the SNMPv3 cache.
+ */
+usm_cache &
+global_usm_cache();
+
+
+/**
+ *  clear_usm_cache - Forget every key and engine in the SNMPv3 cache of the process.
+ *
+ *  @return Number of keys and engines forgotten.
+ */
+size_t
+clear_usm_cache();
+
+
+/**
+ *  configure_usm_session - Configure a session template for SNMPv3.  Keys are derived through the
+ *  cache.  When the engine of the peername is cached, the engine id, boots and time are set and
+ *  the keys are localized so net-snmp neither discovers the engine nor localizes the keys.
+ *
+ *  @param session     Reference to the net-snmp session template.
+ *  @param credentials Reference to the credentials of the host.
+ *  @param peername    Reference to the peername the engine is cached by.
+ *  @param cache       Reference to the SNMPv3 cache.
+ *  @param engine_ttl  Microseconds an engine is cached; 0 never uses cached engines.
+ *  @param keys        Reference to the storage of the keys set on the session template.
+ *  @return            Returns false if a key could not be derived.
+ */
+bool
+configure_usm_session(
+    netsnmp_session &session,
+    const UsmCredentials &credentials,
+    const std::string &peername,
+    usm_cache &cache,
+    uint64_t engine_ttl,
+    usm_keys &keys
+);
+
+
+/**
+ *  cache_engine - Cache the engine of an open SNMPv3 session with its current boots and time.
+ *  The expiry of an unexpired engine cached with the same id is kept so the engine is
+ *  rediscovered at least once per ttl.
+ *
+ *  @param cache    Reference to the SNMPv3 cache.
+ *  @param peername Reference to the peername to cache the engine by.
+ *  @param session  Pointer to the net-snmp session object.
+ *  @param ttl      Microseconds the engine is cached.
+ */
+void
+cache_engine(
+    usm_cache &cache,
+    const std::string &peername,
+    void *session,
+    uint64_t ttl
+);
+
+}
+
+#endif
@@ -27,4 +27,52 @@ oid_to_string(std::vector<uint64_t> &oid) {
   return os.str();
 }
 
+
+/**
+ *  monotonic_time
+ */
+uint64_t
+monotonic_time() {
+  return std::chrono::duration_cast<std::chrono::microseconds>(
+      std::chrono::steady_clock::now().time_since_epoch()
+  ).count();
+}
+
+
+
+/**
+ *  init_token_bucket
+ */
+token_bucket
+init_token_bucket(uint64_t rate) {
+  return token_bucket {
+    rate,
+    std::max<uint64_t>(rate * SNMP_FETCH__RATE_LIMIT_BURST / 1000000, 1),
+    0
+  };
+}
+
+
+/**
+ *  token_wait
+ */
+uint64_t
+token_wait(const token_bucket &bucket, uint64_t now) {
+  if (!bucket.rate)
+    return 0;
+  // the bucket holds a token while it is refilled within the time of the rest of the burst
+  uint64_t allowance = (bucket.burst - 1) * (1000000 / bucket.rate);
+  return (bucket.refilled > now + allowance) ? bucket.refilled - now - allowance : 0;
+}
+
+
+/**
+ *  take_token
+ */
+void
+take_token(token_bucket &bucket, uint64_t now) {
+  if (bucket.rate)
+    bucket.refilled = std::max(bucket.refilled, now) + 1000000 / bucket.rate;
+}
+
 }
@@ -7,11 +7,28 @@
 #ifndef SNMP_FETCH__UTILS_HPP
 #define SNMP_FETCH__UTILS_HPP
 
+#include <algorithm>
+#include <chrono>
 #include <sstream>
 #include <vector>
 
 namespace snmp_fetch {
 
+// microseconds of tokens a rate limit may send at once after being idle
+#define SNMP_FETCH__RATE_LIMIT_BURST 10000
+
+/**
+ *  token_bucket - A rate limit of rate tokens per second which holds up to burst tokens.  The
+ *  bucket is kept as the monotonic time (microseconds) it will have been refilled with the tokens
+ *  taken so far, which avoids refilling it on every call.  A rate of 0 is unlimited.
+ */
+struct token_bucket {
+  uint64_t rate;
+  uint64_t burst;
+  uint64_t refilled;
+};
+
+
 /**
  *  oid_to_string - Convert an oid (pointer format) to a string.
  *
@@ -32,6 +49,47 @@ oid_to_string(uint64_t *oid, size_t oid_size);
 std::string
 oid_to_string(std::vector<uint64_t> &oid);
 
+
+/**
+ *  monotonic_time - Get the current time from a monotonic clock.
+ *
+ *  @return Microseconds since an arbitrary, fixed point in time.
+ */
+uint64_t
+monotonic_time();
+
+
+/**
+ *  init_token_bucket - Create a full token bucket which holds SNMP_FETCH__RATE_LIMIT_BURST
+ *  microseconds of tokens, and at least one.
+ *
+ *  @param rate Tokens per second; 0 is unlimited.
+ *  @return     Token bucket.
+ */
+token_bucket
+init_token_bucket(uint64_t rate);
+
+
+/**
+ *  token_wait - Get the time until a token bucket holds a token.
+ *
+ *  @param bucket Reference to the token bucket.
+ *  @param now    Monotonic time (microseconds).
+ *  @return       Microseconds until a token can be taken; 0 if one can be taken now.
+ */
+uint64_t
+token_wait(const token_bucket &bucket, uint64_t now);
+
+
+/**
+ *  take_token - Take a token from a token bucket.  The caller MUST check one can be taken first.
+ *
+ *  @param bucket Reference to the token bucket.
+ *  @param now    Monotonic time (microseconds).
+ */
+void
+take_token(token_bucket &bucket, uint64_t now);
+
 }
 
 #endif
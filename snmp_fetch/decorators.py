@@ -24,6 +24,7 @@ def object_type(
         cls._parent = Maybe.from_optional(parent)  # pylint: disable=protected-access
         cls._oid = Maybe.from_optional(oid)  # pylint: disable=protected-access
         cls._parent.fmap(methodcaller('_append_child', cls))  # pylint: disable=protected-access
+        cls._invalidate_plans()  # pylint: disable=protected-access
         return cls
     return _object_type
 
@@ -1,51 +1,153 @@
 """Distributed friendly implementation."""
 
-from typing import Any, Iterator, Optional, Sequence, Text, Tuple, Type
+from typing import Any, Iterator, Optional, Sequence, Text, Tuple, Type, Union
 
 import numpy as np
 
-from . import PduType, SnmpConfig, SnmpError
+from . import PduType, SnmpConfig, SnmpError, UsmCredentials
 from .api import fetch as api_fetch
+from .api import fetch_iter as api_fetch_iter
 from .object_type import ObjectType
 
 RESERVED_COL_NAMES = [
     '#oid_size', '#result_size', '#result_type', '#oid', '#timestamp'
 ]
 
-HOST_T = Tuple[int, Text, Text]  # pylint: disable=invalid-name
+HOST_T = Tuple[int, Text, Union[Text, UsmCredentials]]  # pylint: disable=invalid-name
+WEIGHTED_HOST_T = Tuple[  # pylint: disable=invalid-name
+    int, Text, Union[Text, UsmCredentials], float
+]
+
+
+def split_weights(
+        hosts: Sequence[Union[HOST_T, WEIGHTED_HOST_T]]
+) -> Tuple[Sequence[HOST_T], Sequence[float]]:
+    """Split the weights from weighted hosts; hosts without a weight weigh 0.
+
+    The weights are empty when no host is weighted.
+    """
+    if not any(len(host) > 3 for host in hosts):
+        return hosts, []
+    return (
+        [host[:3] for host in hosts],  # type: ignore
+        [float(host[3]) if len(host) > 3 else 0.0 for host in hosts]  # type: ignore
+    )
 
 
 def fetch(
         pdu_type: PduType,
-        hosts: Sequence[HOST_T],
+        hosts: Sequence[Union[HOST_T, WEIGHTED_HOST_T]],
         var_bind: Type[ObjectType],
         parameter: Optional[Text] = None,
         config: Optional[SnmpConfig] = None
 ) -> Tuple[Sequence[np.ndarray], Sequence[SnmpError]]:
-    """Wrap the C API versions of fetch."""
+    """Wrap the C API versions of fetch.
+
+    Without hosts, e.g. for an empty DataFrame, the results are empty instead of raising.
+    """
+    if not hosts:
+        return [np.empty(0, dtype=np.uint8) for _ in var_bind.null_var_binds(parameter)], []
+    hosts, weights = split_weights(hosts)
     return api_fetch(
         pdu_type,
         hosts,
         var_bind.null_var_binds(parameter),
-        config=config if config is not None else SnmpConfig()
+        config=config if config is not None else SnmpConfig(),
+        index_specs=var_bind.index_specs(parameter),
+        weights=weights
+    )
+
+
+def fetch_iter(
+        pdu_type: PduType,
+        hosts: Sequence[Union[HOST_T, WEIGHTED_HOST_T]],
+        var_bind: Type[ObjectType],
+        parameter: Optional[Text] = None,
+        config: Optional[SnmpConfig] = None,
+        chunk_size: int = 1
+) -> Iterator[Tuple[Sequence[np.ndarray], Sequence[SnmpError]]]:
+    # pylint: disable=too-many-arguments
+    """Wrap the C API version of fetch_iter.
+
+    Without hosts, e.g. for an empty DataFrame, nothing is yielded instead of raising.
+    """
+    if not hosts:
+        return iter(())
+    hosts, weights = split_weights(hosts)
+    return api_fetch_iter(
+        pdu_type,
+        hosts,
+        var_bind.null_var_binds(parameter),
+        config=config if config is not None else SnmpConfig(),
+        chunk_size=chunk_size,
+        index_specs=var_bind.index_specs(parameter),
+        weights=weights
+    )
+
+
+def host_indices(
+        var_bind: Type[ObjectType], results: Sequence[np.ndarray],
+        parameter: Optional[Text] = None
+) -> np.ndarray:
+    """Get the unique host indexes of the rows in the results."""
+    return np.unique(np.concatenate([
+        np.empty(0, dtype=np.uint64), *[
+            # the host index is the first uint64 of each row
+            arr.view(np.uint64)[::(5 * 8 + oid_size + value_size) >> 3]
+            for arr, (_, (oid_size, value_size))
+            in zip(results, var_bind.null_var_binds(parameter))
+        ]
+    ]))
+
+
+def chunk_to_pandas(
+        object_type: Type[ObjectType], response: Tuple[Sequence[np.ndarray], Sequence[SnmpError]],
+        data: Any, index: Optional[Sequence[Text]] = None, parameter: Optional[Text] = None
+) -> Tuple[Tuple[Any, Sequence[SnmpError]], Any]:
+    """Map a chunk of completed hosts to a DataFrame with the data rows of those hosts.
+
+    Returns the DataFrame and errors of the chunk and the data rows of the hosts not in the chunk.
+    """
+    results, errors = response
+    completed = data.index.isin(host_indices(object_type, results, parameter))
+    return (
+        (object_type.to_pandas(results, data[completed], index, parameter), errors),
+        data[~completed]
     )
 
 
+def remaining_to_pandas(
+        object_type: Type[ObjectType], data: Any, index: Optional[Sequence[Text]] = None,
+        parameter: Optional[Text] = None
+) -> Tuple[Any, Sequence[SnmpError]]:
+    """Map the data rows of hosts without any results to a DataFrame."""
+    return object_type.to_pandas(
+        [np.empty(0, dtype=np.uint8) for _ in object_type.null_var_binds(parameter)],
+        data, index, parameter
+    ), []
+
+
 def to_pandas(
         object_type: Type[ObjectType], response: Tuple[Sequence[np.ndarray], Sequence[SnmpError]],
-        data: Optional[Any] = None, index: Optional[Sequence[Text]] = None
+        data: Optional[Any] = None, index: Optional[Sequence[Text]] = None,
+        parameter: Optional[Text] = None
 ) -> Tuple[Any, Sequence[SnmpError]]:
     """Wrap ObjectType.to_pandas to deconstruct the response tuple."""
     results, errors = response
-    return object_type.to_pandas(results, data, index), errors
+    return object_type.to_pandas(results, data, index, parameter), errors
 
 
 def distribute(
         df: Any,
         batch_size: Optional[int] = None,
         **kwargs: Any
-) -> Iterator[Tuple[Sequence[HOST_T], Any, Optional[Sequence[Text]]]]:
-    """Fetch SNMP results and map to a DataFrame."""
+) -> Iterator[Tuple[Sequence[Union[HOST_T, WEIGHTED_HOST_T]], Any, Optional[Sequence[Text]]]]:
+    """Fetch SNMP results and map to a DataFrame.
+
+    With weight naming a column of expected costs, each host is weighted by its value; the
+    heaviest hosts are opened first.  A custom get_hosts may weight the hosts the same way by
+    returning (index, host, community, weight) tuples.
+    """
     err_col_names = set([*df.index.names, *df.columns]).intersection(RESERVED_COL_NAMES)
     if err_col_names:
         raise ValueError(
@@ -54,6 +156,7 @@ def distribute(
 
     host_column = kwargs.pop('host', 'host')
     community_column = kwargs.pop('snmp_community', 'snmp_community')
+    weight_column = kwargs.pop('weight', None)
 
     index = None
     if df.index.names is not None and [i for i in df.index.names if i is not None]:
@@ -62,7 +165,12 @@ def distribute(
     df.index = df.index.set_names(['#index'])
     df = df.reset_index()
 
-    def default_get_hosts(df: Any) -> Sequence[HOST_T]:
+    def default_get_hosts(df: Any) -> Sequence[Union[HOST_T, WEIGHTED_HOST_T]]:
+        if weight_column is not None:
+            return [
+                (i, str(h), c, float(w)) for i, h, c, w
+                in df[['#index', host_column, community_column, weight_column]].values
+            ]
         return [
             (i, str(h), c) for i, h, c
             in df[['#index', host_column, community_column]].values
@@ -70,7 +178,9 @@ def distribute(
 
     get_hosts = kwargs.pop('get_hosts', default_get_hosts)
 
-    def _prepare(df: Any) -> Tuple[Sequence[HOST_T], Any, Optional[Sequence[Text]]]:
+    def _prepare(
+            df: Any
+    ) -> Tuple[Sequence[Union[HOST_T, WEIGHTED_HOST_T]], Any, Optional[Sequence[Text]]]:
         return (
             get_hosts(df),
             df.set_index('#index'),
@@ -78,7 +188,8 @@ def distribute(
         )
 
     if batch_size:
-        batched = [df[i:i+batch_size] for i in range(0, df.shape[0], batch_size)]
+        # an empty DataFrame is a single empty batch
+        batched = [df[i:i+batch_size] for i in range(0, df.shape[0], batch_size)] or [df]
         for batch in batched:
             yield _prepare(batch)
         return
@@ -0,0 +1,142 @@
+"""Declarative table indexes decoded by the C API.
+
+A table index is the list of suboids following the root oid of a table column.  An ObjectType may
+define its index as a sequence of IndexFields instead of a dtype.  The C API then decodes the
+suboids into the fields while copying each variable binding; no python code runs per row.
+
+    @object_type(IpNetToMediaTable, oid='.1.2')
+    class IpNetToMediaPhysAddress(ObjectType):
+        index = [integer('ipNetToMediaIfIndex'), ip_address('ipNetToMediaNetAddress')]
+        dtype = ...
+
+Length prefixed and implied fields are decoded to a '<name>_length' field holding the number of
+elements encoded in the index followed by the elements in '<name>'.  The elements are truncated
+to the size of the field; the length is not.
+"""
+
+from typing import Sequence, Text, Tuple, Union
+
+import attr
+import numpy as np
+
+from .api import IndexKind
+from .utils import concat_dtypes
+
+INDEX_FIELD_T = Tuple[IndexKind, int, int]  # pylint: disable=invalid-name
+
+
+def _align(size: int) -> int:
+    """Align a number of bytes to 8 bytes."""
+    return (size + 7) & ~0x07
+
+
+def _positive(_: 'IndexField', attribute: 'attr.Attribute[int]', value: int) -> None:
+    """Validate an attribute is positive."""
+    if value < 1:
+        raise ValueError(f'{attribute.name} must be positive: {value}')
+
+
+def _element(_: 'IndexField', attribute: 'attr.Attribute[np.dtype]', value: np.dtype) -> None:
+    """Validate an attribute is a uint8 or uint64 dtype."""
+    if value not in {np.dtype(np.uint8), np.dtype(np.uint64)}:
+        raise ValueError(f'{attribute.name} must be uint8 or uint64: {value}')
+
+
+@attr.s(frozen=True, slots=True)
+class IndexField:
+    """Field of a table index.
+
+    Size is the maximum number of elements of the field; each element is decoded from one suboid.
+    """
+
+    name: Text = attr.ib()
+    kind: IndexKind = attr.ib()
+    size: int = attr.ib(default=1, validator=_positive)
+    element: np.dtype = attr.ib(default=np.dtype(np.uint64), converter=np.dtype, validator=_element)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Get the dtype of the decoded field."""
+        if self.kind == IndexKind.INDEX_INTEGER:
+            return np.dtype([(self.name, np.uint64)])
+        elements = self.element if self.size == 1 else np.dtype((self.element, self.size))
+        if self.kind == IndexKind.INDEX_FIXED:
+            return np.dtype({
+                'names': [self.name],
+                'formats': [elements],
+                'offsets': [0],
+                'itemsize': _align(elements.itemsize)
+            })
+        return np.dtype({
+            'names': [f'{self.name}_length', self.name],
+            'formats': [np.uint64, elements],
+            'offsets': [0, 8],
+            'itemsize': 8 + _align(elements.itemsize)
+        })
+
+    @property
+    def spec(self) -> INDEX_FIELD_T:
+        """Get the field as passed to the C API."""
+        return (self.kind, self.size, self.element.itemsize)
+
+
+INDEX_T = Union[np.dtype, Sequence[IndexField]]  # pylint: disable=invalid-name
+
+
+def integer(name: Text) -> IndexField:
+    """Define an INTEGER, Unsigned32, etc. field."""
+    return IndexField(name, IndexKind.INDEX_INTEGER)
+
+
+def ip_address(name: Text) -> IndexField:
+    """Define an IpAddress field decoded to 4 bytes."""
+    return IndexField(name, IndexKind.INDEX_FIXED, 4, np.uint8)
+
+
+def fixed_octet_string(name: Text, size: int) -> IndexField:
+    """Define a fixed size OCTET STRING field, e.g. a MacAddress."""
+    return IndexField(name, IndexKind.INDEX_FIXED, size, np.uint8)
+
+
+def octet_string(name: Text, size: int, implied: bool = False) -> IndexField:
+    """Define a variable size OCTET STRING field of up to size bytes."""
+    return IndexField(
+        name,
+        IndexKind.INDEX_IMPLIED if implied else IndexKind.INDEX_LENGTH_PREFIXED,
+        size,
+        np.uint8
+    )
+
+
+def object_identifier(name: Text, size: int, implied: bool = False) -> IndexField:
+    """Define an OBJECT IDENTIFIER field of up to size suboids."""
+    return IndexField(
+        name,
+        IndexKind.INDEX_IMPLIED if implied else IndexKind.INDEX_LENGTH_PREFIXED,
+        size,
+        np.uint64
+    )
+
+
+def index_dtype(index: INDEX_T) -> np.dtype:
+    """Get the dtype of a decoded table index."""
+    if isinstance(index, np.dtype):
+        return index
+    return concat_dtypes([field.dtype for field in index])
+
+
+def index_spec(index: INDEX_T) -> Sequence[INDEX_FIELD_T]:
+    """Get a table index as passed to the C API.
+
+    A dtype index is the raw suboids of the index and is copied as is.
+    """
+    if isinstance(index, np.dtype):
+        if index.itemsize % 8 != 0:
+            raise ValueError(f'dtype index must be 64bit aligned: {index}')
+        return [(IndexKind.INDEX_FIXED, index.itemsize >> 3, 8)]
+    return [field.spec for field in index]
+
+
+def is_declarative(index: INDEX_T) -> bool:
+    """Test if a table index is decoded from IndexFields."""
+    return not isinstance(index, np.dtype)
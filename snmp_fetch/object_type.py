@@ -5,35 +5,116 @@ import pprint
 from collections import defaultdict
 from functools import partial, reduce
 from operator import attrgetter, methodcaller
-from typing import Any, Callable, DefaultDict, Dict, Optional, Sequence, Text, Tuple, cast
+from typing import Any, Callable, DefaultDict, Dict, Mapping, Optional, Sequence, Text, Tuple, cast
 
+import attr
 import numpy as np
 import pandas as pd
-from toolz.functoolz import compose
 
 from .fp.maybe import Just, Maybe, Nothing
+from .index_spec import INDEX_FIELD_T, INDEX_T, index_dtype, index_spec, is_declarative
 from .utils import concatv_dtypes, convert_oid, dtype_array, dtype_fields, validate_oid
 
 NULL_VAR_BIND_T = Tuple[Sequence[int], Tuple[int, int]]  # pylint: disable=invalid-name
 
 
+def to_frame(arr: np.ndarray) -> Any:
+    """Build a DataFrame column by column from a structured array.
+
+    Scalar fields become native columns of the structured view.  Subarray fields become object
+    columns holding one array view per row and nested structured fields hold one tuple per row.
+    """
+    def _column(name: Text) -> Any:
+        column = arr[name]
+        if column.dtype.names is not None:
+            return pd.Series(column.tolist(), dtype=object)
+        if column.ndim > 1:
+            return pd.Series(list(column), dtype=object)
+        if name == '#index' and (not column.size or column.max() <= np.iinfo(np.int64).max):
+            # match the host index of the data merged into the results; a larger index is kept
+            # unsigned rather than wrapped negative
+            return pd.Series(column.astype(np.int64))
+        return pd.Series(column)
+
+    # dicts are ordered; passing columns would cast every column to object to align it
+    return pd.DataFrame({name: _column(name) for name in arr.dtype.names})
+
+
+def to_record_batch(arr: np.ndarray) -> Any:
+    """Build an Arrow RecordBatch column by column from a structured array.
+
+    Each field is packed into a contiguous buffer that Arrow wraps without a copy; a view with a
+    single field is wrapped as is.  Subarray fields become fixed size lists and nested structured
+    fields become struct columns.  No python object is created per row.
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+    def _array(column: np.ndarray) -> Any:
+        if column.dtype.names is not None:
+            return pa.StructArray.from_arrays(
+                [_array(column[name]) for name in column.dtype.names],
+                list(column.dtype.names)
+            )
+        if column.ndim > 1:
+            values = _array(column.reshape(-1, *column.shape[2:]))
+            return pa.FixedSizeListArray.from_arrays(values, column.shape[1])
+        return pa.array(np.ascontiguousarray(column))
+
+    return pa.RecordBatch.from_arrays(
+        [_array(arr[name]) for name in arr.dtype.names], list(arr.dtype.names)
+    )
+
+
+HOOK_T = Callable[[Any], Any]  # pylint: disable=invalid-name
+
+
+def apply_hooks(hooks: Sequence[HOOK_T], x: Any) -> Any:
+    """Apply a chain of hooks in order."""
+    return reduce(lambda acc, hook: hook(acc), hooks, x)
+
+
+@attr.s(frozen=True, slots=True)
+class ColumnPlan:
+    """Compiled plan of one ObjectType column."""
+
+    object_types: Sequence['MetaObjectType'] = attr.ib()
+    view_dtype: Maybe[np.dtype] = attr.ib()
+    hooks: Mapping[Text, Sequence[HOOK_T]] = attr.ib()
+    index_spec: Sequence[INDEX_FIELD_T] = attr.ib()
+
+
+@attr.s(frozen=True, slots=True)
+class FetchPlan:
+    """Compiled plan of an ObjectType and parameter.
+
+    Holds the null variable bindings of the request and a plan per ObjectType column with its view
+    dtype, flattened hook chains and index spec.  The merge hooks span every column.
+    """
+
+    null_var_binds: Sequence[NULL_VAR_BIND_T] = attr.ib()
+    columns: Sequence[ColumnPlan] = attr.ib()
+    hooks: Mapping[Text, Sequence[HOOK_T]] = attr.ib()
+
+
 class MetaObjectType(type):
     """Metaclass for ObjectTypes."""
 
-    index: Optional[np.dtype] = None
+    index: Optional[INDEX_T] = None
     dtype: Optional[np.dtype] = None
     _parent: Maybe['MetaObjectType'] = Nothing()
     _children: Dict[Text, 'MetaObjectType']
     _oid: Maybe[Text] = Nothing()
     _hooks: DefaultDict[Text, Sequence[Callable[[Any], Any]]]
+    _plans: Dict[Optional[Text], FetchPlan]
 
     def __init__(
             cls, class_name: Text, bases: Tuple[type, ...], attrs: Dict[Text, Any]
     ) -> None:
         """Initialize ObjectType."""
         super().__init__(class_name, bases, attrs)
-        Maybe.from_optional(cls.index).fmap(dtype_fields).fmap(methodcaller('throw'))
+        cls._index.fmap(dtype_fields).fmap(methodcaller('throw'))
         Maybe.from_optional(cls.dtype).fmap(dtype_fields).fmap(methodcaller('throw'))
+        cls._plans = {}
         cls._parent.fmap(methodcaller('_append_child', cls))
         cls._children = {}
         cls._oid.fmap(validate_oid)
@@ -55,6 +136,12 @@ class MetaObjectType(type):
     def _append_child(cls, child: 'MetaObjectType') -> None:
         """Append a child ObjectType to this ObjectType."""
         cls._children['.'.join([child.__module__, child.__qualname__])] = child
+        cls._invalidate_plans()
+
+    def _invalidate_plans(cls) -> None:
+        """Discard the compiled plans of this ObjectType and its ancestors."""
+        cls._plans = {}
+        cls._parent.fmap(methodcaller('_invalidate_plans'))
 
     _header_dtype = Just(np.dtype([
         ('#index', np.uint64),
@@ -79,7 +166,7 @@ class MetaObjectType(type):
     def _index(cls) -> Maybe[np.dtype]:
         # pylint: disable=no-member
         """Get the index dtype."""
-        return Maybe.from_optional(cls.index)
+        return Maybe.from_optional(cls.index).fmap(index_dtype)
 
     @property
     def _dtype(cls) -> Maybe[np.dtype]:
@@ -101,6 +188,59 @@ class MetaObjectType(type):
             cls, param: Optional[Text] = None
     ) -> Sequence[NULL_VAR_BIND_T]:
         """Get a description of null variable bindings to be filled."""
+        return cls._plan(param).null_var_binds
+
+    def index_specs(
+            cls, param: Optional[Text] = None
+    ) -> Sequence[Sequence[INDEX_FIELD_T]]:
+        """Get the index specs of the null variable bindings; empty if no index is decoded."""
+        return [column.index_spec for column in cls._plan(param).columns]
+
+    def _plan(cls, param: Optional[Text] = None) -> FetchPlan:
+        """Get the fetch plan of a parameter, compiling it on first use.
+
+        Plans are discarded when a child is added to this ObjectType or one of its descendants.
+        """
+        plan = cls._plans.get(param)
+        if plan is None:
+            plan = cls._plans[param] = cls._compile_plan(param)
+        return plan
+
+    def _compile_plan(cls, param: Optional[Text] = None) -> FetchPlan:
+        """Compile the fetch plan of a parameter."""
+        def _hooks(
+                object_types: Sequence[MetaObjectType], names: Sequence[Text]
+        ) -> Mapping[Text, Sequence[HOOK_T]]:
+            # pylint: disable=protected-access
+            # compose applies the hooks of each ObjectType last to first
+            return {
+                name: tuple(
+                    hook for x in object_types for hook in reversed(x._hooks[name])
+                )
+                for name in names
+            }
+
+        matrix = cls._matrix
+        return FetchPlan(
+            cls._null_var_binds(param),
+            [
+                ColumnPlan(
+                    col, cls._view_dtype(col),
+                    _hooks(col, ['before_view', 'after_view', 'before_pivot']),
+                    cls._index_spec(col)
+                )
+                for col in matrix  # pylint: disable=not-an-iterable
+            ],
+            _hooks(
+                [var_bind for col in matrix for var_bind in col],  # pylint: disable=not-an-iterable
+                ['before_merge', 'after_merge']
+            )
+        )
+
+    def _null_var_binds(
+            cls, param: Optional[Text] = None
+    ) -> Sequence[NULL_VAR_BIND_T]:
+        """Build the null variable bindings to be filled."""
         def _check(null_var_bind: NULL_VAR_BIND_T) -> NULL_VAR_BIND_T:
             for size in null_var_bind[1]:
                 if size % 8 != 0:
@@ -152,7 +292,20 @@ class MetaObjectType(type):
             for col in matrix  # pylint: disable=not-an-iterable
         ]
 
-    def _view(cls, arr: np.ndarray, col: Sequence['MetaObjectType']) -> Any:
+    @staticmethod
+    def _index_spec(col: Sequence['MetaObjectType']) -> Sequence[INDEX_FIELD_T]:
+        """Build the index spec of an ObjectType column.
+
+        The spec is empty unless an index of the column is declarative; the C API then copies the
+        raw suboids.
+        """
+        indexes = [x.index for x in col if x.index is not None]
+        if not any(map(is_declarative, indexes)):
+            return []
+        return [field for index in indexes for field in index_spec(index)]
+
+    def _view_dtype(cls, col: Sequence['MetaObjectType']) -> Maybe[np.dtype]:
+        """Build the dtype of the structured view of an ObjectType column."""
         oid_dtype = (
             dtype_array(
                 np.dtype(np.uint64),
@@ -164,36 +317,19 @@ class MetaObjectType(type):
         )
         index_dtype = Maybe.reduce(concatv_dtypes, map(attrgetter('_index'), col))
         value_dtype = Maybe.reduce(concatv_dtypes, map(attrgetter('_dtype'), col))
-        view_dtype = Maybe.reduce(
+        return Maybe.reduce(
             concatv_dtypes, [cls._header_dtype, oid_dtype, index_dtype, value_dtype]
         )
 
-        arr = reduce(lambda acc, var_bind: cast(
-            np.ndarray,
-            compose(*var_bind._hooks['before_view'])(acc)  # pylint: disable=protected-access
-        ), col, arr)
-        arr = view_dtype.fmap(arr.view).from_maybe(arr)  # type: ignore
-        arr = reduce(lambda acc, var_bind: cast(
-            np.ndarray,
-            compose(*var_bind._hooks['after_view'])(acc)  # pylint: disable=protected-access
-        ), col, arr)
-
-        df = pd.DataFrame.from_records(
-            arr.tolist(), columns=arr.dtype.names
-        )
-
-        # clean up dtypes of empty result
-        if arr.size == 0:
-            if isinstance(view_dtype, Just) and view_dtype.value.fields is not None:
-                for column, dtype in view_dtype.value.fields.items():
-                    try:
-                        df[column] = df[column].astype(dtype[0])
-                    except ValueError:
-                        df[column] = df[column].astype(object)
+    def _struct_view(cls, arr: np.ndarray, column: ColumnPlan) -> np.ndarray:
+        """View the raw results of an ObjectType column as a structured array."""
+        arr = apply_hooks(column.hooks['before_view'], arr)
+        arr = column.view_dtype.fmap(arr.view).from_maybe(arr)  # type: ignore
+        return cast(np.ndarray, apply_hooks(column.hooks['after_view'], arr))
 
-        df = reduce(lambda acc, var_bind: (
-            compose(*var_bind._hooks['before_pivot'])(acc)  # pylint: disable=protected-access
-        ), col, df)
+    def _view(cls, arr: np.ndarray, column: ColumnPlan) -> Any:
+        """View the raw results of an ObjectType column as a DataFrame."""
+        df = apply_hooks(column.hooks['before_pivot'], to_frame(cls._struct_view(arr, column)))
 
         if df.index.names is not None and [i for i in df.index.names if i is not None]:
             df = df.reset_index().set_index(['#index', *df.index.names])
@@ -207,8 +343,8 @@ class MetaObjectType(type):
         )
 
     @staticmethod
-    def _pivot(a: Any, b: Any) -> Any:  # type: ignore
-        """Pivot two ObjectType columns into a DataFrame."""
+    def _merge(a: Any, b: Any) -> Any:  # type: ignore
+        """Merge two ObjectType columns into a DataFrame."""
         df = pd.merge(a, b, how='outer', left_index=True, right_index=True)
         df['#timestamp'] = (
             df[['#timestamp_x', '#timestamp_y']]
@@ -217,37 +353,60 @@ class MetaObjectType(type):
         )
         return df.drop(columns=['#timestamp_x', '#timestamp_y'])
 
+    def _pivot(cls, dfs: Sequence[Any]) -> Any:
+        """Pivot ObjectType columns into a DataFrame.
+
+        Columns are aligned on their index in a single outer join.  Pairwise merges are only
+        used when an index is not unique as the rows cannot be aligned by index alone, or when
+        the columns share a name which the join would duplicate rather than suffix.
+        """
+        columns = [name for df in dfs for name in df.columns if name != '#timestamp']
+        if (
+                len(dfs) == 1 or not all(df.index.is_unique for df in dfs) or
+                len(columns) != len(set(columns))
+        ):
+            return reduce(cls._merge, dfs)
+        timestamps = [f'#timestamp_{i}' for i in range(len(dfs))]
+        df = pd.concat(
+            [df.rename(columns={'#timestamp': ts}) for df, ts in zip(dfs, timestamps)],
+            axis=1, join='outer'
+        ).sort_index()
+        df['#timestamp'] = df[timestamps].max(axis=1).astype('datetime64[s]')
+        return df.drop(columns=timestamps)
+
     def to_pandas(
             cls, response: Sequence[np.ndarray], data: Optional[Any] = None,
-            index: Optional[Sequence[Text]] = None
+            index: Optional[Sequence[Text]] = None, parameter: Optional[Text] = None
     ) -> Any:
         # pylint: disable=no-value-for-parameter
         """Reduce stuff."""
-        matrix = cls._matrix
-        df = reduce(cls._pivot, [cls._view(arr, col) for arr, col in zip(response, matrix)])
+        plan = cls._plan(parameter)
+        df = cls._pivot([cls._view(arr, column) for arr, column in zip(response, plan.columns)])
         df['#timestamp'] = df['#timestamp'].dt.tz_localize('UTC')
         df = df.reset_index().set_index('#index')
-        df, data = reduce(
-            lambda acc, var_bind: cast(
-                Tuple[Any, Optional[Any]],
-                compose(*var_bind._hooks['before_merge'])(acc)  # pylint: disable=protected-access
-            ),
-            [var_bind for col in matrix for var_bind in col],  # pylint: disable=not-an-iterable
-            (df, data)
+        df, data = cast(
+            Tuple[Any, Optional[Any]], apply_hooks(plan.hooks['before_merge'], (df, data))
         )
         if data is not None:
             df = df.merge(data, how='outer', left_index=True, right_index=True)
         df = df.reset_index(drop=True)
         if index is not None:
             df = df.set_index(index)
-        df = reduce(
-            lambda acc, var_bind: (
-                compose(*var_bind._hooks['after_merge'])(acc)  # pylint: disable=protected-access
-            ),
-            [var_bind for col in matrix for var_bind in col],  # pylint: disable=not-an-iterable
-            df
-        )
-        return df
+        return apply_hooks(plan.hooks['after_merge'], df)
+
+    def to_arrow(
+            cls, response: Sequence[np.ndarray], parameter: Optional[Text] = None
+    ) -> Sequence[Any]:
+        """Map the results to an Arrow RecordBatch per ObjectType column.
+
+        Each batch holds the full records of the column, including the reserved columns, with the
+        host in '#index'.  The before_view and after_view hooks are applied; the pandas hooks are
+        not.  Requires pyarrow.
+        """
+        return [
+            to_record_batch(cls._struct_view(arr, column))
+            for arr, column in zip(response, cls._plan(parameter).columns)
+        ]
 
     @property
     def description(cls) -> Text:
@@ -1,12 +1,14 @@
 """Extended DataFrame functionality."""
 
-from typing import Any, Iterator, Optional, Sequence, Text, Tuple, Union, cast
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Text, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
-from snmp_fetch.utils import cuint8_to_int
 from .types import ip_address as ip
+from .types.inet import INET_DTYPE, InetArray, InetDtype
 
 
 def column_names(
@@ -28,6 +30,81 @@ def column_names(
         yield base + column
 
 
+def stack_buffers(obj: Any) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Stack the buffers of a Series into 2-D arrays grouped by buffer length.
+
+    Yields the positions of the rows in the Series with the stacked buffers of those rows.
+    """
+    values = obj.values
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    order = np.argsort(lengths, kind='stable')
+    for positions in np.split(order, np.flatnonzero(np.diff(lengths[order])) + 1):
+        if positions.size:
+            yield positions, np.concatenate(values[positions]).reshape(
+                positions.size, lengths[positions[0]]
+            )
+
+
+BUFFER_COLUMN_T = Union[np.ndarray, Sequence[Any]]  # pylint: disable=invalid-name
+
+
+def gather_buffers(
+        obj: Any, f: Callable[[np.ndarray], Sequence[BUFFER_COLUMN_T]], columns: Sequence[Text]
+) -> Dict[Text, np.ndarray]:
+    """Map the stacked buffers of a Series to a 1-D array per column.
+
+    The function maps each group of stacked buffers to a value per row for each column, either as
+    a 1-D array or a sequence of python objects.  The dtype of a column is promoted to hold the
+    values of every group.  A column is missing if the Series is empty.
+    """
+    out: Dict[Text, np.ndarray] = {}
+    for positions, arr in stack_buffers(obj):
+        for column, values in zip(columns, f(arr)):
+            dtype = values.dtype if isinstance(values, np.ndarray) else np.dtype(object)
+            dest = out.get(column)
+            if dest is None:
+                dest = np.empty(len(obj), dtype=dtype)
+            elif dest.dtype != dtype:
+                dest = dest.astype(np.result_type(dest.dtype, dtype))
+            out[column] = dest
+            if isinstance(values, np.ndarray):
+                dest[positions] = values
+            else:
+                # assign one at a time; numpy would inspect each object as a possible sequence
+                for i, x in zip(positions.tolist(), values):
+                    dest[i] = x
+    return out
+
+
+def map_buffers(
+        obj: Any, f: Callable[[np.ndarray], Sequence[BUFFER_COLUMN_T]], columns: Sequence[Text]
+) -> Any:
+    """Map the stacked buffers of a Series to the columns of a DataFrame."""
+    out = gather_buffers(obj, f, columns)
+    return pd.DataFrame(
+        {column: out.get(column, np.empty(0, dtype=object)) for column in columns},
+        columns=columns, index=obj.index
+    )
+
+
+def big_endian(arr: np.ndarray) -> np.ndarray:
+    """Convert each row of a (n, 4) or (n, 8) array of bytes to an unsigned integer."""
+    return arr.astype(np.uint8).view(f'>u{arr.shape[1]}')[:, 0].astype(f'u{arr.shape[1]}')
+
+
+def ipv4_addresses(arr: np.ndarray) -> Sequence[ip.IPv4Address]:
+    """Convert each row of a (n, 4) array of bytes to an IPv4Address."""
+    return list(map(ip.IPv4Address, big_endian(arr).tolist()))
+
+
+def ipv6_addresses(arr: np.ndarray) -> Sequence[ip.IPv6Address]:
+    """Convert each row of a (n, 16) array of bytes to an IPv6Address."""
+    return list(map(
+        lambda hi, lo: ip.IPv6Address(hi << 64 | lo),
+        big_endian(arr[:, :8]).tolist(), big_endian(arr[:, 8:]).tolist()
+    ))
+
+
 @pd.api.extensions.register_dataframe_accessor('inet')
 class InetDataFrameAccessor:
     # pylint: disable=too-few-public-methods
@@ -39,43 +116,36 @@ class InetDataFrameAccessor:
         """Initialize the pandas extension."""
         self.obj = obj
 
-    def to_interface_address(self) -> Any:
-        """Return a composable function to convert an IP address and mask/prefix to a network."""
-        def _to_int_address(
-                objs: Tuple[ip.IP_ADDRESS_T, Union[int, ip.IP_ADDRESS_T]]
-        ) -> ip.IP_INTERFACE_T:
-            ip_address, cidr_or_mask = objs
-            if isinstance(cidr_or_mask, ip.IPv4Address):
-                cidr_or_mask = ip.IPV4_PREFIX_LOOKUP_TABLE[int(cidr_or_mask)]
-            if isinstance(cidr_or_mask, ip.IPv6Address):
-                cidr_or_mask = ip.IPV6_PREFIX_LOOKUP_TABLE[int(cidr_or_mask)]
-            return cast(
-                ip.IP_INTERFACE_T,
-                ip.ip_interface((ip_address, cidr_or_mask))
-            )
+    def _address_prefixes(self) -> Tuple[InetArray, np.ndarray]:
+        """Pack the address column and convert the mask/prefix column to prefix lengths."""
+        addresses, prefixes = self.obj.iloc[:, 0].array, self.obj.iloc[:, 1]
+        if not isinstance(addresses, InetArray):
+            addresses = InetArray(np.asarray(addresses))
+        if pd.api.types.is_integer_dtype(prefixes.dtype):
+            return addresses, prefixes.values.astype(np.int64)
+        values = prefixes.values
+        masks = np.fromiter(
+            map(isinstance, values, repeat((ip.IPv4Address, ip.IPv6Address))),
+            dtype=bool, count=len(values)
+        )
+        prefixlen = np.empty(len(values), dtype=np.int64)
+        prefixlen[masks] = InetArray(values[masks]).netmask_prefixlen()
+        prefixlen[~masks] = values[~masks].astype(np.int64)
+        return addresses, prefixlen
 
+    def to_interface_address(self) -> Any:
+        """Convert an IP address and mask/prefix to an interface."""
         if self.obj.empty:
             return pd.Series([])
-        return self.obj.apply(_to_int_address, axis=1)
+        addresses, prefixlen = self._address_prefixes()
+        return pd.Series(addresses.to_interface_address(prefixlen), index=self.obj.index)
 
     def to_cidr_address(self, strict: bool = False) -> Any:
-        """Return a composable function to convert an IP address and mask/prefix to a network."""
-        def _to_cidr_address(
-                objs: Tuple[ip.IP_ADDRESS_T, Union[int, ip.IP_ADDRESS_T]]
-        ) -> ip.IP_NETWORK_T:
-            ip_address, cidr_or_mask = objs
-            if isinstance(cidr_or_mask, ip.IPv4Address):
-                cidr_or_mask = ip.IPV4_PREFIX_LOOKUP_TABLE[int(cidr_or_mask)]
-            if isinstance(cidr_or_mask, ip.IPv6Address):
-                cidr_or_mask = ip.IPV6_PREFIX_LOOKUP_TABLE[int(cidr_or_mask)]
-            return cast(
-                ip.IP_NETWORK_T,
-                ip.ip_network((ip_address, cidr_or_mask), strict=strict)
-            )
-
+        """Convert an IP address and mask/prefix to a network."""
         if self.obj.empty:
             return pd.Series([])
-        return self.obj.apply(_to_cidr_address, axis=1)
+        addresses, prefixlen = self._address_prefixes()
+        return pd.Series(addresses.to_cidr_address(prefixlen, strict), index=self.obj.index)
 
 
 @pd.api.extensions.register_series_accessor('inet')
@@ -96,65 +166,86 @@ class InetSeriesAccessor:
             self.obj = obj
 
         def __getitem__(self, ss: Union[int, slice, Tuple[Union[int, slice], ...]]) -> Any:
-            """Slice the buffer."""
-            if isinstance(ss, (int, slice)):
-                return self.obj.apply(lambda x: x[ss])
+            """Slice the buffer.
+
+            A slice returns a view of each buffer which gains nothing from stacking the buffers.
+            """
+            if isinstance(ss, slice):
+                return self.obj.map(itemgetter(ss))
+            if isinstance(ss, int):
+                return self[(ss,)][next(column_names(1))].rename(self.obj.name)
             if isinstance(ss, tuple):
-                return pd.DataFrame(
-                    self.obj.apply(lambda x: [x[s] for s in ss]).tolist(),
-                    columns=list(column_names(len(ss))),
-                    index=self.obj.index
+                return map_buffers(
+                    self.obj,
+                    lambda arr: [arr[:, s] if isinstance(s, int) else list(arr[:, s]) for s in ss],
+                    list(column_names(len(ss)))
                 )
             raise RuntimeError(f'Not a valid input slice: {ss}')
 
         def chunk(self) -> Any:
             """Slice the buffer by a sized parameter."""
-            return pd.DataFrame(
-                self.obj.apply(lambda x: (x[1:int(x[0])+1], x[int(x[0])+1:])).tolist(),
-                columns=list(column_names(2)),
-                index=self.obj.index
-            )
+            def _chunk(arr: np.ndarray) -> Sequence[BUFFER_COLUMN_T]:
+                # rows of a group share a length but each has its own size parameter
+                sizes = arr[:, 0].astype(np.int64)
+                heads = np.empty(len(arr), dtype=object)
+                tails = np.empty(len(arr), dtype=object)
+                for size in np.unique(sizes):
+                    rows = np.flatnonzero(sizes == size)
+                    for i, head, tail in zip(
+                            rows.tolist(), arr[rows, 1:size + 1], arr[rows, size + 1:]
+                    ):
+                        heads[i] = head
+                        tails[i] = tail
+                return [heads, tails]
+
+            return map_buffers(self.obj, _chunk, list(column_names(2)))
 
     def __init__(self, obj: Any) -> None:
         """Initialize the pandas extension."""
         self.obj = obj
         self.buffer = self.InetSeriesBufferAccessor(obj)
 
-    def to_inet_address(self, default_zone: Any = None) -> Any:
-        """Extract an inet address with leading address size and possible zone."""
-        def _to_inet_address(buffer: np.ndarray) -> Tuple[ip.IP_ADDRESS_T, Any]:
-            if len(buffer) == 4:
-                return (
-                    ip.IPv4Address(cuint8_to_int(buffer)),
-                    default_zone
-                )
-            if len(buffer) == 16:
-                return (
-                    ip.IPv6Address(cuint8_to_int(buffer)),
-                    default_zone
-                )
-            if len(buffer) == 8:
-                return (
-                    ip.IPv4Address(cuint8_to_int(buffer[:4])),
-                    cuint8_to_int(buffer[4:])
-                )
-            if len(buffer) == 20:
-                return (
-                    ip.IPv6Address(cuint8_to_int(buffer[:16])),
-                    cuint8_to_int(buffer[16:])
-                )
-            raise TypeError(f'INET Address size not understood: {buffer}')
-        return pd.DataFrame(
-            self.obj.apply(_to_inet_address).tolist(),
-            columns=list(column_names(2)),
-            index=self.obj.index
-        )
+    def to_inet_address(self, default_zone: Any = None, dtype: Any = None) -> Any:
+        """Extract an inet address with leading address size and possible zone.
+
+        The addresses are python objects unless the dtype is 'inet' in which case they are packed
+        into an InetArray without creating an object per row.
+        """
+        packed = dtype is not None and pd.api.types.pandas_dtype(dtype) == InetDtype()
+
+        def _addresses(arr: np.ndarray) -> BUFFER_COLUMN_T:
+            if packed:
+                return InetArray.from_packed(arr)._data
+            return ipv4_addresses(arr) if arr.shape[1] == 4 else ipv6_addresses(arr)
+
+        def _to_inet_address(arr: np.ndarray) -> Sequence[BUFFER_COLUMN_T]:
+            length = arr.shape[1]
+            if length in {4, 16}:
+                return [_addresses(arr), np.full(len(arr), default_zone)]
+            if length in {8, 20}:
+                return [_addresses(arr[:, :length - 4]), big_endian(arr[:, length - 4:])]
+            raise TypeError(f'INET Address size not understood: {arr[0]}')
+
+        columns = list(column_names(2))
+        if not packed:
+            return map_buffers(self.obj, _to_inet_address, columns)
+        out = gather_buffers(self.obj, _to_inet_address, columns)
+        return pd.DataFrame({
+            columns[0]: InetArray(out.get(columns[0], np.empty(0, dtype=INET_DTYPE))),
+            columns[1]: out.get(columns[1], np.empty(0, dtype=object))
+        }, columns=columns, index=self.obj.index)
 
     def to_object_identifier(self) -> Any:
         """Extract an object identifier buffer as a string."""
-        def _to_object_identifier(buffer: np.ndarray) -> Text:
-            return '.'+'.'.join(buffer.astype(str))
-        return self.obj.apply(_to_object_identifier)
+        def _to_object_identifier(arr: np.ndarray) -> Sequence[BUFFER_COLUMN_T]:
+            if not arr.shape[1]:
+                return [['.'] * len(arr)]
+            # format every row in a single pass over the flattened suboids
+            fmt = '.%d' * arr.shape[1] + '\n'
+            return [(fmt * len(arr) % tuple(arr.ravel().tolist())).split('\n')[:-1]]
+
+        column = next(column_names(1))
+        return map_buffers(self.obj, _to_object_identifier, [column])[column].rename(self.obj.name)
 
     def to_timedelta(
             self, denominator: int = 1, unit: Text = 'seconds'
@@ -0,0 +1,377 @@
+"""Compact IP address extension type.
+
+An InetArray stores each address as a packed (version, hi, lo) record of 17 bytes where hi and lo
+are the upper and lower 64 bits of the address.  IPv4 addresses are stored in lo.  A version of 0
+is a missing address.  Records compare by version then address, i.e. every IPv4 address sorts
+before every IPv6 address, matching the patched ipaddress comparisons.
+
+    >>> pd.Series(['10.0.0.1', '::1'], dtype='inet')
+"""
+
+import operator
+from ipaddress import _BaseAddress  # type: ignore
+from typing import Any, Callable, Optional, Sequence, Text, Tuple, Type, Union, cast
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, take
+
+from . import ip_address as ip
+
+INET_DTYPE = np.dtype([('version', np.uint8), ('hi', np.uint64), ('lo', np.uint64)])
+
+UINT64_MAX = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+INET_SCALAR_T = Union[ip.IP_ADDRESS_T, Text, int, bytes, None]  # pylint: disable=invalid-name
+
+
+@register_extension_dtype
+class InetDtype(ExtensionDtype):
+    """Compact IPv4 and IPv6 address dtype."""
+
+    name = 'inet'
+    type = _BaseAddress
+    kind = 'O'
+    na_value = np.nan
+
+    @classmethod
+    def construct_from_string(cls, string: Text) -> 'InetDtype':
+        """Construct the dtype from its name."""
+        if string == cls.name:
+            return cls()
+        raise TypeError(f"Cannot construct a '{cls.__name__}' from '{string}'")
+
+    @classmethod
+    def construct_array_type(cls) -> Type['InetArray']:
+        """Get the array type of the dtype."""
+        return InetArray
+
+
+def _record(scalar: INET_SCALAR_T) -> Tuple[int, int, int]:
+    """Pack an IP address as a (version, hi, lo) record."""
+    if scalar is None or (isinstance(scalar, float) and np.isnan(scalar)):
+        return (0, 0, 0)
+    if not isinstance(scalar, (ip.IPv4Address, ip.IPv6Address)):
+        scalar = ip.ip_address(scalar)
+    value = int(scalar)
+    return (scalar.version, value >> 64, value & 0xFFFFFFFFFFFFFFFF)
+
+
+def _records(values: Sequence[INET_SCALAR_T]) -> np.ndarray:
+    """Pack a sequence of IP addresses as records.
+
+    Address objects are packed in bulk; any other value falls back to packing one at a time.
+    """
+    try:
+        versions = np.fromiter(
+            map(operator.attrgetter('version'), values), dtype=np.uint8, count=len(values)
+        )
+        ints = np.array(list(map(int, values)), dtype=object)
+    except (AttributeError, TypeError, ValueError):
+        return np.array([_record(x) for x in values], dtype=INET_DTYPE)
+    data = np.empty(len(values), dtype=INET_DTYPE)
+    data['version'] = versions
+    data['hi'] = ints >> 64
+    data['lo'] = ints & 0xFFFFFFFFFFFFFFFF
+    return data
+
+
+def _host_masks(version: np.ndarray, prefixlen: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the (hi, lo) masks of the host bits of each prefix length."""
+    width = np.where(version == 4, 32, 128)
+    prefixlen = np.asarray(prefixlen, dtype=np.int64)
+    if ((prefixlen < 0) | (prefixlen > width)).any():
+        raise ValueError('prefix length out of range for the address version')
+    host = width - prefixlen
+
+    def _ones(bits: np.ndarray) -> np.ndarray:
+        # numpy shifts of 64 bits or more are undefined; clamp and fill them separately
+        shifted = np.left_shift(np.uint64(1), np.minimum(bits, 63).astype(np.uint64))
+        return np.where(bits >= 64, UINT64_MAX, shifted - np.uint64(1)).astype(np.uint64)
+
+    return _ones(np.clip(host - 64, 0, 64)), _ones(np.clip(host, 0, 64))
+
+
+def popcount(arr: np.ndarray) -> np.ndarray:
+    """Count the set bits of each element of a uint64 array."""
+    arr = arr - ((arr >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    arr = (arr & np.uint64(0x3333333333333333)) + (
+        (arr >> np.uint64(2)) & np.uint64(0x3333333333333333)
+    )
+    arr = (arr + (arr >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (arr * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class InetArray(ExtensionArray):
+    """Compact array of IPv4 and IPv6 addresses."""
+
+    _data: np.ndarray
+
+    def __init__(self, values: Any, copy: bool = False) -> None:
+        """Wrap an array of INET_DTYPE records or convert a sequence of addresses."""
+        if isinstance(values, InetArray):
+            values = values._data
+        if not (isinstance(values, np.ndarray) and values.dtype == INET_DTYPE):
+            values = _records(values if isinstance(values, (list, np.ndarray)) else list(values))
+        self._data = values.copy() if copy else values
+
+    @classmethod
+    def _from_sequence(
+            cls, scalars: Any, dtype: Optional[Any] = None, copy: bool = False
+    ) -> 'InetArray':
+        """Construct an array from a sequence of addresses."""
+        return cls(scalars, copy=copy)
+
+    @classmethod
+    def _from_factorized(cls, values: np.ndarray, original: 'InetArray') -> 'InetArray':
+        """Construct an array from the unique values of a factorization."""
+        return cls(np.array(values, dtype=f'S{INET_DTYPE.itemsize}').view(INET_DTYPE))
+
+    @classmethod
+    def from_packed(cls, arr: np.ndarray) -> 'InetArray':
+        """Construct an array from a (n, 4) or (n, 16) array of network order address bytes.
+
+        This is the layout of the IpAddress and InetAddress OCTET STRINGs returned by the C API.
+        """
+        arr = np.asarray(arr, dtype=np.uint8)
+        if arr.ndim != 2 or arr.shape[1] not in {4, 16}:
+            raise TypeError(f'INET Address size not understood: {arr.shape}')
+        data = np.zeros(len(arr), dtype=INET_DTYPE)
+        data['version'] = 4 if arr.shape[1] == 4 else 6
+        words = np.ascontiguousarray(arr).view(f'>u{min(arr.shape[1], 8)}')
+        if arr.shape[1] == 4:
+            data['lo'] = words[:, 0]
+        else:
+            data['hi'] = words[:, 0]
+            data['lo'] = words[:, 1]
+        return cls(data)
+
+    @property
+    def dtype(self) -> InetDtype:
+        """Get the dtype of the array."""
+        return InetDtype()
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of bytes of the array."""
+        return cast(int, self._data.nbytes)
+
+    @property
+    def version(self) -> np.ndarray:
+        """Get the IP version of each address; 0 if missing."""
+        return cast(np.ndarray, self._data['version'])
+
+    def __len__(self) -> int:
+        """Get the number of addresses."""
+        return len(self._data)
+
+    def _box(self, record: np.void) -> Any:
+        """Convert a record to an IP address."""
+        version, hi, lo = record.item()
+        if version == 4:
+            return ip.IPv4Address(lo)
+        if version == 6:
+            return ip.IPv6Address(hi << 64 | lo)
+        return self.dtype.na_value
+
+    def __getitem__(self, item: Any) -> Any:
+        """Get an address or a sub array."""
+        if pd.api.types.is_integer(item):
+            return self._box(self._data[item])
+        if pd.api.types.is_list_like(item) and not isinstance(item, tuple):
+            item = np.asarray(item)
+        return type(self)(self._data[item])
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """Set addresses."""
+        if pd.api.types.is_list_like(value) and not isinstance(value, (str, bytes)):
+            self._data[key] = type(self)(value)._data
+        else:
+            self._data[key] = _record(value)
+
+    def __iter__(self) -> Any:
+        """Iterate over the addresses."""
+        return map(self._box, self._data)
+
+    def __array__(self, dtype: Optional[Any] = None) -> np.ndarray:
+        """Convert to an object array of addresses."""
+        arr = np.empty(len(self), dtype=object)
+        for i, x in enumerate(self):
+            arr[i] = x
+        return arr if dtype is None else arr.astype(dtype)
+
+    def isna(self) -> np.ndarray:
+        """Get a mask of the missing addresses."""
+        return cast(np.ndarray, self._data['version'] == 0)
+
+    def take(
+            self, indices: Sequence[int], allow_fill: bool = False, fill_value: Any = None
+    ) -> 'InetArray':
+        """Take addresses by position."""
+        if not allow_fill:
+            return type(self)(take(self._data, indices))
+        indices = np.asarray(indices, dtype=np.intp)
+        if (indices < -1).any():
+            raise ValueError('invalid value in indices; must be >= -1 when allow_fill is True')
+        fill = indices == -1
+        data = np.empty(len(indices), dtype=INET_DTYPE)
+        data[fill] = _record(fill_value)
+        data[~fill] = take(self._data, indices[~fill])
+        return type(self)(data)
+
+    def copy(self, deep: bool = False) -> 'InetArray':
+        # pylint: disable=unused-argument
+        """Copy the array."""
+        return type(self)(self._data, copy=True)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat: Sequence['InetArray']) -> 'InetArray':
+        """Concatenate arrays."""
+        return cls(np.concatenate([x._data for x in to_concat]))
+
+    def _values_for_factorize(self) -> Tuple[np.ndarray, Any]:
+        """Get a hashable representation of the addresses.
+
+        Each record is viewed as a fixed width byte string; a missing record is empty.
+        """
+        return self._data.view(f'S{INET_DTYPE.itemsize}').astype(object), b''
+
+    def _values_for_argsort(self) -> np.ndarray:
+        """Get the records which sort by version then address."""
+        return self._data
+
+    def argsort(self, *args: Any, ascending: bool = True, kind: Text = 'quicksort',
+                **kwargs: Any) -> np.ndarray:
+        # pylint: disable=unused-argument
+        """Get the positions which sort the addresses; missing addresses are last."""
+        order = np.lexsort((self._data['lo'], self._data['hi'], self._data['version']))
+        if not ascending:
+            order = order[::-1]
+        missing = self.isna()[order]
+        return cast(np.ndarray, np.concatenate([order[~missing], order[missing]]))
+
+    def value_counts(self, dropna: bool = True) -> Any:
+        """Count each unique address."""
+        codes, uniques = pd.factorize(self)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        index = pd.Index(uniques)
+        if not dropna and (codes < 0).any():
+            counts = np.append(counts, (codes < 0).sum())
+            index = index.append(pd.Index([self.dtype.na_value]))
+        return pd.Series(counts, index=index)
+
+    def _compare(self, other: Any, op: Callable[[Any, Any], Any]) -> np.ndarray:
+        """Compare by version then address.  Comparisons with a missing address are False."""
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if not isinstance(other, InetArray):
+            if pd.api.types.is_list_like(other) and not isinstance(other, (str, bytes)):
+                other = type(self)(other)
+            else:
+                other = type(self)([other])
+        a, b = self._data, other._data
+        eq = (a['version'] == b['version']) & (a['hi'] == b['hi']) & (a['lo'] == b['lo'])
+        lt = (a['version'] < b['version']) | (a['version'] == b['version']) & (
+            (a['hi'] < b['hi']) | (a['hi'] == b['hi']) & (a['lo'] < b['lo'])
+        )
+        result = {
+            operator.eq: eq,
+            operator.ne: ~eq,
+            operator.lt: lt,
+            operator.le: lt | eq,
+            operator.gt: ~(lt | eq),
+            operator.ge: ~lt
+        }[op]
+        missing = (a['version'] == 0) | (b['version'] == 0)
+        return cast(np.ndarray, np.where(missing, op is operator.ne, result))
+
+    def __eq__(self, other: Any) -> Any:  # type: ignore
+        """Compare equal."""
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other: Any) -> Any:  # type: ignore
+        """Compare not equal."""
+        return self._compare(other, operator.ne)
+
+    def __lt__(self, other: Any) -> Any:
+        """Compare less than."""
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other: Any) -> Any:
+        """Compare less than or equal to."""
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other: Any) -> Any:
+        """Compare greater than."""
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other: Any) -> Any:
+        """Compare greater than or equal to."""
+        return self._compare(other, operator.ge)
+
+    def mask(self, prefixlen: Any) -> 'InetArray':
+        """Clear the host bits of each address below a prefix length."""
+        hi, lo = _host_masks(self._data['version'], prefixlen)
+        data = self._data.copy()
+        data['hi'] &= ~hi
+        data['lo'] &= ~lo
+        return type(self)(data)
+
+    def netmask_prefixlen(self) -> np.ndarray:
+        """Convert each netmask to its prefix length.
+
+        A netmask is valid if its inverse, the hostmask, is a run of low bits, i.e. adding one to
+        the hostmask carries into a single bit.  Raises ValueError if a netmask is not valid.
+        """
+        version, hi, lo = self._data['version'], self._data['hi'], self._data['lo']
+        v4 = version == 4
+        hi = np.where(v4, UINT64_MAX, hi)
+        lo = np.where(v4, lo | np.uint64(0xFFFFFFFF00000000), lo)
+        inv_hi, inv_lo = ~hi, ~lo
+        # the hostmask of the upper word may only be set if the lower word is all host bits
+        valid = (
+            (inv_hi & (inv_hi + np.uint64(1)) == 0) & (inv_lo & (inv_lo + np.uint64(1)) == 0) &
+            ((inv_hi == 0) | (inv_lo == UINT64_MAX))
+        )
+        if (~valid & (version != 0)).any():
+            raise ValueError(f'netmasks are not valid: {self[~valid & (version != 0)][:5]}')
+        return cast(
+            np.ndarray,
+            (popcount(hi) + popcount(lo)).astype(np.int64) - np.where(v4, 96, 0)
+        )
+
+    def has_host_bits(self, prefixlen: Any) -> np.ndarray:
+        """Test if each address has bits set below a prefix length."""
+        hi, lo = _host_masks(self._data['version'], prefixlen)
+        return cast(np.ndarray, ((self._data['hi'] & hi) | (self._data['lo'] & lo)) != 0)
+
+    def _objects(
+            self, prefixlen: Any, v4: Callable[[Tuple[int, int]], Any],
+            v6: Callable[[Tuple[int, int]], Any], data: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Build an (address, prefix length) object for each address; None if missing."""
+        data = self._data if data is None else data
+        prefixlen = np.broadcast_to(np.asarray(prefixlen, dtype=np.int64), len(data)).tolist()
+        arr = np.empty(len(data), dtype=object)
+        for i, ((version, hi, lo), prefix) in enumerate(zip(data.tolist(), prefixlen)):
+            if version == 4:
+                arr[i] = v4((lo, prefix))
+            elif version == 6:
+                arr[i] = v6((hi << 64 | lo, prefix))
+        return arr
+
+    def to_cidr_address(self, prefixlen: Any, strict: bool = False) -> np.ndarray:
+        """Convert each address and prefix length to an IPv4Network or IPv6Network.
+
+        Raises ValueError if strict and an address has host bits set.
+        """
+        if strict and (self.has_host_bits(prefixlen) & ~self.isna()).any():
+            raise ValueError('addresses have host bits set')
+        return self._objects(
+            prefixlen, ip.IPv4Network, ip.IPv6Network, self.mask(prefixlen)._data
+        )
+
+    def to_interface_address(self, prefixlen: Any) -> np.ndarray:
+        """Convert each address and prefix length to an IPv4Interface or IPv6Interface."""
+        _host_masks(self._data['version'], prefixlen)
+        return self._objects(prefixlen, ip.IPv4Interface, ip.IPv6Interface)
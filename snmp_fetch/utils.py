@@ -88,7 +88,10 @@ def dtype_fields(d: np.dtype) -> Either[Exception, DTYPE_FIELDS_T]:
 
 
 def concat_dtypes(ds: Sequence[np.dtype]) -> np.dtype:
-    """Concat structured datatypes."""
+    """Concat structured datatypes.
+
+    Each dtype keeps its itemsize so trailing padding is preserved.
+    """
     def _concat(
             acc: Tuple[Mapping[Any, Any], int], a: np.dtype
     ) -> Tuple[DTYPE_FIELDS_T, int]:
@@ -104,8 +107,14 @@ def concat_dtypes(ds: Sequence[np.dtype]) -> np.dtype:
             },
             acc_itemsize + a.itemsize
         )
+    fields, itemsize = reduce(_concat, ds, (cast(DTYPE_FIELDS_T, {}), 0))
     # dtype.fields() doesn't match dtype constructor despite being compatible
-    return np.dtype(reduce(_concat, ds, (cast(DTYPE_FIELDS_T, {}), 0))[0])  # type: ignore
+    return np.dtype({
+        'names': list(fields),
+        'formats': [d[0] for d in fields.values()],
+        'offsets': [d[1] for d in fields.values()],
+        'itemsize': itemsize
+    })
 
 
 def concatv_dtypes(*args: np.dtype) -> np.dtype:
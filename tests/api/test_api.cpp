@@ -5,6 +5,10 @@ namespace py = pybind11;
 
 #include "catch.hpp"
 #include "test_fetch.hpp"
+#include "test_pool.hpp"
+#include "test_results.hpp"
+#include "test_transport.hpp"
+#include "test_usm.hpp"
 #include "test_utils.hpp"
 
 int main( int argc, char* argv[] ) {
@@ -0,0 +1,202 @@
+"""Test suite for fetching SNMP objects into DataFrames."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Text, Tuple
+
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
+import pytest
+
+import tests.strategies as _st
+from snmp_fetch import (
+    ObjectType, PduType, SnmpConfig, SnmpError, afetch, afetch_stream, fetch, fetch_stream,
+    object_type
+)
+from tests.fixtures import snmpsimd
+
+__all__ = ['snmpsimd']
+
+
+@object_type(oid='.1.3.6.1.2.1.2.2.1')
+class IfEntry(ObjectType):
+    """IfEntry."""
+
+    index = np.dtype([('ifIndex', np.uint64)])
+
+
+@object_type(IfEntry, oid='.10')
+class IfInOctets(ObjectType):
+    """IfInOctets."""
+
+    dtype = np.dtype([('ifInOctets', np.uint64)])
+
+
+def hosts_frame(hosts: Sequence[Tuple[int, Text, Text]]) -> Any:
+    """Map hosts to a DataFrame of hosts."""
+    return pd.DataFrame(
+        [(host, community) for _, host, community in hosts],
+        columns=['host', 'snmp_community']
+    )
+
+
+def normalize(df: Any) -> Any:
+    """Order the rows of a DataFrame without timestamps to compare the rows of fetches."""
+    df = df.drop(columns=['#timestamp']).astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_fetch_stream(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test the chunks of a stream hold the same rows and errors as fetch."""
+    df = hosts_frame([*hosts, *dead_hosts])
+    config = SnmpConfig(retries=0, timeout=1, max_active_sessions=len(df))
+
+    chunks = list(fetch_stream(PduType.BULKGET, df, IfEntry, config=config))
+    stream_errors = [error for _, errors in chunks for error in errors]
+    result_df, errors = fetch(PduType.BULKGET, df, IfEntry, config=config)
+
+    # the dead hosts are yielded without any results in the last chunk
+    last_df, _ = chunks[-1]
+    assert last_df['ifInOctets'].isna().all()
+    assert len(last_df) == len(dead_hosts)
+    assert normalize(pd.concat([chunk for chunk, _ in chunks])).equals(normalize(result_df))
+    assert sorted(str(error) for error in stream_errors) == sorted(str(error) for error in errors)
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_afetch(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test afetch and the chunks of afetch_stream hold the same rows and errors as fetch."""
+    df = hosts_frame([*hosts, *dead_hosts])
+    config = SnmpConfig(retries=0, timeout=1, max_active_sessions=len(df))
+
+    async def _afetch_stream() -> Tuple[Any, Sequence[SnmpError]]:
+        chunks: List[Any] = []
+        errors: List[SnmpError] = []
+        async for chunk, chunk_errors in afetch_stream(
+                PduType.BULKGET, df, IfEntry, config=config
+        ):
+            chunks.append(chunk)
+            errors.extend(chunk_errors)
+        return pd.concat(chunks), errors
+
+    loop = asyncio.new_event_loop()
+    try:
+        responses = loop.run_until_complete(asyncio.gather(
+            afetch(PduType.BULKGET, df, IfEntry, config=config), _afetch_stream()
+        ))
+    finally:
+        loop.close()
+
+    result_df, errors = fetch(PduType.BULKGET, df, IfEntry, config=config)
+    for async_df, async_errors in responses:
+        assert normalize(async_df).equals(normalize(result_df))
+        assert (
+            sorted(str(error) for error in async_errors) ==
+            sorted(str(error) for error in errors)
+        )
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts(),
+    executor=st.sampled_from(['thread', 'process']),
+    batch_size=st.one_of(st.none(), st.integers(min_value=1, max_value=4))
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_workers(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]],
+        executor: Text,
+        batch_size: Optional[int]
+) -> None:
+    """Test fetching batches on workers returns the same rows and errors as fetch in order."""
+    df = hosts_frame([*hosts, *dead_hosts])
+    df['position'] = range(len(df))
+    config = SnmpConfig(retries=0, timeout=1, max_active_sessions=len(df))
+
+    result_df, errors = fetch(
+        PduType.BULKGET, df, IfEntry, config=config, workers=2, executor=executor,
+        batch_size=batch_size
+    )
+    expected_df, expected_errors = fetch(PduType.BULKGET, df, IfEntry, config=config)
+
+    assert normalize(result_df).equals(normalize(expected_df))
+    assert (
+        sorted(str(error) for error in errors) ==
+        sorted(str(error) for error in expected_errors)
+    )
+    # the batches are concatenated in order; one batch per worker by default
+    size = batch_size or -(-len(df) // 2)
+    batches = (result_df['position'] // size).tolist()
+    assert batches == sorted(batches)
+
+
+@pytest.mark.parametrize('kwargs', [  # type: ignore
+    {},
+    {'batch_size': 2},
+    {'workers': 2, 'executor': 'thread'},
+    {'workers': 2, 'executor': 'process'}
+])
+def test_fetch_empty_frame(kwargs: Dict[Text, Any]) -> None:
+    """Test an empty DataFrame maps to an empty DataFrame."""
+    result_df, errors = fetch(PduType.BULKGET, hosts_frame([]), IfEntry, **kwargs)
+    assert result_df.empty
+    assert {'ifIndex', 'ifInOctets', 'host', 'snmp_community'}.issubset(result_df.columns)
+    assert not errors
+
+
+def test_fetch_stream_empty_frame() -> None:
+    """Test an empty DataFrame streams no chunks."""
+    assert not list(fetch_stream(PduType.BULKGET, hosts_frame([]), IfEntry))
+
+
+def test_afetch_empty_frame() -> None:
+    """Test an empty DataFrame maps to an empty DataFrame and streams no chunks asynchronously."""
+
+    async def _afetch() -> Tuple[Tuple[Any, Sequence[SnmpError]], List[Any]]:
+        return (
+            await afetch(PduType.BULKGET, hosts_frame([]), IfEntry),
+            [chunk async for chunk in afetch_stream(PduType.BULKGET, hosts_frame([]), IfEntry)]
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        (result_df, errors), chunks = loop.run_until_complete(_afetch())
+    finally:
+        loop.close()
+
+    assert result_df.empty
+    assert {'ifIndex', 'ifInOctets', 'host', 'snmp_community'}.issubset(result_df.columns)
+    assert not errors
+    assert not chunks
+
+
+def test_invalid_executor() -> None:
+    """Test an unknown executor is rejected."""
+    with pytest.raises(ValueError):
+        fetch(PduType.BULKGET, hosts_frame([]), IfEntry, workers=2, executor='fiber')
@@ -25,3 +25,53 @@ TEST_CASE( "Test timeout", "[fetch]" ) {
   REQUIRE( errors[0].type == TIMEOUT_ERROR );
 
 }
+
+TEST_CASE( "Test deadline", "[fetch]" ) {
+
+  std::vector<host_t> hosts = {
+    std::make_tuple(0, "localhost", "public"),
+    std::make_tuple(1, "localhost", "public")
+  };
+  std::vector<var_bind_t> var_binds = {
+    std::make_tuple<oid_t, var_bind_size_t>(
+      { 1 }, std::make_tuple(0, 0)
+    )
+  };
+  // one host is active and the other pending when the deadline is reached
+  SnmpConfig config;
+  config.max_active_sessions = 0;
+  config.deadline = 1;
+
+  auto [results, errors] = fetch(GET, hosts, var_binds, config);
+
+  REQUIRE( results.size() == 1 );
+  REQUIRE( results[0].size() == 0 );
+  REQUIRE( errors.size() == 2 );
+  REQUIRE( errors[0].type == DEADLINE_ERROR );
+  REQUIRE( errors[1].type == DEADLINE_ERROR );
+
+}
+
+TEST_CASE( "Test host priority", "[fetch]" ) {
+
+  std::vector<host_t> hosts = {
+    std::make_tuple(0, "localhost", "public"),
+    std::make_tuple(1, "localhost", "public"),
+    std::make_tuple(2, "localhost", "public")
+  };
+  std::vector<double> weights = { 1, 3, 1 };
+
+  // heaviest first; equal weights keep their order
+  prioritize_hosts(hosts, weights);
+  REQUIRE( std::get<0>(hosts[0]) == 1 );
+  REQUIRE( std::get<0>(hosts[1]) == 0 );
+  REQUIRE( std::get<0>(hosts[2]) == 2 );
+  REQUIRE( weights[0] == 3 );
+  REQUIRE( weights[2] == 1 );
+
+  // without weights the order is left as is
+  std::vector<double> none;
+  prioritize_hosts(hosts, none);
+  REQUIRE( std::get<0>(hosts[0]) == 1 );
+
+}
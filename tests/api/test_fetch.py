@@ -1,15 +1,29 @@
 # pylint: disable=ungrouped-imports  # fixed by #2824
 """Test suite for the C API."""
 
-from typing import Sequence, Text, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import List, Sequence, Set, Text, Tuple
 
 import hypothesis
 import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
 import pytest
 
 import tests.strategies as _st
-from snmp_fetch import PduType, SnmpConfig, SnmpErrorType
-from snmp_fetch.api import fetch
+from snmp_fetch import PduType, SnmpConfig, SnmpErrorType, UsmCredentials
+from snmp_fetch.aio import poll
+from snmp_fetch.api import (
+    IndexKind, clear_bulk_repetitions, clear_session_pool, clear_usm_cache, fetch, fetch_iter,
+    get_bulk_repetitions, set_bulk_repetitions
+)
+from snmp_fetch.distributed import distribute, split_weights
+from tests.api.templates import get_integer
 from tests.fixtures import snmpsimd
 
 __all__ = ['snmpsimd']
@@ -39,6 +53,19 @@ def test_ambiguous_root_oids(
         )
 
 
+def test_ambiguous_root_oids_message() -> None:
+    """Test the ambiguous pair is reported in request order among many roots."""
+    oids = [(1, 3, 6, 1, 2, 1, 2, 2, 1, 10, i) for i in range(1000)]
+    oids.append((1, 3, 6, 1, 2, 1, 2, 2, 1, 10))
+    with pytest.raises(ValueError, match=re.escape(
+            'Ambiguous root OIDs: (.1.3.6.1.2.1.2.2.1.10.0, .1.3.6.1.2.1.2.2.1.10)'
+    )):
+        fetch(
+            PduType.GET, [(0, 'localhost', 'public')],
+            [(oid, (0, 0)) for oid in oids]
+        )
+
+
 @hypothesis.given(
     hosts=_st.valid_hosts()
 )  # type: ignore
@@ -82,3 +109,664 @@ def test_end_of_mib_view(
     for error in errors:
         assert error.type == SnmpErrorType.VALUE_WARNING
         assert error.message == 'END_OF_MIB_VIEW'
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_timeout_hosts_do_not_block(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test unresponsive hosts time out concurrently with responsive hosts."""
+    config = SnmpConfig(
+        retries=0, timeout=1, max_active_sessions=len(hosts) + len(dead_hosts)
+    )
+    start = time.monotonic()
+    results, errors = fetch(
+        PduType.GET, [*hosts, *dead_hosts], [get_integer.var_bind], config
+    )
+    elapsed = time.monotonic() - start
+
+    # 5 uint64 header fields followed by the oid and value buffers
+    itemsize = 5 * 8 + sum(get_integer.var_bind[1])
+
+    assert len(results) == 1
+    assert results[0].size == len(hosts) * itemsize
+    assert len(errors) == len(dead_hosts)
+    for error in errors:
+        assert error.type == SnmpErrorType.TIMEOUT_ERROR
+    # all timeouts expire together instead of one after another
+    assert elapsed < 2 * config.timeout * (config.retries + 1) + 1
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_partition_retries(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test timed out partitions are resent before the work of the host is dropped."""
+    config = SnmpConfig(
+        retries=0, timeout=1, max_active_sessions=len(hosts) + len(dead_hosts),
+        partition_retries=1
+    )
+    start = time.monotonic()
+    results, errors = fetch(
+        PduType.GET, [*hosts, *dead_hosts], [get_integer.var_bind], config
+    )
+    elapsed = time.monotonic() - start
+
+    # 5 uint64 header fields followed by the oid and value buffers
+    itemsize = 5 * 8 + sum(get_integer.var_bind[1])
+
+    assert results[0].size == len(hosts) * itemsize
+    # a single error once the partition of each dead host failed twice
+    assert len(errors) == len(dead_hosts)
+    for error in errors:
+        assert error.type == SnmpErrorType.TIMEOUT_ERROR
+    assert elapsed >= 2 * config.timeout
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_deadline(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test work outstanding at the deadline is cancelled instead of running on."""
+    config = SnmpConfig(
+        retries=0, timeout=10, max_active_sessions=len(hosts) + len(dead_hosts), deadline=1
+    )
+    start = time.monotonic()
+    results, errors = fetch(
+        PduType.GET, [*hosts, *dead_hosts], [get_integer.var_bind], config
+    )
+    elapsed = time.monotonic() - start
+
+    # 5 uint64 header fields followed by the oid and value buffers
+    itemsize = 5 * 8 + sum(get_integer.var_bind[1])
+
+    assert results[0].size == len(hosts) * itemsize
+    assert len(errors) == len(dead_hosts)
+    for error in errors:
+        assert error.type == SnmpErrorType.DEADLINE_ERROR
+    assert config.deadline <= elapsed < config.timeout
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_weighted_hosts(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test the heaviest hosts are opened first."""
+    # a single session; the dead hosts are supplied last but weigh the most
+    config = SnmpConfig(retries=0, timeout=10, max_active_sessions=0, deadline=1)
+    all_hosts = [*hosts, *dead_hosts]
+    weights = [0.0] * len(hosts) + [1.0] * len(dead_hosts)
+    results, errors = fetch(
+        PduType.GET, all_hosts, [get_integer.var_bind], config, weights=weights
+    )
+
+    # every host is cancelled at the deadline behind the dead hosts holding the sessions
+    assert results[0].size == 0
+    assert len(errors) == len(all_hosts)
+    assert all(error.type == SnmpErrorType.DEADLINE_ERROR for error in errors)
+
+    with pytest.raises(ValueError):
+        fetch(PduType.GET, all_hosts, [get_integer.var_bind], config, weights=[1.0])
+    with pytest.raises(ValueError):
+        fetch(
+            PduType.GET, all_hosts, [get_integer.var_bind], config,
+            weights=[-1.0] * len(all_hosts)
+        )
+
+
+def test_distribute_weights() -> None:
+    """Test distribute weights the hosts by a column of expected costs."""
+    df = pd.DataFrame({
+        'host': ['a', 'b'], 'snmp_community': ['public', 'public'], 'cost': [1, 2]
+    })
+    ((hosts, _, _),) = distribute(df, weight='cost')
+    assert hosts == [(0, 'a', 'public', 1.0), (1, 'b', 'public', 2.0)]
+    assert split_weights(hosts) == ([(0, 'a', 'public'), (1, 'b', 'public')], [1.0, 2.0])
+    ((hosts, _, _),) = distribute(df)
+    assert split_weights(hosts) == (hosts, [])
+
+
+@hypothesis.given(
+    host=_st.valid_hosts().map(lambda x: x[0]),  # type: ignore
+    max_inflight_pdus_per_host=st.integers(min_value=2, max_value=8)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_pipelined_walk(
+        host: Tuple[int, Text, Text],
+        max_inflight_pdus_per_host: int
+) -> None:
+    """Test pipelining partitions returns the same walk as one PDU at a time."""
+    var_binds = [
+        ((1, 3, 6, 1, 2, 1, 2, 2, 1, column), (11 << 3, 8))
+        for column in range(1, 11)
+    ]
+
+    def _walk(max_inflight: int) -> Sequence[np.ndarray]:
+        results, errors = fetch(
+            PduType.BULKGET, [host], var_binds, SnmpConfig(
+                max_var_binds_per_pdu=1,
+                max_bulk_repetitions=2,
+                max_inflight_pdus_per_host=max_inflight
+            )
+        )
+        assert not errors
+        # zero the timestamp of each row
+        rows = [result.view(np.uint64).reshape(-1, 5 + 11 + 1).copy() for result in results]
+        for row in rows:
+            row[:, 4] = 0
+        return rows
+
+    for pipelined, sequential in zip(_walk(max_inflight_pdus_per_host), _walk(1)):
+        assert np.array_equal(pipelined, sequential)
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    threads=st.integers(min_value=2, max_value=8)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_threaded_walk(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        threads: int
+) -> None:
+    """Test sharding hosts across threads returns the same walk as a single thread."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(threads: int) -> np.ndarray:
+        results, errors = fetch(
+            PduType.BULKGET, hosts, var_binds, SnmpConfig(threads=threads)
+        )
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    assert np.array_equal(_walk(threads), _walk(1))
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    max_result_bytes_in_memory=st.sampled_from([0, 4096, 1 << 20])
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_spilled_walk(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        max_result_bytes_in_memory: int
+) -> None:
+    """Test spilling results to disk returns the same walk as keeping them in memory."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    with tempfile.TemporaryDirectory() as spill_directory:
+        config = SnmpConfig(
+            spill_directory=spill_directory,
+            max_result_bytes_in_memory=max_result_bytes_in_memory
+        )
+        assert np.array_equal(_walk(config), _walk(SnmpConfig()))
+        # the spill files are removed once mapped
+        assert not os.listdir(spill_directory)
+
+    results, _ = fetch(
+        PduType.BULKGET, hosts, var_binds,
+        SnmpConfig(spill_directory=tempfile.gettempdir(), max_result_bytes_in_memory=0)
+    )
+    assert all(isinstance(result, np.memmap) for result in results if result.size)
+
+
+def test_invalid_spill_directory() -> None:
+    """Test a spill directory which is not a writable directory is rejected."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+    with tempfile.TemporaryDirectory() as spill_directory:
+        with tempfile.NamedTemporaryFile(dir=spill_directory) as spill_file:
+            for path in [os.path.join(spill_directory, 'missing'), spill_file.name]:
+                with pytest.raises(ValueError):
+                    fetch(
+                        PduType.GET, [(0, 'localhost', 'public')], var_binds,
+                        SnmpConfig(spill_directory=path)
+                    )
+
+
+def test_invalid_index_specs() -> None:
+    """Test index specs which do not match the variable bindings."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+    with pytest.raises(ValueError):
+        fetch(
+            PduType.GET, [(0, 'localhost', 'public')], var_binds,
+            index_specs=[[], []]
+        )
+    with pytest.raises(ValueError):
+        fetch(
+            PduType.GET, [(0, 'localhost', 'public')], var_binds,
+            index_specs=[[(IndexKind.INDEX_FIXED, 1, 4)]]
+        )
+    with pytest.raises(ValueError):
+        fetch(
+            PduType.GET, [(0, 'localhost', 'public')], var_binds,
+            index_specs=[[(IndexKind.INDEX_FIXED, 2, 8)]]
+        )
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts()  # type: ignore
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_decoded_index_walk(
+        hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test decoding the ifIndex of a walk matches the raw suboids."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (12 << 3, 8))]
+
+    def _walk(index_spec: Sequence[Tuple[IndexKind, int, int]]) -> np.ndarray:
+        results, errors = fetch(
+            PduType.BULKGET, hosts, var_binds, index_specs=[index_spec]
+        )
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 12 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    raw = _walk([])
+    integer = _walk([(IndexKind.INDEX_INTEGER, 1, 8), (IndexKind.INDEX_FIXED, 1, 8)])
+    implied = _walk([(IndexKind.INDEX_IMPLIED, 1, 8)])
+
+    assert np.array_equal(integer, raw)
+    # the implied index is a length of one suboid followed by the ifIndex
+    assert np.array_equal(implied[:, :15], raw[:, :15])
+    assert (implied[:, 15] == 1).all()
+    assert np.array_equal(implied[:, 16], raw[:, 15])
+    assert np.array_equal(implied[:, 17], raw[:, 17])
+
+
+@hypothesis.given(
+    # hosts sharing an index would be split over chunks
+    hosts=_st.valid_hosts(unique_by=lambda host: host[0]),  # type: ignore
+    chunk_size=st.integers(min_value=1, max_value=4)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_fetch_iter(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        chunk_size: int
+) -> None:
+    """Test streaming chunks of complete hosts returns the same walk as fetch."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _rows(results: Sequence[np.ndarray]) -> np.ndarray:
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = np.concatenate(results).view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    chunks = list(fetch_iter(PduType.BULKGET, hosts, var_binds, chunk_size=chunk_size))
+    seen: Set[int] = set()
+    for results, errors in chunks:
+        assert not errors
+        chunk_hosts = set(_rows(results)[:, 0].tolist())
+        # every row of a host is in a single chunk
+        assert not chunk_hosts.intersection(seen)
+        seen.update(chunk_hosts)
+
+    results, _ = fetch(PduType.BULKGET, hosts, var_binds)
+    assert np.array_equal(
+        _rows([result for results, _ in chunks for result in results]), _rows(results)
+    )
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dead_hosts=_st.timeout_hosts(),
+    chunk_size=st.integers(min_value=1, max_value=4)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_fetch_iter_empty_columns(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dead_hosts: Sequence[Tuple[int, Text, Text]],
+        chunk_size: int
+) -> None:
+    """Test chunks with columns without rows, e.g. timed out hosts or absent oids, are empty."""
+    # the agent has no objects under the second root
+    var_binds = [
+        ((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8)),
+        ((1, 3, 6, 1, 2, 1, 2, 99), (9 << 3, 8))
+    ]
+    config = SnmpConfig(
+        retries=0, timeout=1, max_active_sessions=len(hosts) + len(dead_hosts)
+    )
+    chunks = list(fetch_iter(
+        PduType.BULKGET, [*hosts, *dead_hosts], var_binds, config, chunk_size=chunk_size
+    ))
+
+    for results, _ in chunks:
+        assert len(results) == len(var_binds)
+        assert results[1].size == 0
+    errors = [error for _, chunk_errors in chunks for error in chunk_errors]
+    assert len(errors) == len(dead_hosts)
+    for error in errors:
+        assert error.type == SnmpErrorType.TIMEOUT_ERROR
+
+    # every chunk is empty once only dead hosts are left
+    chunks = list(fetch_iter(PduType.BULKGET, dead_hosts, var_binds, config))
+    for results, _ in chunks:
+        assert [result.size for result in results] == [0, 0]
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts()  # type: ignore
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_poll(
+        hosts: Sequence[Tuple[int, Text, Text]]
+) -> None:
+    """Test concurrent polls from one event loop return the same walks as fetch."""
+    var_binds = [
+        [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))],
+        [((1, 3, 6, 1, 2, 1, 2, 2, 1, 16), (11 << 3, 8))]
+    ]
+
+    def _rows(results: Sequence[np.ndarray]) -> np.ndarray:
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = np.concatenate(results).view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    async def _poll(
+            var_bind: Sequence[Tuple[Sequence[int], Tuple[int, int]]]
+    ) -> Sequence[np.ndarray]:
+        results: List[np.ndarray] = []
+        async for chunk, errors in poll(fetch_iter(PduType.BULKGET, hosts, var_bind)):
+            assert not errors
+            results.extend(chunk)
+        return results
+
+    loop = asyncio.new_event_loop()
+    try:
+        polled = loop.run_until_complete(asyncio.gather(*map(_poll, var_binds)))
+    finally:
+        loop.close()
+
+    for results, var_bind in zip(polled, var_binds):
+        expected, _ = fetch(PduType.BULKGET, hosts, var_bind)
+        assert np.array_equal(_rows(results), _rows(expected))
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    dns_cache_ttl=st.sampled_from([0, 60])
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_session_pool(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        dns_cache_ttl: int
+) -> None:
+    """Test walks on pooled sessions return the same walk as fresh sessions."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    clear_session_pool()
+    config = SnmpConfig(session_pool=True, dns_cache_ttl=dns_cache_ttl)
+    expected = _walk(SnmpConfig())
+    assert np.array_equal(_walk(config), expected)
+    # the second walk reuses the sessions of the first
+    assert np.array_equal(_walk(config), expected)
+    assert 1 <= clear_session_pool() <= len(hosts)
+    assert clear_session_pool() == 0
+
+
+def test_session_pool_after_fork() -> None:
+    """Test a forked child does not reuse the pooled sessions of its parent."""
+    hosts = [(i, '127.0.0.1:1161', 'recorded/linux-full-walk') for i in range(4)]
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+    config = SnmpConfig(session_pool=True, retries=0, timeout=2)
+
+    def _walk() -> int:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        return int(results[0].size)
+
+    clear_session_pool()
+    expected = _walk()
+
+    # the parent and the child walk concurrently, the parent on its pooled sessions
+    pid = os.fork()
+    if not pid:
+        try:
+            status = 0 if _walk() == expected and clear_session_pool() == len(hosts) else 1
+        except BaseException:  # pylint: disable=broad-except
+            status = 1
+        os._exit(status)  # pylint: disable=protected-access
+    assert _walk() == expected
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert clear_session_pool() == len(hosts)
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    shared_sockets=st.integers(min_value=1, max_value=4),
+    threads=st.integers(min_value=1, max_value=2)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_shared_sockets(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        shared_sockets: int,
+        threads: int
+) -> None:
+    """Test walks through shared sockets return the same walk as a socket per session."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    config = SnmpConfig(
+        shared_sockets=shared_sockets, threads=threads, max_inflight_pdus_per_host=2
+    )
+    assert np.array_equal(_walk(config), _walk(SnmpConfig()))
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    security_level=st.sampled_from(['noAuthNoPriv', 'authNoPriv', 'authPriv'])
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_usm(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        security_level: Text
+) -> None:
+    """Test SNMPv3 walks return the same walk as SNMPv2c walks."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(_hosts: Sequence[Tuple[int, Text, object]], config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, _hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    # the simulation agent selects the recording by the md5 of the community as the context
+    auth = (None, None) if security_level == 'noAuthNoPriv' else ('MD5', 'auctoritas')
+    priv = ('DES', 'privatus') if security_level == 'authPriv' else (None, None)
+    usm_hosts = [
+        (index, hostname, UsmCredentials(
+            'simulator', *auth, *priv,
+            context_name=hashlib.md5(community.encode()).hexdigest()
+        ))
+        for index, hostname, community in hosts
+    ]
+
+    clear_usm_cache()
+    expected = _walk(hosts, SnmpConfig())
+    config = SnmpConfig(engine_cache_ttl=60)
+    assert np.array_equal(_walk(usm_hosts, config), expected)
+    # the second walk opens the sessions with the cached keys and engines
+    assert np.array_equal(_walk(usm_hosts, config), expected)
+    if security_level != 'noAuthNoPriv':
+        assert clear_usm_cache() > 0
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts(),  # type: ignore
+    min_bulk_repetitions=st.integers(min_value=1, max_value=4),
+    max_bulk_repetitions=st.integers(min_value=4, max_value=64)
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=10
+)
+def test_adaptive_bulk_repetitions(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        min_bulk_repetitions: int,
+        max_bulk_repetitions: int
+) -> None:
+    """Test walks with adaptive bulk repetitions return the same walk as fixed repetitions."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    clear_bulk_repetitions()
+    config = SnmpConfig(
+        adaptive_bulk_repetitions=True,
+        min_bulk_repetitions=min_bulk_repetitions,
+        max_bulk_repetitions=max_bulk_repetitions
+    )
+    expected = _walk(SnmpConfig())
+    assert np.array_equal(_walk(config), expected)
+
+    # the repetitions each host settled on are reported within the bounds
+    repetitions = get_bulk_repetitions()
+    assert set(repetitions) == {hostname for _, hostname, _ in hosts}
+    assert all(min_bulk_repetitions <= r <= max_bulk_repetitions for r in repetitions.values())
+
+    # the reported repetitions seed the next walk
+    clear_bulk_repetitions()
+    set_bulk_repetitions(repetitions)
+    assert np.array_equal(_walk(config), expected)
+    assert clear_bulk_repetitions() == len(repetitions)
+
+
+@hypothesis.given(
+    hosts=_st.valid_hosts().map(lambda x: x[:4]),  # type: ignore
+    per_host=st.booleans()
+)
+@hypothesis.settings(
+    deadline=None,
+    max_examples=5
+)
+def test_rate_limits(
+        hosts: Sequence[Tuple[int, Text, Text]],
+        per_host: bool
+) -> None:
+    """Test rate limited walks return the same walk no faster than the rate limit."""
+    var_binds = [((1, 3, 6, 1, 2, 1, 2, 2, 1, 10), (11 << 3, 8))]
+
+    def _walk(config: SnmpConfig) -> np.ndarray:
+        results, errors = fetch(PduType.BULKGET, hosts, var_binds, config)
+        assert not errors
+        # zero the timestamp of each row and order the rows by host and oid
+        rows = results[0].view(np.uint64).reshape(-1, 5 + 11 + 1).copy()
+        rows[:, 4] = 0
+        return rows[np.lexsort(rows[:, ::-1].T)]
+
+    # a request PDU per row
+    rate = 50
+    expected = _walk(SnmpConfig(max_bulk_repetitions=1))
+    config = SnmpConfig(max_bulk_repetitions=1, max_active_sessions=len(hosts))
+    if per_host:
+        config.max_pdus_per_second_per_host = rate
+    else:
+        config.max_pdus_per_second = rate
+    start = time.monotonic()
+    assert np.array_equal(_walk(config), expected)
+    elapsed = time.monotonic() - start
+
+    # the first request PDU of each bucket is sent without waiting
+    pdus = len(expected) // len(hosts) if per_host else len(expected)
+    assert elapsed >= (pdus - 1) / rate
@@ -0,0 +1,136 @@
+#include "catch.hpp"
+#include "../../snmp_fetch/api/pool.hpp"
+#include "../../snmp_fetch/api/results.hpp"
+#include "../../snmp_fetch/api/session.hpp"
+
+using namespace snmp_fetch;
+
+TEST_CASE( "Test peername resolution", "[pool]" ) {
+
+  resolution_cache cache;
+
+  // host names are resolved to the domain, address and port
+  REQUIRE( resolve_peername(cache, "localhost", 0) == "udp:127.0.0.1:161" );
+  REQUIRE( resolve_peername(cache, "udp:localhost:1161", 0) == "udp:127.0.0.1:1161" );
+  REQUIRE( cache.peernames.empty() );
+
+  // numeric addresses and other transports are left to net-snmp
+  REQUIRE( resolve_peername(cache, "127.0.0.1:1161", 0) == "127.0.0.1:1161" );
+  REQUIRE( resolve_peername(cache, "udp6:[::1]:1161", 0) == "udp6:[::1]:1161" );
+  REQUIRE( resolve_peername(cache, "::1", 0) == "::1" );
+  REQUIRE( resolve_peername(cache, "tcp:localhost:1161", 0) == "tcp:localhost:1161" );
+  REQUIRE( resolve_peername(cache, "localhost:port", 0) == "localhost:port" );
+
+  // resolutions are cached until they expire
+  REQUIRE( resolve_peername(cache, "localhost", 60000000) == "udp:127.0.0.1:161" );
+  REQUIRE( cache.peernames.size() == 1 );
+  std::get<0>(cache.peernames["localhost"]) = "udp:127.0.0.2:161";
+  REQUIRE( resolve_peername(cache, "localhost", 60000000) == "udp:127.0.0.2:161" );
+  std::get<1>(cache.peernames["localhost"]) = 0;
+  REQUIRE( resolve_peername(cache, "localhost", 60000000) == "udp:127.0.0.1:161" );
+
+  // failures are not cached
+  REQUIRE(
+      resolve_peername(cache, "snmp-fetch.invalid", 60000000) == "snmp-fetch.invalid"
+  );
+  REQUIRE( cache.peernames.size() == 1 );
+
+}
+
+TEST_CASE( "Test session pool", "[pool]" ) {
+
+  session_pool pool;
+  pool.last_eviction = 0;
+  pool.pid = getpid();
+  std::vector<SnmpError> errors;
+  SnmpConfig config;
+  host_t host = std::make_tuple(0, "localhost", "public");
+  host_t other = std::make_tuple(1, "localhost", "private");
+
+  void *session = create_netsnmp_session(host, errors, config);
+  REQUIRE( session != NULL );
+  REQUIRE( errors.empty() );
+
+  // a released session is only acquired for the same key and only once
+  release_session(pool, session_key(host, config), session, config);
+  REQUIRE( acquire_session(pool, session_key(other, config), config) == NULL );
+  SnmpConfig retries = config;
+  retries.retries = config.retries + 1;
+  REQUIRE( acquire_session(pool, session_key(host, retries), config) == NULL );
+  REQUIRE( acquire_session(pool, session_key(host, config), config) == session );
+  REQUIRE( acquire_session(pool, session_key(host, config), config) == NULL );
+
+  // idle sessions are evicted after the idle timeout
+  release_session(pool, session_key(host, config), session, config);
+  uint64_t now = monotonic_time();
+  REQUIRE( evict_sessions(pool, 1000000, now) == 0 );
+  REQUIRE( pool.idle.size() == 1 );
+  REQUIRE( evict_sessions(pool, 1000000, now + 2000000) == 1 );
+  REQUIRE( pool.idle.empty() );
+
+  // sessions inherited from another process are dropped instead of acquired
+  session = create_netsnmp_session(host, errors, config);
+  REQUIRE( session != NULL );
+  release_session(pool, session_key(host, config), session, config);
+  pool.pid = 0;
+  REQUIRE( acquire_session(pool, session_key(host, config), config) == NULL );
+  REQUIRE( pool.idle.empty() );
+  REQUIRE( pool.pid == getpid() );
+
+}
+
+TEST_CASE( "Test adaptive bulk repetitions", "[pool]" ) {
+
+  std::vector<var_bind_t> var_binds = {
+    std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 1 }, std::make_tuple(11, 8))
+  };
+  root_index_t root_index = build_root_index(var_binds);
+  std::vector<index_spec_t> index_specs;
+  std::vector<result_buffer> results(var_binds.size());
+  std::vector<SnmpError> errors;
+  SnmpConfig config;
+  config.adaptive_bulk_repetitions = true;
+  config.min_bulk_repetitions = 2;
+  config.max_bulk_repetitions = 16;
+  host_t host = std::make_tuple(0, "localhost", "public");
+  std::list<async_state> sessions;
+
+  // sessions start from the max-repetitions seeded for the host
+  clear_bulk_repetitions();
+  set_bulk_repetitions({ { "localhost", 8 } });
+  create_session(
+      SNMP_MSG_GETBULK, host, var_binds, root_index, index_specs, results, errors, config,
+      sessions
+  );
+  REQUIRE( sessions.size() == 1 );
+  auto &st = sessions.back();
+  REQUIRE( st.bulk_repetitions == 8 );
+
+  // fast complete responses grow the repetitions up to the maximum
+  grow_bulk_repetitions(st, 0, true);
+  REQUIRE( st.bulk_repetitions == 16 );
+  grow_bulk_repetitions(st, 0, true);
+  REQUIRE( st.bulk_repetitions == 16 );
+
+  // incomplete or slow responses do not grow the repetitions
+  REQUIRE( shrink_bulk_repetitions(st) );
+  grow_bulk_repetitions(st, 0, false);
+  REQUIRE( st.bulk_repetitions == 8 );
+  grow_bulk_repetitions(st, snmp_sess_session(st.session)->timeout, true);
+  REQUIRE( st.bulk_repetitions == 8 );
+
+  // the repetitions shrink down to the minimum
+  REQUIRE( shrink_bulk_repetitions(st) );
+  REQUIRE( st.bulk_repetitions == 4 );
+  REQUIRE( shrink_bulk_repetitions(st) );
+  REQUIRE( st.bulk_repetitions == 2 );
+  REQUIRE( !shrink_bulk_repetitions(st) );
+
+  // the repetitions the session settled on are reported for the host
+  close_session(st, -1);
+  auto repetitions = get_bulk_repetitions();
+  REQUIRE( repetitions.size() == 1 );
+  REQUIRE( repetitions["localhost"] == 2 );
+  REQUIRE( clear_bulk_repetitions() == 1 );
+
+}
@@ -0,0 +1,350 @@
+#include <chrono>
+#include <iostream>
+#include <sys/stat.h>
+
+#include "catch.hpp"
+#include "../../snmp_fetch/api/results.hpp"
+
+using namespace snmp_fetch;
+
+TEST_CASE( "Test result buffer growth", "[results]" ) {
+
+  result_buffer buffer;
+
+  REQUIRE( buffer.data == NULL );
+  REQUIRE( buffer.size == 0 );
+
+  uint8_t *row = buffer.extend(8);
+
+  REQUIRE( row == buffer.data );
+  REQUIRE( buffer.size == 8 );
+  REQUIRE( buffer.capacity >= SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY );
+  REQUIRE( row[7] == 0 );
+
+  buffer.reserve(1 << 20);
+  REQUIRE( buffer.capacity >= (1 << 20) );
+  REQUIRE( buffer.size == 8 );
+
+  uint8_t *data = buffer.release();
+  REQUIRE( buffer.data == NULL );
+  REQUIRE( buffer.size == 0 );
+  free(data);
+
+}
+
+TEST_CASE( "Test result buffer spill", "[results]" ) {
+
+  char spill_directory[] = "/tmp/snmp-fetch-test-XXXXXX";
+  REQUIRE( mkdtemp(spill_directory) != NULL );
+
+  SnmpConfig config;
+  config.spill_directory = spill_directory;
+  config.max_result_bytes_in_memory = SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY;
+
+  result_buffer buffer(config);
+  for (uint64_t i = 0; i < SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY; ++i)
+    memcpy(buffer.extend(sizeof(uint64_t)), &i, sizeof(uint64_t));
+
+  // spilled once grown past max bytes in memory without losing the results
+  REQUIRE( buffer.spilled() );
+  REQUIRE( buffer.size == SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY * sizeof(uint64_t) );
+  REQUIRE( ((uint64_t *)buffer.data)[SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY - 1] ==
+           SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY - 1 );
+
+  // appending to an in memory buffer spills it
+  result_buffer head(config);
+  head.extend(sizeof(uint64_t));
+  REQUIRE( !head.spilled() );
+  head.append(std::move(buffer));
+  REQUIRE( head.spilled() );
+  REQUIRE( head.size == (SNMP_FETCH__MIN_RESULT_BUFFER_CAPACITY + 1) * sizeof(uint64_t) );
+  REQUIRE( ((uint64_t *)head.data)[1] == 0 );
+
+  // the released file is truncated to the size of the results
+  size_t size = head.size;
+  std::string path = head.release_file();
+  struct stat st;
+  REQUIRE( stat(path.c_str(), &st) == 0 );
+  REQUIRE( (size_t)st.st_size == size );
+  unlink(path.c_str());
+
+  REQUIRE( rmdir(spill_directory) == 0 );
+
+}
+
+TEST_CASE( "Test root oid lookup", "[results]" ) {
+
+  std::vector<var_bind_t> var_binds = {
+    std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 2 }, std::make_tuple(0, 0)),
+    std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 1, 5 }, std::make_tuple(0, 0)),
+    std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 1, 10 }, std::make_tuple(0, 0))
+  };
+  root_index_t root_index = build_root_index(var_binds);
+
+  REQUIRE( root_index == root_index_t({ 1, 2, 0 }) );
+
+  auto lookup = [&](oid_t name) {
+    variable_list resp_var_bind;
+    memset(&resp_var_bind, 0, sizeof(resp_var_bind));
+    resp_var_bind.name = (oid *)name.data();
+    resp_var_bind.name_length = name.size();
+    return find_root(resp_var_bind, var_binds, root_index);
+  };
+
+  REQUIRE( lookup({ 1, 3, 6, 1, 5, 7 }) == 1 );
+  REQUIRE( lookup({ 1, 3, 6, 1, 10 }) == 2 );
+  REQUIRE( lookup({ 1, 3, 6, 2, 1, 1 }) == 0 );
+  REQUIRE( !lookup({ 1, 3, 6, 1, 6 }) );
+  REQUIRE( !lookup({ 1, 3, 6, 1 }) );
+  REQUIRE( !lookup({ 1, 3, 6, 3 }) );
+  REQUIRE( !lookup({ 0 }) );
+
+}
+
+TEST_CASE( "Test index decoding", "[results]" ) {
+
+  // (ifIndex, ipAddress, length prefixed octet string, implied oid)
+  index_spec_t spec = {
+    std::make_tuple(INDEX_INTEGER, 1, 8),
+    std::make_tuple(INDEX_FIXED, 4, 1),
+    std::make_tuple(INDEX_LENGTH_PREFIXED, 3, 1),
+    std::make_tuple(INDEX_IMPLIED, 2, 8)
+  };
+  REQUIRE( index_spec_size(spec) == 8 + 8 + (8 + 8) + (8 + 16) );
+
+  uint64_t u64;
+
+  // complete index
+  {
+    std::vector<uint8_t> buffer(index_spec_size(spec));
+    oid suboids[] = { 7, 10, 0, 0, 1, 4, 'a', 'b', 'c', 'd', 1, 3 };
+    decode_index(buffer.data(), suboids, sizeof(suboids) / sizeof(oid), spec);
+
+    memcpy(&u64, &buffer[0], 8);
+    REQUIRE( u64 == 7 );
+    REQUIRE( std::vector<uint8_t>(&buffer[8], &buffer[16]) ==
+        std::vector<uint8_t>({ 10, 0, 0, 1, 0, 0, 0, 0 }) );
+    // the string is truncated to the size of the field but all 4 suboids are consumed
+    memcpy(&u64, &buffer[16], 8);
+    REQUIRE( u64 == 4 );
+    REQUIRE( std::vector<uint8_t>(&buffer[24], &buffer[32]) ==
+        std::vector<uint8_t>({ 'a', 'b', 'c', 0, 0, 0, 0, 0 }) );
+    memcpy(&u64, &buffer[32], 8);
+    REQUIRE( u64 == 2 );
+    memcpy(&u64, &buffer[40], 8);
+    REQUIRE( u64 == 1 );
+    memcpy(&u64, &buffer[48], 8);
+    REQUIRE( u64 == 3 );
+  }
+
+  // truncated index
+  {
+    std::vector<uint8_t> buffer(index_spec_size(spec));
+    oid suboids[] = { 7, 10, 0, 0, 1, 4, 'a' };
+    decode_index(buffer.data(), suboids, sizeof(suboids) / sizeof(oid), spec);
+
+    // the length is clamped to the remaining suboids
+    memcpy(&u64, &buffer[16], 8);
+    REQUIRE( u64 == 1 );
+    REQUIRE( buffer[24] == 'a' );
+    REQUIRE( buffer[25] == 0 );
+    memcpy(&u64, &buffer[32], 8);
+    REQUIRE( u64 == 0 );
+  }
+
+}
+
+
+TEST_CASE( "Test partial failures", "[results]" ) {
+
+  std::vector<var_bind_t> var_binds;
+  for (oid i = 1; i <= 3; ++i)
+    var_binds.push_back(
+        std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 1, i }, std::make_tuple(11, 8))
+    );
+  root_index_t root_index = build_root_index(var_binds);
+  std::vector<index_spec_t> index_specs;
+  std::vector<result_buffer> results(var_binds.size());
+  std::vector<SnmpError> errors;
+  SnmpConfig config;
+  config.partition_retries = 1;
+
+  async_state state;
+  state.async_status = ASYNC_WAITING;
+  state.pdu_type = SNMP_MSG_GETBULK;
+  state.host = std::make_tuple(0, "localhost", "public");
+  state.var_binds = &var_binds;
+  state.root_index = &root_index;
+  state.index_specs = &index_specs;
+  state.results = &results;
+  state.errors = &errors;
+  state.config = &config;
+  state.broken = false;
+  std::vector<oid_t> oids;
+  for (auto &&vb: var_binds)
+    oids.push_back(std::get<0>(vb));
+  state.next_var_binds.push_back(partition_t { 0, oids, 0, 0, 0, 0 });
+  state.next_var_binds.push_back(partition_t { 3, { { 1, 3, 6, 1, 4 } }, 0, 0, 0, 0 });
+  auto &partition = state.next_var_binds.front();
+
+  // send the partition and respond with an error status
+  int reqid = 0;
+  auto respond = [&](long errstat, long errindex) {
+    partition.reqid = ++reqid;
+    state.inflight[reqid] = state.next_var_binds.begin();
+    state.async_status = ASYNC_WAITING;
+    netsnmp_pdu *pdu = snmp_pdu_create(SNMP_MSG_RESPONSE);
+    for (auto &&vb: partition.var_binds)
+      if (!vb.empty())
+        snmp_add_null_var(pdu, (const oid *)vb.data(), vb.size());
+    pdu->errstat = errstat;
+    pdu->errindex = errindex;
+    async_cb(NETSNMP_CALLBACK_OP_RECEIVED_MESSAGE, NULL, reqid, pdu, &state);
+    snmp_free_pdu(pdu);
+  };
+
+  // an error index drops the Nth requested variable binding and resends the rest
+  respond(SNMP_ERR_GENERR, 2);
+  REQUIRE( errors.size() == 1 );
+  REQUIRE( errors[0].err_oid == oid_t({ 1, 3, 6, 1, 2 }) );
+  REQUIRE( partition.var_binds == std::vector<oid_t>({ oids[0], {}, oids[2] }) );
+  REQUIRE( partition.reqid == 0 );
+  REQUIRE( partition.retry_at == 0 );
+  REQUIRE( state.inflight.empty() );
+  REQUIRE( state.async_status == ASYNC_IDLE );
+  respond(SNMP_ERR_GENERR, 2);
+  REQUIRE( errors.size() == 2 );
+  REQUIRE( errors[1].err_oid == oid_t({ 1, 3, 6, 1, 3 }) );
+  REQUIRE( partition.var_binds == std::vector<oid_t>({ oids[0], {}, {} }) );
+
+  // an error status without a valid error index backs off and resends the partition
+  respond(SNMP_ERR_GENERR, 7);
+  REQUIRE( errors.size() == 2 );
+  REQUIRE( partition.attempts == 1 );
+  REQUIRE( partition.retry_at > monotonic_time() );
+  REQUIRE( partition.var_binds[0] == oids[0] );
+
+  // once the retries are exhausted only the partition is dropped
+  respond(SNMP_ERR_GENERR, 0);
+  REQUIRE( errors.size() == 3 );
+  REQUIRE( !errors[2].err_oid.has_value() );
+  REQUIRE( partition.var_binds[0].empty() );
+  REQUIRE( state.next_var_binds.back().var_binds[0] == oid_t({ 1, 3, 6, 1, 4 }) );
+
+  // a timeout backs off and resends the partition from its last good oids
+  auto &last = state.next_var_binds.back();
+  last.reqid = ++reqid;
+  state.inflight[reqid] = std::prev(state.next_var_binds.end());
+  async_cb(NETSNMP_CALLBACK_OP_TIMED_OUT, NULL, reqid, NULL, &state);
+  REQUIRE( errors.size() == 3 );
+  REQUIRE( last.attempts == 1 );
+  REQUIRE( last.var_binds[0] == oid_t({ 1, 3, 6, 1, 4 }) );
+
+  // once the retries are exhausted a timeout drops all the work of the session
+  last.reqid = ++reqid;
+  state.inflight[reqid] = std::prev(state.next_var_binds.end());
+  async_cb(NETSNMP_CALLBACK_OP_TIMED_OUT, NULL, reqid, NULL, &state);
+  REQUIRE( errors.size() == 4 );
+  REQUIRE( errors[3].type == TIMEOUT_ERROR );
+  REQUIRE( state.next_var_binds.empty() );
+  REQUIRE( state.async_status == ASYNC_IDLE );
+
+}
+
+TEST_CASE( "Benchmark root oid lookup", "[.][benchmark]" ) {
+
+  // the cost per response variable binding should stay flat as the number of roots grows
+  const size_t lookups = 1000000;
+  for (size_t roots = 1; roots <= 10000; roots *= 10) {
+    std::vector<var_bind_t> var_binds;
+    for (size_t i = 0; i < roots; ++i)
+      var_binds.push_back(
+          std::make_tuple<oid_t, var_bind_size_t>({ 1, 3, 6, 1, i }, std::make_tuple(0, 0))
+      );
+    root_index_t root_index = build_root_index(var_binds);
+
+    oid name[] = { 1, 3, 6, 1, 0, 1 };
+    variable_list resp_var_bind;
+    memset(&resp_var_bind, 0, sizeof(resp_var_bind));
+    resp_var_bind.name = name;
+    resp_var_bind.name_length = sizeof(name) / sizeof(oid);
+
+    size_t found = 0;
+    auto start = std::chrono::steady_clock::now();
+    for (size_t i = 0; i < lookups; ++i) {
+      name[4] = i % roots;
+      found += find_root(resp_var_bind, var_binds, root_index).has_value();
+    }
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+
+    std::cout
+      << "roots: " << roots
+      << " ns/var_bind: " << elapsed.count() * 1e9 / lookups << std::endl;
+
+    REQUIRE( found == lookups );
+  }
+
+}
+
+TEST_CASE( "Benchmark appending a walk to the results", "[.][benchmark]" ) {
+
+  // synthesize a walk of a single variable binding from a single host
+  const size_t rows = 10000000;
+  std::vector<var_bind_t> var_binds = {
+    std::make_tuple<oid_t, var_bind_size_t>(
+      { 1, 3, 6, 1 }, std::make_tuple(11, 8)
+    )
+  };
+  root_index_t root_index = build_root_index(var_binds);
+  std::vector<index_spec_t> index_specs;
+  std::vector<result_buffer> results(var_binds.size());
+  std::vector<SnmpError> errors;
+  SnmpConfig config;
+
+  async_state state;
+  state.pdu_type = SNMP_MSG_GETBULK;
+  state.host = std::make_tuple(0, "localhost", "public");
+  state.var_binds = &var_binds;
+  state.root_index = &root_index;
+  state.index_specs = &index_specs;
+  state.next_var_binds.push_back(partition_t{0, { std::get<0>(var_binds[0]) }, 0, 0, 0, 0});
+  state.results = &results;
+  state.errors = &errors;
+  state.config = &config;
+
+  // build a response variable binding that is incremented for each row
+  oid name[] = { 1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 0 };
+  uint64_t value = 0;
+  variable_list resp_var_bind;
+  memset(&resp_var_bind, 0, sizeof(resp_var_bind));
+  resp_var_bind.name = name;
+  resp_var_bind.name_length = sizeof(name) / sizeof(oid);
+  resp_var_bind.type = ASN_COUNTER64;
+  resp_var_bind.val.bitstring = (u_char *)&value;
+  resp_var_bind.val_len = sizeof(value);
+
+  // reserve from the estimate and count the reallocations while appending
+  reserve_results(state.pdu_type, 1, var_binds, results, config);
+  size_t reallocations = 0;
+  uint8_t *last_data = results[0].data;
+
+  auto start = std::chrono::steady_clock::now();
+  for (size_t i = 0; i < rows; ++i) {
+    ++name[10];
+    ++value;
+    append_result(resp_var_bind, state, state.next_var_binds.front());
+    if (results[0].data != last_data) {
+      last_data = results[0].data;
+      ++reallocations;
+    }
+  }
+  std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+
+  std::cout
+    << "rows/s: " << rows / elapsed.count() << std::endl
+    << "bytes: " << results[0].size << std::endl
+    << "reallocations: " << reallocations << std::endl;
+
+  REQUIRE( results[0].size == rows * var_bind_dtype_size(var_binds[0]) );
+
+}
@@ -0,0 +1,154 @@
+#include <fcntl.h>
+#include <poll.h>
+
+#include "catch.hpp"
+#include "../../snmp_fetch/api/pool.hpp"
+#include "../../snmp_fetch/api/transport.hpp"
+
+using namespace snmp_fetch;
+
+// GetResponse-PDU of an SNMPv2c message with the community "public" and the request-id
+static std::string
+test_response(
+    uint8_t reqid
+) {
+  const char message[] = {
+    0x30, 0x18,
+      0x02, 0x01, 0x01,
+      0x04, 0x06, 'p', 'u', 'b', 'l', 'i', 'c',
+      (char)0xa2, 0x0b,
+        0x02, 0x01, (char)reqid,
+        0x02, 0x01, 0x00,
+        0x02, 0x01, 0x00,
+        0x30, 0x00
+  };
+  return std::string(message, sizeof(message));
+}
+
+TEST_CASE( "Test peername address", "[transport]" ) {
+
+  std::string domain, host, port;
+  REQUIRE( split_peername("udp6:[2001:db8::1]:1161", domain, host, port) );
+  REQUIRE( domain == "udp6" );
+  REQUIRE( host == "2001:db8::1" );
+  REQUIRE( port == "1161" );
+  REQUIRE( split_peername("::1", domain, host, port) );
+  REQUIRE( host == "::1" );
+  REQUIRE( port == SNMP_FETCH__DEFAULT_PORT );
+  REQUIRE( !split_peername("tcp:localhost:1161", domain, host, port) );
+
+  struct sockaddr_storage address;
+  socklen_t address_length;
+  REQUIRE( peername_address("udp:127.0.0.1:1161", address, address_length) );
+  REQUIRE( address.ss_family == AF_INET );
+  REQUIRE( ntohs(((struct sockaddr_in *)&address)->sin_port) == 1161 );
+  REQUIRE( peername_address("udp6:[::1]", address, address_length) );
+  REQUIRE( address.ss_family == AF_INET6 );
+  REQUIRE( ntohs(((struct sockaddr_in6 *)&address)->sin6_port) == 161 );
+
+  // host names are resolved before a transport is opened
+  REQUIRE( !peername_address("localhost:1161", address, address_length) );
+
+}
+
+TEST_CASE( "Test response request-id", "[transport]" ) {
+
+  REQUIRE( response_reqid(test_response(7)) == 7 );
+  REQUIRE( response_reqid(test_response(7).substr(0, 16)) == 0 );
+  REQUIRE( response_reqid("") == 0 );
+
+}
+
+TEST_CASE( "Test shared socket demultiplexing", "[transport]" ) {
+
+  // an agent on the loopback address
+  int agent = socket(AF_INET, SOCK_DGRAM, 0);
+  struct sockaddr_in agent_address;
+  memset(&agent_address, 0, sizeof(agent_address));
+  agent_address.sin_family = AF_INET;
+  agent_address.sin_addr.s_addr = htonl(INADDR_LOOPBACK);
+  socklen_t agent_length = sizeof(agent_address);
+  REQUIRE( bind(agent, (struct sockaddr *)&agent_address, agent_length) == 0 );
+  REQUIRE( getsockname(agent, (struct sockaddr *)&agent_address, &agent_length) == 0 );
+  std::string peername = "udp:127.0.0.1:" + std::to_string(ntohs(agent_address.sin_port));
+
+  // two sessions to the same agent through one shared socket
+  shared_socket shared { -1, AF_UNSPEC, {} };
+  REQUIRE( open_shared_socket(shared) );
+  netsnmp_transport *first = open_shared_transport(shared, peername);
+  netsnmp_transport *second = open_shared_transport(shared, peername);
+  REQUIRE( first != NULL );
+  REQUIRE( second != NULL );
+  REQUIRE( is_shared_transport(first) );
+  REQUIRE( first->sock == shared.sock );
+  REQUIRE( shared.peers.size() == 2 );
+  async_state first_state {};
+  async_state second_state {};
+  ((shared_peer *)first->data)->state = &first_state;
+  ((shared_peer *)second->data)->state = &second_state;
+  second_state.inflight[7] = {};
+
+  // the agent answers the address the request was sent from
+  std::string request = "request";
+  REQUIRE( first->f_send(first, (void *)request.data(), request.size(), NULL, NULL) == 7 );
+  char buf[SNMP_FETCH__MAX_DATAGRAM_SIZE];
+  struct sockaddr_storage from;
+  socklen_t from_length = sizeof(from);
+  REQUIRE(
+      recvfrom(agent, buf, sizeof(buf), 0, (struct sockaddr *)&from, &from_length) == 7
+  );
+  auto reply = [&](const std::string &datagram) {
+    sendto(agent, datagram.data(), datagram.size(), 0, (struct sockaddr *)&from, from_length);
+    struct pollfd pfd = { shared.sock, POLLIN, 0 };
+    poll(&pfd, 1, 1000);
+  };
+
+  // a datagram sent while others are queued waits behind them and is sent in order once flushed
+  shared.outgoing.emplace_back(
+      ((shared_peer *)first->data)->address, ((shared_peer *)first->data)->address_length,
+      "queued"
+  );
+  REQUIRE( first->f_send(first, (void *)request.data(), request.size(), NULL, NULL) == 7 );
+  REQUIRE( shared.outgoing.size() == 2 );
+  flush_shared_socket(shared);
+  REQUIRE( shared.outgoing.empty() );
+  REQUIRE( recv(agent, buf, sizeof(buf), 0) == 6 );
+  REQUIRE( recv(agent, buf, sizeof(buf), 0) == 7 );
+
+  // a response is queued on the session with the request-id in flight
+  std::vector<async_state *> ready;
+  reply(test_response(7));
+  read_shared_socket(shared, ready);
+  REQUIRE( ready == std::vector<async_state *> { &second_state } );
+  REQUIRE( ((shared_peer *)first->data)->datagrams.empty() );
+  REQUIRE( ((shared_peer *)second->data)->datagrams.size() == 1 );
+
+  // net-snmp reads the queued datagram through the transport
+  void *opaque;
+  int olength;
+  REQUIRE( second->f_recv(second, buf, sizeof(buf), &opaque, &olength) == 26 );
+  REQUIRE( second->f_recv(second, buf, sizeof(buf), &opaque, &olength) == -1 );
+
+  // a response no session requested is dropped and a message which cannot be parsed is queued
+  // on every session at the address
+  ready.clear();
+  reply(test_response(8));
+  reply("garbage");
+  read_shared_socket(shared, ready);
+  REQUIRE( ready.size() == 2 );
+  REQUIRE( ((shared_peer *)first->data)->datagrams.size() == 1 );
+  REQUIRE( ((shared_peer *)second->data)->datagrams.size() == 1 );
+
+  // closing a transport unregisters the peer and leaves the shared socket open
+  first->f_close(first);
+  netsnmp_transport_free(first);
+  REQUIRE( shared.peers.size() == 1 );
+  REQUIRE( fcntl(shared.sock, F_GETFD) != -1 );
+  second->f_close(second);
+  netsnmp_transport_free(second);
+  REQUIRE( shared.peers.empty() );
+
+  close_shared_socket(shared);
+  close(agent);
+
+}
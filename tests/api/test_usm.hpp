@@ -0,0 +1,104 @@
+#include "catch.hpp"
+#include "../../snmp_fetch/api/usm.hpp"
+
+using namespace snmp_fetch;
+
+TEST_CASE( "Test SNMPv3 credentials", "[usm]" ) {
+
+  REQUIRE_NOTHROW( UsmCredentials("user", {}, {}, {}, {}, "") );
+  REQUIRE_NOTHROW( UsmCredentials("user", "SHA", "passphrase", "AES", "passphrase", "") );
+  REQUIRE_THROWS_AS(
+      UsmCredentials("", {}, {}, {}, {}, ""), std::invalid_argument
+  );
+  REQUIRE_THROWS_AS(
+      UsmCredentials("user", {}, {}, "AES", "passphrase", ""), std::invalid_argument
+  );
+  REQUIRE_THROWS_AS(
+      UsmCredentials("user", "SHA", "short", {}, {}, ""), std::invalid_argument
+  );
+
+  // passphrases are masked when printed
+  UsmCredentials credentials("user", "SHA", "auth-secret", "AES", "priv-secret", "");
+  REQUIRE( credentials.to_string().find("secret") == std::string::npos );
+
+}
+
+TEST_CASE( "Test SNMPv3 key cache", "[usm]" ) {
+
+  usm_cache cache;
+  UsmCredentials credentials("user", "MD5", "passphrase", "DES", "passphrase", "ctx");
+
+  // the master keys are derived once per protocol and passphrase
+  netsnmp_session session;
+  snmp_sess_init(&session);
+  usm_keys keys;
+  REQUIRE( configure_usm_session(session, credentials, "udp:127.0.0.1:161", cache, 0, keys) );
+  REQUIRE( session.version == SNMP_VERSION_3 );
+  REQUIRE( session.securityLevel == SNMP_SEC_LEVEL_AUTHPRIV );
+  REQUIRE( std::string(session.contextName, session.contextNameLen) == "ctx" );
+  REQUIRE( cache.keys.size() == 1 );
+
+  u_char ku[USM_AUTH_KU_LEN];
+  size_t ku_length = sizeof(ku);
+  REQUIRE(
+      generate_Ku(
+        usmHMACMD5AuthProtocol, USM_AUTH_PROTO_MD5_LEN,
+        (const u_char *)"passphrase", 10, ku, &ku_length
+      ) == SNMPERR_SUCCESS
+  );
+  REQUIRE( session.securityAuthKeyLen == ku_length );
+  REQUIRE( memcmp(session.securityAuthKey, ku, ku_length) == 0 );
+  REQUIRE( memcmp(session.securityPrivKey, ku, ku_length) == 0 );
+
+  // without a cached engine net-snmp discovers the engine and localizes the keys
+  REQUIRE( session.securityEngineIDLen == 0 );
+  REQUIRE( session.securityAuthLocalKeyLen == 0 );
+
+  // a cached engine skips the discovery and the keys are localized to it
+  std::string engine_id = "\x80\x00\x1f\x88\x04test";
+  cache.engines["udp:127.0.0.1:161"] = std::make_tuple(
+      engine_id, 1, 100, monotonic_time(), monotonic_time() + 60000000
+  );
+  snmp_sess_init(&session);
+  usm_keys cached_keys;
+  REQUIRE(
+      configure_usm_session(
+        session, credentials, "udp:127.0.0.1:161", cache, 60000000, cached_keys
+      )
+  );
+  REQUIRE(
+      std::string((const char *)session.securityEngineID, session.securityEngineIDLen) ==
+      engine_id
+  );
+  REQUIRE( session.engineBoots == 1 );
+  REQUIRE( session.engineTime >= 100 );
+  REQUIRE( session.securityAuthLocalKeyLen > 0 );
+  REQUIRE( session.securityPrivLocalKeyLen > 0 );
+  REQUIRE( cache.localized_keys.size() == 1 );
+
+  // expired engines are rediscovered
+  std::get<4>(cache.engines["udp:127.0.0.1:161"]) = 0;
+  snmp_sess_init(&session);
+  usm_keys expired_keys;
+  REQUIRE(
+      configure_usm_session(
+        session, credentials, "udp:127.0.0.1:161", cache, 60000000, expired_keys
+      )
+  );
+  REQUIRE( session.securityEngineIDLen == 0 );
+
+}
+
+TEST_CASE( "Test clear SNMPv3 cache", "[usm]" ) {
+
+  usm_cache &cache = global_usm_cache();
+  clear_usm_cache();
+  {
+    std::lock_guard<std::mutex> lock(cache.mutex);
+    cache.keys[std::make_tuple("MD5", "passphrase")] = "key";
+    cache.engines["udp:127.0.0.1:161"] = std::make_tuple("engine", 0, 0, 0, 0);
+  }
+  REQUIRE( clear_usm_cache() == 2 );
+  REQUIRE( clear_usm_cache() == 0 );
+
+}
@@ -9,3 +9,39 @@ TEST_CASE( "Test utility methods", "[utils]" ) {
   REQUIRE( snmp_fetch::oid_to_string(oid) == ".0.1.2.3.4" );
 
 }
+
+TEST_CASE( "Test token bucket", "[utils]" ) {
+
+  // unlimited buckets always hold a token
+  snmp_fetch::token_bucket unlimited = snmp_fetch::init_token_bucket(0);
+  for (int i = 0; i < 10; ++i) {
+    REQUIRE( snmp_fetch::token_wait(unlimited, 0) == 0 );
+    snmp_fetch::take_token(unlimited, 0);
+  }
+
+  // a bucket of 10 tokens per second holds a single token
+  snmp_fetch::token_bucket slow = snmp_fetch::init_token_bucket(10);
+  REQUIRE( slow.burst == 1 );
+  uint64_t now = 1000000;
+  REQUIRE( snmp_fetch::token_wait(slow, now) == 0 );
+  snmp_fetch::take_token(slow, now);
+  REQUIRE( snmp_fetch::token_wait(slow, now) == 100000 );
+  REQUIRE( snmp_fetch::token_wait(slow, now + 100000) == 0 );
+
+  // a bucket of 1000 tokens per second holds 10 tokens which refill at the rate
+  snmp_fetch::token_bucket fast = snmp_fetch::init_token_bucket(1000);
+  REQUIRE( fast.burst == 10 );
+  for (int i = 0; i < 10; ++i) {
+    REQUIRE( snmp_fetch::token_wait(fast, now) == 0 );
+    snmp_fetch::take_token(fast, now);
+  }
+  REQUIRE( snmp_fetch::token_wait(fast, now) == 1000 );
+  REQUIRE( snmp_fetch::token_wait(fast, now + 5000) == 0 );
+
+  // an idle bucket does not hold more than its burst
+  now += 10000000;
+  for (int i = 0; i < 10; ++i)
+    snmp_fetch::take_token(fast, now);
+  REQUIRE( snmp_fetch::token_wait(fast, now) == 1000 );
+
+}
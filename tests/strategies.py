@@ -2,13 +2,16 @@
 
 import re
 import string
-from typing import Sequence, Text, Tuple, cast
+from typing import Any, Callable, Optional, Sequence, Text, Tuple, cast
 
 import hypothesis
 import hypothesis.strategies as st
 import numpy as np
 
 from snmp_fetch import PduType, SnmpErrorType
+from snmp_fetch.index_spec import (
+    IndexField, fixed_octet_string, integer, ip_address, object_identifier, octet_string
+)
 
 VALID_HOSTNAMES = [
     '127.0.0.1:1161',  # IPv4
@@ -39,8 +42,9 @@ VALID_COMMUNITIES = [
 def hosts(
         hostnames: Sequence[Text],
         communities: Sequence[Text],
+        unique_by: Optional[Callable[[Tuple[int, Text, Text]], Any]] = None
 ) -> hypothesis.searchstrategy.strategies.SearchStrategy[Sequence[Tuple[int, Text, Text]]]:
-    """Generate a list of test hosts."""
+    """Generate a list of test hosts, optionally unique by a key."""
     return st.lists(
         cast(
             hypothesis.searchstrategy.strategies.SearchStrategy[Tuple[int, Text, Text]],
@@ -49,17 +53,18 @@ def hosts(
                 st.one_of([st.just(host) for host in hostnames]),
                 st.one_of([st.just(community) for community in communities])
             )
-        ), min_size=1
+        ), min_size=1, unique_by=unique_by
     )
 
 
-def valid_hosts() -> (
-        hypothesis.searchstrategy.strategies.SearchStrategy[Sequence[Tuple[int, Text, Text]]]
-):
+def valid_hosts(
+        unique_by: Optional[Callable[[Tuple[int, Text, Text]], Any]] = None
+) -> hypothesis.searchstrategy.strategies.SearchStrategy[Sequence[Tuple[int, Text, Text]]]:
     """Generate valid testing hostnames."""
     return hosts(
         VALID_HOSTNAMES,
-        VALID_COMMUNITIES
+        VALID_COMMUNITIES,
+        unique_by
     )
 
 
@@ -148,4 +153,19 @@ def error_types() -> (
         st.just(SnmpErrorType.TRANSPORT_DISCONNECT_ERROR),
         st.just(SnmpErrorType.CREATE_RESPONSE_PDU_ERROR),
         st.just(SnmpErrorType.VALUE_WARNING),
+        st.just(SnmpErrorType.DEADLINE_ERROR),
+    ])
+
+
+def index_fields() -> hypothesis.searchstrategy.strategies.SearchStrategy[Sequence[IndexField]]:
+    """Generate the fields of a table index."""
+    sizes = st.integers(min_value=1, max_value=64)
+    return st.lists(st.one_of([
+        st.builds(integer, st.just('')),
+        st.builds(ip_address, st.just('')),
+        st.builds(fixed_octet_string, st.just(''), sizes),
+        st.builds(octet_string, st.just(''), sizes, st.booleans()),
+        st.builds(object_identifier, st.just(''), sizes, st.booleans())
+    ]), min_size=1, max_size=8).map(lambda xs: [
+        IndexField(f'field{i}', x.kind, x.size, x.element) for i, x in enumerate(xs)
     ])
@@ -0,0 +1,84 @@
+"""Index spec tests."""
+
+from typing import Sequence
+
+import hypothesis
+import numpy as np
+import pytest
+
+import tests.strategies as _st
+from snmp_fetch import ObjectType, object_type
+from snmp_fetch.api import IndexKind
+from snmp_fetch.index_spec import (
+    IndexField, index_dtype, index_spec, integer, ip_address, octet_string
+)
+
+
+def spec_size(spec: Sequence[IndexField]) -> int:
+    """Get the size of a decoded index as computed by the C API."""
+    def _size(kind: IndexKind, size: int, element: int) -> int:
+        if kind == IndexKind.INDEX_INTEGER:
+            return 8
+        return (0 if kind == IndexKind.INDEX_FIXED else 8) + ((size * element + 7) & ~0x07)
+    return sum(_size(*field.spec) for field in spec)
+
+
+@hypothesis.given(
+    fields=_st.index_fields()  # type: ignore
+)
+def test_index_dtype(fields: Sequence[IndexField]) -> None:
+    """Test the dtype of an index matches the layout decoded by the C API."""
+    dtype = index_dtype(fields)
+    assert dtype.itemsize == spec_size(fields)
+    assert dtype.itemsize % 8 == 0
+    for field in fields:
+        assert field.name in dtype.names
+        if field.kind in {IndexKind.INDEX_LENGTH_PREFIXED, IndexKind.INDEX_IMPLIED}:
+            assert dtype[f'{field.name}_length'] == np.dtype(np.uint64)
+
+
+def test_index_field_validation() -> None:
+    """Test invalid index fields."""
+    with pytest.raises(ValueError):
+        octet_string('x', 0)
+    with pytest.raises(ValueError):
+        IndexField('x', IndexKind.INDEX_FIXED, 1, np.uint32)
+    with pytest.raises(ValueError):
+        index_spec(np.dtype([('x', np.uint32)]))
+
+
+def test_object_type_index_specs() -> None:
+    """Test the index specs of an ObjectType with a declarative index."""
+    # pylint: disable=unused-variable, too-few-public-methods
+
+    @object_type(oid='.1.3.6.1.2.1.4.22.1')
+    class IpNetToMediaEntry(ObjectType):
+        """IpNetToMediaEntry."""
+
+        index = [integer('ipNetToMediaIfIndex'), ip_address('ipNetToMediaNetAddress')]
+
+    @object_type(IpNetToMediaEntry, oid='.2')
+    class IpNetToMediaPhysAddress(ObjectType):
+        """IpNetToMediaPhysAddress."""
+
+        dtype = np.dtype([('ipNetToMediaPhysAddress', (np.uint8, 8))])
+
+    @object_type(IpNetToMediaEntry, oid='.4')
+    class IpNetToMediaType(ObjectType):
+        """IpNetToMediaType."""
+
+        dtype = np.dtype([('ipNetToMediaType', np.uint64)])
+
+    spec = [(IndexKind.INDEX_INTEGER, 1, 8), (IndexKind.INDEX_FIXED, 4, 1)]
+    assert IpNetToMediaEntry.index_specs() == [spec, spec]
+    for (oid, (oid_size, _)) in IpNetToMediaEntry.null_var_binds():
+        assert oid_size == len(oid) * 8 + 16
+
+    @object_type(oid='.1.3.6.1.2.1.2.2.1.10')
+    class IfInOctets(ObjectType):
+        """IfInOctets."""
+
+        index = np.dtype([('ifIndex', np.uint64)])
+        dtype = np.dtype([('ifInOctets', np.uint64)])
+
+    assert IfInOctets.index_specs() == [[]]
@@ -0,0 +1,96 @@
+"""Inet extension type tests."""
+
+from typing import Sequence
+
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
+import pytest
+
+from snmp_fetch.pandas_extension.types import ip_address as ip
+from snmp_fetch.pandas_extension.types.inet import InetArray
+
+
+def addresses() -> st.SearchStrategy:
+    """Generate IPv4 and IPv6 addresses."""
+    return st.one_of(
+        st.integers(min_value=0, max_value=2 ** 32 - 1).map(ip.IPv4Address),
+        st.integers(min_value=0, max_value=2 ** 128 - 1).map(ip.IPv6Address)
+    )
+
+
+def sort_key(address: ip.IP_ADDRESS_T) -> tuple:
+    """Sort addresses by version then address."""
+    return (address.version, int(address))
+
+
+@hypothesis.given(
+    objs=st.lists(st.one_of(addresses(), st.none()))
+)  # type: ignore
+def test_inet_array(objs: Sequence[ip.IP_ADDRESS_T]) -> None:
+    """Test round tripping, sorting and factorizing addresses."""
+    obj = pd.Series(objs, dtype='inet')
+    assert obj.nbytes == 17 * len(objs)
+    assert [None if pd.isna(x) else x for x in obj] == objs
+    assert obj.isna().tolist() == [x is None for x in objs]
+    present = [x for x in objs if x is not None]
+    assert obj.sort_values().dropna().tolist() == sorted(present, key=sort_key)
+    assert sorted(obj.dropna().unique(), key=sort_key) == sorted(set(present), key=sort_key)
+    assert obj.array.take([-1] * 2, allow_fill=True).isna().all()
+
+
+@hypothesis.given(
+    a=st.lists(addresses(), min_size=1), b=addresses()
+)  # type: ignore
+def test_compare(a: Sequence[ip.IP_ADDRESS_T], b: ip.IP_ADDRESS_T) -> None:
+    """Test comparisons match the version then address ordering."""
+    arr = InetArray(a)
+    assert (arr == b).tolist() == [x == b for x in a]
+    assert (arr != b).tolist() == [x != b for x in a]
+    assert (arr < b).tolist() == [sort_key(x) < sort_key(b) for x in a]
+    assert (arr >= InetArray([b] * len(a))).tolist() == [sort_key(x) >= sort_key(b) for x in a]
+    assert not (InetArray([None]) == b).any()
+    assert (InetArray([None]) != b).all()
+
+
+@hypothesis.given(
+    data=st.data(), objs=st.lists(addresses())
+)  # type: ignore
+def test_cidr_address(data: st.DataObject, objs: Sequence[ip.IP_ADDRESS_T]) -> None:
+    """Test networks and interfaces match the ipaddress module."""
+    prefixes = [
+        data.draw(st.integers(min_value=0, max_value=x.max_prefixlen)) for x in objs
+    ]
+    arr = InetArray(objs)
+    assert arr.to_cidr_address(prefixes).tolist() == [
+        ip.ip_network((x, p), strict=False) for x, p in zip(objs, prefixes)
+    ]
+    assert arr.to_interface_address(prefixes).tolist() == [
+        ip.ip_interface((x, p)) for x, p in zip(objs, prefixes)
+    ]
+    assert arr.has_host_bits(prefixes).tolist() == [
+        ip.ip_network((x, p), strict=False).network_address != x for x, p in zip(objs, prefixes)
+    ]
+
+
+def test_invalid_prefix() -> None:
+    """Test prefix lengths out of range and strict networks."""
+    arr = InetArray(['10.0.0.1', '::1'])
+    with pytest.raises(ValueError):
+        arr.to_cidr_address([33, 64])
+    with pytest.raises(ValueError):
+        arr.to_cidr_address([8, 129])
+    with pytest.raises(ValueError):
+        arr.to_cidr_address([8, 64], strict=True)
+
+
+@hypothesis.given(
+    buffers=st.lists(st.one_of([st.binary(min_size=n, max_size=n) for n in [4, 8, 16, 20]]))
+)  # type: ignore
+def test_to_inet_address(buffers: Sequence[bytes]) -> None:
+    """Test packing inet addresses from buffers matches the python objects."""
+    obj = pd.Series([np.frombuffer(buffer, np.uint8) for buffer in buffers], dtype=object)
+    packed = obj.inet.to_inet_address(dtype='inet')
+    assert str(packed.dtypes.iloc[0]) == 'inet'
+    assert packed.iloc[:, 0].tolist() == obj.inet.to_inet_address().iloc[:, 0].tolist()
@@ -0,0 +1,121 @@
+"""ObjectType tests."""
+
+from functools import reduce
+from typing import Text
+
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
+import pytest
+
+from snmp_fetch import ObjectType, object_type
+from snmp_fetch.object_type import to_frame, to_record_batch
+
+VIEW_DTYPE = np.dtype([
+    ('#index', np.uint64),
+    ('#timestamp', 'datetime64[s]'),
+    ('#oid', (np.uint64, 3)),
+    ('address', (np.uint8, (2, 4))),
+    ('flags', [('up', np.uint8), ('admin', np.uint8)]),
+    ('octets', np.uint64)
+])
+
+
+@hypothesis.given(
+    data=st.binary(max_size=VIEW_DTYPE.itemsize * 16)  # type: ignore
+)
+def test_to_record_batch(data: bytes) -> None:
+    """Test the columns of a record batch match the columns of the structured view."""
+    pa = pytest.importorskip('pyarrow')  # pylint: disable=invalid-name
+    arr = np.frombuffer(
+        data[:len(data) - len(data) % VIEW_DTYPE.itemsize], dtype=VIEW_DTYPE
+    ).copy()
+    # timestamps are epoch seconds; random bytes would include NaT which arrow maps to null
+    arr['#timestamp'] = (arr['#index'] >> 32).astype('datetime64[s]')
+    batch = to_record_batch(arr)
+    assert batch.schema.names == list(VIEW_DTYPE.names)
+    assert batch.num_rows == len(arr)
+    assert batch.column(0).to_pylist() == arr['#index'].tolist()
+    assert batch.column(2).to_pylist() == arr['#oid'].tolist()
+    assert batch.column(3).to_pylist() == arr['address'].tolist()
+    assert batch.column(4).to_pylist() == [
+        {'up': up, 'admin': admin} for up, admin in arr['flags'].tolist()
+    ]
+    assert batch.column(5).to_pylist() == arr['octets'].tolist()
+    assert np.array_equal(
+        batch.column(1).cast(pa.int64()).to_numpy(), arr['#timestamp'].astype(np.int64)
+    )
+
+
+@pytest.mark.parametrize('index', [0, 2**63 - 1, 2**63, 2**64 - 1])  # type: ignore
+def test_to_frame(index: int) -> None:
+    """Test the columns of a DataFrame match the columns of the structured view."""
+    arr = np.zeros(2, dtype=VIEW_DTYPE)
+    arr['#index'] = [0, index]
+    arr['address'] = np.arange(16, dtype=np.uint8).reshape(2, 2, 4)
+    arr['octets'] = [1, 2**64 - 1]
+    df = to_frame(arr)
+    assert list(df.columns) == list(VIEW_DTYPE.names)
+    assert df['#index'].tolist() == [0, index]
+    assert df['octets'].dtype == np.uint64
+    assert df['octets'].tolist() == [1, 2**64 - 1]
+    assert [x.tolist() for x in df['address']] == arr['address'].tolist()
+    assert df['flags'].tolist() == arr['flags'].tolist()
+
+
+@pytest.mark.parametrize('name', ['ifInOctets', 'ifOutOctets'])  # type: ignore
+def test_pivot(name: Text) -> None:
+    """Test pivoting columns with distinct or shared names matches merging them pairwise."""
+    timestamps = np.array([1, 2, 3], dtype='datetime64[s]')
+    dfs = [
+        pd.DataFrame(
+            {'ifInOctets': [1, 2, 3], '#timestamp': timestamps},
+            index=pd.Index([0, 1, 2], name='#index')
+        ),
+        pd.DataFrame(
+            {name: [4, 5], '#timestamp': timestamps[:2]},
+            index=pd.Index([1, 3], name='#index')
+        )
+    ]
+    df = ObjectType._pivot(dfs)  # pylint: disable=protected-access
+    assert df.columns.is_unique
+    assert df.equals(reduce(ObjectType._merge, dfs))  # pylint: disable=protected-access
+
+
+def test_plan_invalidated_by_children() -> None:
+    """Test adding a child ObjectType recompiles the plans of its ancestors."""
+    # pylint: disable=unused-variable, too-few-public-methods
+
+    @object_type(oid='.1.3.6.1.2.1.2')
+    class Interfaces(ObjectType):
+        """Interfaces."""
+
+    @object_type(Interfaces, oid='.2.1')
+    class IfEntry(ObjectType):
+        """IfEntry."""
+
+        index = np.dtype([('ifIndex', np.uint64)])
+
+    @object_type(IfEntry, oid='.10')
+    class IfInOctets(ObjectType):
+        """IfInOctets."""
+
+        dtype = np.dtype([('ifInOctets', np.uint64)])
+
+    var_binds = Interfaces.null_var_binds()
+    assert Interfaces.null_var_binds() is var_binds
+    assert [oid for oid, _ in var_binds] == [[1, 3, 6, 1, 2, 1, 2, 2, 1, 10]]
+
+    @object_type(IfEntry, oid='.16')
+    class IfOutOctets(ObjectType):
+        """IfOutOctets."""
+
+        dtype = np.dtype([('ifOutOctets', np.uint64)])
+
+    assert [oid for oid, _ in Interfaces.null_var_binds()] == [
+        [1, 3, 6, 1, 2, 1, 2, 2, 1, 10], [1, 3, 6, 1, 2, 1, 2, 2, 1, 16]
+    ]
+    assert [oid for oid, _ in Interfaces.null_var_binds('.1')] == [
+        [1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 1], [1, 3, 6, 1, 2, 1, 2, 2, 1, 16, 1]
+    ]
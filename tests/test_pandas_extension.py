@@ -0,0 +1,91 @@
+"""Pandas extension tests."""
+
+from typing import Sequence
+
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
+
+from snmp_fetch.pandas_extension.types import ip_address as ip
+from snmp_fetch.utils import cuint8_to_int
+
+
+def series(buffers: Sequence[Sequence[int]], dtype: type = np.uint8) -> pd.Series:
+    """Build a Series of buffers with a non-default index."""
+    return pd.Series(
+        [np.array(buffer, dtype=dtype) for buffer in buffers],
+        index=np.arange(len(buffers)) * 2, dtype=object
+    )
+
+
+@hypothesis.given(
+    buffers=st.lists(st.one_of([st.binary(min_size=n, max_size=n) for n in [4, 8, 16, 20]]))
+)  # type: ignore
+def test_to_inet_address(buffers: Sequence[bytes]) -> None:
+    """Test the inet addresses and zones of each row."""
+    obj = series([list(buffer) for buffer in buffers])
+    df = obj.inet.to_inet_address(default_zone=-1)
+    assert list(df.index) == list(obj.index)
+    for buffer, (address, zone) in zip(buffers, df.itertuples(index=False)):
+        size = 4 if len(buffer) in {4, 8} else 16
+        assert address == ip.ip_address(buffer[:size])
+        assert zone == (
+            cuint8_to_int(np.frombuffer(buffer[size:], np.uint8)) if buffer[size:] else -1
+        )
+
+
+@hypothesis.given(
+    buffers=st.lists(st.lists(st.integers(min_value=0, max_value=2 ** 32 - 1), max_size=16))
+)  # type: ignore
+def test_to_object_identifier(buffers: Sequence[Sequence[int]]) -> None:
+    """Test the object identifier of each row."""
+    assert series(buffers, np.uint64).inet.to_object_identifier().tolist() == [
+        '.' + '.'.join(map(str, buffer)) for buffer in buffers
+    ]
+
+
+@hypothesis.given(
+    buffers=st.lists(st.binary(min_size=1, max_size=24))
+)  # type: ignore
+def test_buffer(buffers: Sequence[bytes]) -> None:
+    """Test slicing and chunking each row."""
+    obj = series([list(buffer) for buffer in buffers])
+    assert obj.inet.buffer[0].tolist() == [buffer[0] for buffer in buffers]
+    assert [bytes(x) for x in obj.inet.buffer[1:]] == [buffer[1:] for buffer in buffers]
+    df = obj.inet.buffer[-1, :-1]
+    assert df['A'].tolist() == [buffer[-1] for buffer in buffers]
+    assert [bytes(x) for x in df['B']] == [buffer[:-1] for buffer in buffers]
+    df = obj.inet.buffer.chunk()
+    assert [(bytes(a), bytes(b)) for a, b in df.itertuples(index=False)] == [
+        (buffer[1:buffer[0] + 1], buffer[buffer[0] + 1:]) for buffer in buffers
+    ]
+
+
+@hypothesis.given(
+    data=st.data(),
+    versions=st.lists(st.sampled_from([4, 6])),
+    masks=st.booleans()
+)  # type: ignore
+def test_to_cidr_address(data: st.DataObject, versions: Sequence[int], masks: bool) -> None:
+    """Test networks and interfaces from addresses and masks/prefixes match the ipaddress module."""
+    rows = []
+    for version in versions:
+        width, cls = (32, ip.IPv4Address) if version == 4 else (128, ip.IPv6Address)
+        address = cls(data.draw(st.integers(min_value=0, max_value=2 ** width - 1)))
+        prefixlen = data.draw(st.integers(min_value=0, max_value=width))
+        mask = cls(((2 ** width - 1) << (width - prefixlen)) & (2 ** width - 1))
+        rows.append((address, mask if masks else prefixlen, prefixlen))
+    df = pd.DataFrame(
+        rows, columns=['address', 'mask', 'prefixlen'], index=np.arange(len(rows)) * 2
+    )
+    if df.empty:
+        return
+    networks = df[['address', 'mask']].inet.to_cidr_address()
+    assert list(networks.index) == list(df.index)
+    assert networks.tolist() == [
+        ip.ip_network((address, prefixlen), strict=False) for address, _, prefixlen in rows
+    ]
+    assert df[['address', 'mask']].inet.to_interface_address().tolist() == [
+        ip.ip_interface((address, prefixlen)) for address, _, prefixlen in rows
+    ]
@@ -1,6 +1,7 @@
 """SNMP config test cases."""
 
 import pickle
+from typing import Optional, Text
 
 import hypothesis
 import hypothesis.strategies as st
@@ -14,20 +15,66 @@ from snmp_fetch import SnmpConfig
     max_active_sessions=st.integers(min_value=0, max_value=(2 ** 64) - 1),
     max_var_binds_per_pdu=st.integers(min_value=0, max_value=(2 ** 64) - 1),
     max_bulk_repetitions=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    max_inflight_pdus_per_host=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    threads=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    spill_directory=st.one_of(st.none(), st.text()),
+    max_result_bytes_in_memory=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    session_pool=st.booleans(),
+    session_idle_timeout=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    dns_cache_ttl=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    shared_sockets=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    engine_cache_ttl=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    adaptive_bulk_repetitions=st.booleans(),
+    min_bulk_repetitions=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    partition_retries=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    max_pdus_per_second_per_host=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    max_pdus_per_second=st.integers(min_value=0, max_value=(2 ** 64) - 1),
+    deadline=st.integers(min_value=0, max_value=(2 ** 64) - 1),
 )
 def test_pickle_snmp_config(
         retries: int,
         timeout: int,
         max_active_sessions: int,
         max_var_binds_per_pdu: int,
-        max_bulk_repetitions: int
+        max_bulk_repetitions: int,
+        max_inflight_pdus_per_host: int,
+        threads: int,
+        spill_directory: Optional[Text],
+        max_result_bytes_in_memory: int,
+        session_pool: bool,
+        session_idle_timeout: int,
+        dns_cache_ttl: int,
+        shared_sockets: int,
+        engine_cache_ttl: int,
+        adaptive_bulk_repetitions: bool,
+        min_bulk_repetitions: int,
+        partition_retries: int,
+        max_pdus_per_second_per_host: int,
+        max_pdus_per_second: int,
+        deadline: int
 ) -> None:
+    # pylint: disable=too-many-arguments
     """Test pickling SNMP configs."""
     snmp_config = SnmpConfig(
         retries,
         timeout,
         max_active_sessions,
         max_var_binds_per_pdu,
-        max_bulk_repetitions
+        max_bulk_repetitions,
+        max_inflight_pdus_per_host,
+        threads,
+        spill_directory,
+        max_result_bytes_in_memory,
+        session_pool,
+        session_idle_timeout,
+        dns_cache_ttl,
+        shared_sockets,
+        engine_cache_ttl,
+        adaptive_bulk_repetitions,
+        min_bulk_repetitions,
+        partition_retries,
+        max_pdus_per_second_per_host,
+        max_pdus_per_second,
+        deadline
     )
     assert snmp_config == pickle.loads(pickle.dumps(snmp_config))
@@ -0,0 +1,58 @@
+"""SNMPv3 credentials test cases."""
+
+import pickle
+from typing import Optional, Sequence, Text, Tuple
+
+import hypothesis
+import hypothesis.strategies as st
+import pytest
+
+from snmp_fetch import SnmpError, SnmpErrorType, UsmCredentials
+
+PASSPHRASES = st.text(min_size=8)
+
+
+@hypothesis.given(
+    security_name=st.text(min_size=1),  # type: ignore
+    auth=st.one_of(st.none(), st.tuples(st.sampled_from(['MD5', 'SHA']), PASSPHRASES)),
+    priv=st.one_of(st.none(), st.tuples(st.sampled_from(['DES', 'AES']), PASSPHRASES)),
+    context_name=st.text()
+)
+def test_pickle_usm_credentials(
+        security_name: Text,
+        auth: Optional[Tuple[Text, Text]],
+        priv: Optional[Tuple[Text, Text]],
+        context_name: Text
+) -> None:
+    """Test pickling SNMPv3 credentials."""
+    hypothesis.assume(auth is not None or priv is None)
+    credentials = UsmCredentials(
+        security_name,
+        *(auth or (None, None)),
+        *(priv or (None, None)),
+        context_name=context_name
+    )
+    assert credentials == pickle.loads(pickle.dumps(credentials))
+    snmp_error = SnmpError(SnmpErrorType.SESSION_ERROR, (0, 'localhost', credentials))
+    assert snmp_error == pickle.loads(pickle.dumps(snmp_error))
+
+
+def test_usm_credentials_repr_masks_passphrases() -> None:
+    """Test passphrases are never printed."""
+    credentials = UsmCredentials('user', 'SHA', 'auth-secret', 'AES', 'priv-secret')
+    assert 'secret' not in repr(credentials)
+    assert 'secret' not in str(SnmpError(SnmpErrorType.SESSION_ERROR, (0, '', credentials)))
+
+
+@pytest.mark.parametrize('args', [  # type: ignore
+    ('',),                                                # no security name
+    ('user', 'SHA256', 'passphrase'),                     # unknown auth protocol
+    ('user', 'SHA', 'passphrase', '3DES', 'passphrase'),  # unknown priv protocol
+    ('user', None, None, 'AES', 'passphrase'),            # priv without auth
+    ('user', 'SHA'),                                      # auth protocol without a passphrase
+    ('user', 'SHA', 'short'),                             # passphrase under 8 characters
+])
+def test_invalid_usm_credentials(args: Sequence[Optional[Text]]) -> None:
+    """Test invalid SNMPv3 credentials are rejected."""
+    with pytest.raises(ValueError):
+        UsmCredentials(*args)